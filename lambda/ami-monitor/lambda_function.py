@@ -1,10 +1,14 @@
-import boto3
 import json
 from datetime import datetime, timedelta
 
-ec2_primary = boto3.client('ec2', region_name='us-east-1')
-ec2_dr = boto3.client('ec2', region_name='us-west-2')
-sns_client = boto3.client('sns')
+from dr_common import alerts, breaker, discovery, instrumentation
+from dr_common.clients import get_client
+from dr_common.stores import open_store
+from dr_common.timeline import build_timeline, summarize
+
+ec2_primary = get_client('ec2', region_name='us-east-1')
+ec2_dr = get_client('ec2', region_name='us-west-2')
+sns_client = get_client('sns')
 
 def lambda_handler(event, context):
     """
@@ -15,6 +19,18 @@ def lambda_handler(event, context):
     sns_topic_arn = event['sns_topic_arn']
     max_age_hours = event.get('max_age_hours', 48)
     
+    instrumentation.collector.reset()
+    breaker.registry.reset_counters()
+    cycle = discovery.Cycle.from_event(event)
+    
+    # Alert state shared with the master monitor, so a condition either
+    # reports is alerted once when it opens and once when it resolves
+    tracker = alerts.Tracker(
+        open_store(event['alert_store']), 'ami-monitor',
+        event.get('alert_reminder_hours', alerts.DEFAULT_REMINDER_HOURS)
+    ) if event.get('alert_store') else None
+    scopes = {'ami': instance_id}
+    
     issues = []
     report = {
         'timestamp': datetime.now().isoformat(),
@@ -23,38 +39,26 @@ def lambda_handler(event, context):
     
     try:
         # Check AMIs in primary region
-        primary_amis = ec2_primary.describe_images(
-            Filters=[
-                {'Name': 'tag:Backup', 'Values': ['daily']},
-                {'Name': 'state', 'Values': ['available']}
-            ],
-            Owners=['self']
+        primary_amis = cycle.fetch(
+            discovery.images('us-east-1', **discovery.DAILY_BACKUP_IMAGES), ec2_primary
         )
         
-        report['primary_ami_count'] = len(primary_amis['Images'])
+        report['primary_ami_count'] = len(primary_amis)
         
         # Check AMIs in DR region
-        dr_amis = ec2_dr.describe_images(
-            Filters=[
-                {'Name': 'state', 'Values': ['available']}
-            ],
-            Owners=['self']
-        )
-        
-        report['dr_ami_count'] = len(dr_amis['Images'])
+        report['dr_ami_count'] = len(cycle.fetch(
+            discovery.images('us-west-2', **discovery.AVAILABLE_IMAGES), ec2_dr
+        ))
         
         # Check for recent backups
-        if primary_amis['Images']:
-            latest_ami = max(primary_amis['Images'], 
-                           key=lambda x: x['CreationDate'])
-            
-            creation_time = datetime.strptime(
-                latest_ami['CreationDate'], 
-                '%Y-%m-%dT%H:%M:%S.%fZ'
-            )
+        if primary_amis:
+            timeline = summarize(build_timeline(
+                (x.resource_id, x.created) for x in primary_amis
+            ), sla_hours=max_age_hours)
             
-            age_hours = (datetime.utcnow() - creation_time).total_seconds() / 3600
+            age_hours = timeline['fleet']['min_age_hours']
             report['latest_ami_age_hours'] = round(age_hours, 2)
+            report['stale_resources'] = timeline['fleet']['stale_resources']
             
             if age_hours > max_age_hours:
                 issues.append(
@@ -64,11 +68,11 @@ def lambda_handler(event, context):
             issues.append("❌ No AMIs found in primary region")
         
         # Check DR region
-        if not dr_amis['Images']:
+        if not report['dr_ami_count']:
             issues.append("⚠️ No AMIs found in DR region")
         
         # Check DLM policy status
-        dlm_policies = boto3.client('dlm', region_name='us-east-1').get_lifecycle_policies()
+        dlm_policies = get_client('dlm', region_name='us-east-1').get_lifecycle_policies()
         
         enabled_policies = [p for p in dlm_policies['Policies'] if p['State'] == 'ENABLED']
         report['dlm_policies_enabled'] = len(enabled_policies)
@@ -79,8 +83,15 @@ def lambda_handler(event, context):
         report['issues'] = issues
         report['status'] = 'healthy' if not issues else 'issues_detected'
         
-        # Send alert if issues found
-        if issues:
+        # Send alert if issues found (or, with alert tracking, on changes)
+        notifications = alerts.due(tracker, issues, scopes)
+        if notifications is not None:
+            report['alerts'] = notifications
+        if notifications or (notifications is None and issues):
+            changes = ''
+            if notifications:
+                changes = f"\nAlert Changes:\n{chr(10).join(alerts.describe(notifications))}\n"
+            
             message = f"""
 AMI Backup Monitoring Alert
 
@@ -88,20 +99,25 @@ Timestamp: {report['timestamp']}
 Instance ID: {instance_id}
 
 Issues Detected:
-{chr(10).join(issues)}
-
+{chr(10).join(issues) or 'None'}
+{changes}
 Primary Region AMIs: {report['primary_ami_count']}
 DR Region AMIs: {report['dr_ami_count']}
 Latest AMI Age: {report.get('latest_ami_age_hours', 'N/A')} hours
 DLM Policies Enabled: {report['dlm_policies_enabled']}
             """
             
+            resolved = notifications and all(n['event'] == 'resolved' for n in notifications)
             sns_client.publish(
                 TopicArn=sns_topic_arn,
-                Subject='⚠️ AMI Backup Alert',
+                Subject='✅ AMI Backup Alert Resolved' if resolved else '⚠️ AMI Backup Alert',
                 Message=message
             )
         
+        report['api_calls'] = instrumentation.collector.stats()
+        report['circuit_breakers'] = breaker.registry.stats()
+        report['discovery'] = cycle.stats()
+        
         print(json.dumps(report, indent=2))
         
         return {
@@ -113,11 +129,13 @@ DLM Policies Enabled: {report['dlm_policies_enabled']}
         error_message = f"Error monitoring AMI backups: {str(e)}"
         print(error_message)
         
-        sns_client.publish(
-            TopicArn=sns_topic_arn,
-            Subject='❌ AMI Monitor Error',
-            Message=error_message
-        )
+        # A failing run resolves nothing and repeats only as reminders
+        if alerts.due(tracker, [f"❌ {error_message}"], scopes, resolve=False) != []:
+            sns_client.publish(
+                TopicArn=sns_topic_arn,
+                Subject='❌ AMI Monitor Error',
+                Message=error_message
+            )
         
         return {
             'statusCode': 500,
@@ -0,0 +1,163 @@
+import json
+from datetime import datetime, timezone
+
+from dr_common import breaker, discovery, instrumentation, scheduling
+from dr_common.clients import get_client
+from dr_common.stores import open_store
+
+rds_client = get_client('rds', region_name=discovery.PRIMARY_REGION)
+s3_client = get_client('s3', region_name=discovery.PRIMARY_REGION)
+dlm_client = get_client('dlm', region_name=discovery.PRIMARY_REGION)
+cloudwatch_client = get_client('cloudwatch', region_name=discovery.PRIMARY_REGION)
+dr_cloudwatch_client = get_client('cloudwatch', region_name=discovery.DR_REGION)
+events_client = get_client('events')
+lambda_client = get_client('lambda')
+
+def lambda_handler(event, context):
+    """
+    Probe each check cheaply and invoke the consumers whose full run is due
+    because a probe saw drift or their SLA interval is running out
+    """
+    
+    consumers = event['consumers']
+    
+    instrumentation.collector.reset()
+    breaker.registry.reset_counters()
+    
+    # Scheduled events carry the time they were due; decide against that
+    now = datetime.fromisoformat(event['time'].replace('Z', '+00:00')) if event.get('time') \
+        else datetime.now(timezone.utc)
+    
+    report = {
+        'timestamp': now.isoformat(),
+        'probes': {},
+        'consumers': {},
+        'issues': []
+    }
+    
+    try:
+        schedule = scheduling.Schedule(open_store(event['state_store']))
+        
+        # ============================================
+        # 1. PROBES
+        # ============================================
+        print("Probing checks...")
+        
+        for check, probe in probes(event, now).items():
+            window = schedule.quiet(check, now)
+            if window:
+                report['probes'][check] = {'skipped': f"quiet window {window}"}
+                continue
+            try:
+                observed, windows = probe()
+                drift = schedule.observe(check, observed, windows, consumers, now)
+                report['probes'][check] = {'observed': observed, 'drift': drift}
+            except Exception as e:
+                schedule.failed(check, consumers)
+                report['probes'][check] = {'error': str(e)}
+                report['issues'].append(f"⚠️ Probe of {check} failed: {str(e)}")
+        
+        # ============================================
+        # 2. FULL RUNS
+        # ============================================
+        print("Deciding full runs...")
+        
+        due = {}
+        for name, consumer in consumers.items():
+            run, reason = schedule.decide(name, consumer, now)
+            report['consumers'][name] = {'due': run, 'reason': reason}
+            if run:
+                due[name] = consumer
+        
+        for name in invoke(due, event.get('orchestrator'), report):
+            schedule.ran(name, now)
+        
+        # ============================================
+        # 3. NEXT PROBE
+        # ============================================
+        minutes = schedule.next_probe_minutes(consumers, now)
+        report['probe_minutes'] = minutes
+        if minutes != schedule.probe_minutes and event.get('rule_name'):
+            try:
+                events_client.put_rule(
+                    Name=event['rule_name'],
+                    ScheduleExpression=f"rate({minutes} minutes)"
+                )
+                print(f"Probe interval {schedule.probe_minutes} -> {minutes} minutes")
+            except Exception as e:
+                # The rule keeps its current rate; the next run tries again
+                minutes = schedule.probe_minutes
+                report['issues'].append(f"⚠️ Could not update schedule rule: {str(e)}")
+        schedule.probe_minutes = minutes
+        schedule.save()
+        
+        report['status'] = 'healthy' if not report['issues'] else 'issues_detected'
+        report['api_calls'] = instrumentation.collector.stats()
+        report['circuit_breakers'] = breaker.registry.stats()
+        
+        print(json.dumps(report, indent=2, default=str))
+        
+        return {
+            'statusCode': 200,
+            'body': json.dumps(report, default=str)
+        }
+    
+    except Exception as e:
+        error_message = f"Error running check scheduler: {str(e)}"
+        print(error_message)
+        
+        return {
+            'statusCode': 500,
+            'body': json.dumps({'error': str(e)})
+        }
+
+def probes(event, now):
+    """The probe for each check the event has a resource for"""
+    checks = {}
+    if event.get('db_instance_id'):
+        checks['rds'] = lambda: scheduling.probe_rds(rds_client, event['db_instance_id'])
+    if event.get('primary_bucket') and event.get('dr_bucket'):
+        checks['s3'] = lambda: scheduling.probe_s3(
+            s3_client, cloudwatch_client, dr_cloudwatch_client,
+            event['primary_bucket'], event['dr_bucket'], now
+        )
+    checks['ami'] = lambda: scheduling.probe_ami(dlm_client)
+    return checks
+
+def invoke(due, orchestrator, report):
+    """
+    Invoke the due consumers, through the discovery orchestrator when one is
+    configured; returns the names that were invoked
+    """
+    if not due:
+        return []
+    
+    if orchestrator:
+        # Consumers that are not due are not in the graph, so nothing waits for them
+        consumers = {
+            name: dict(consumer, after=[other for other in consumer.get('after', []) if other in due])
+            for name, consumer in due.items()
+        }
+        try:
+            lambda_client.invoke(
+                FunctionName=orchestrator['function_name'],
+                InvocationType='Event',
+                Payload=json.dumps({'cache_store': orchestrator['cache_store'], 'consumers': consumers})
+            )
+            return list(due)
+        except Exception as e:
+            report['issues'].append(f"❌ Could not invoke {orchestrator['function_name']}: {str(e)}")
+            return []
+    
+    invoked = []
+    for name, consumer in due.items():
+        try:
+            lambda_client.invoke(
+                FunctionName=consumer['function_name'],
+                InvocationType='Event',
+                Payload=json.dumps(consumer.get('event', {}))
+            )
+            invoked.append(name)
+        except Exception as e:
+            report['issues'].append(f"❌ Could not invoke {name}: {str(e)}")
+    return invoked
@@ -0,0 +1,50 @@
+import html
+import time
+
+from dr_common import dashboard
+from dr_common.stores import open_store
+
+# A warm container serves a view from memory for this long before reading
+# the published copy again (the master monitor republishes every run)
+CACHE_SECONDS = 300
+
+# (dashboard_store, view) -> (fetched at, HTML)
+_cache = {}
+
+# dashboard_store -> store, so a warm container reuses its S3 client
+_stores = {}
+
+def lambda_handler(event, context):
+    """
+    CloudWatch custom widget serving a precomputed dashboard view.
+    Never lists or describes resources; the master monitor publishes the views.
+    """
+    
+    if event.get('describe'):
+        return dashboard.DOCS
+    
+    view = event.get('view', 'freshness')
+    location = event.get('dashboard_store')
+    if not location:
+        return "<p>⚠️ Set dashboard_store in the widget params.</p>"
+    
+    cached = _cache.get((location, view))
+    if cached and time.monotonic() - cached[0] < CACHE_SECONDS:
+        return cached[1]
+    
+    try:
+        store = _stores.get(location) or _stores.setdefault(location, open_store(location))
+        body = dashboard.read(store, view)
+    except Exception as e:
+        print(f"Error reading dashboard view {view}: {str(e)}")
+        # A stale copy beats an error on the dashboard
+        if cached:
+            return cached[1]
+        return f"<p>❌ Could not read the {html.escape(view)} view: {html.escape(str(e))}</p>"
+    
+    if body is None:
+        return (f"<p>The {html.escape(view)} view has not been published yet; "
+                f"the next master monitor run writes it.</p>")
+    
+    _cache[(location, view)] = (time.monotonic(), body)
+    return body
@@ -0,0 +1,127 @@
+import json
+import time
+from datetime import datetime
+
+from dr_common import breaker, discovery, instrumentation
+from dr_common.clients import get_client
+from dr_common.stores import open_store
+
+lambda_client = get_client('lambda')
+
+def lambda_handler(event, context):
+    """
+    Discover the recovery points every due consumer needs once, cache them
+    for the cycle and invoke each consumer with a pointer to the cache
+    """
+    
+    cache_store = event['cache_store']
+    consumers = event['consumers']
+    max_workers = event.get('max_workers', discovery.DEFAULT_WORKERS)
+    
+    instrumentation.collector.reset()
+    breaker.registry.reset_counters()
+    
+    store = open_store(cache_store)
+    cycle_id = discovery.new_cycle_id()
+    
+    report = {
+        'timestamp': datetime.now().isoformat(),
+        'cycle': cycle_id,
+        'nodes': {},
+        'consumers': {},
+        'issues': []
+    }
+    
+    try:
+        # Consumers asking for the same listing share one node
+        nodes = {}
+        needs = {}
+        for name, consumer in consumers.items():
+            planned = discovery.plan(name, consumer.get('event', {}))
+            nodes.update((node.key, node) for node in planned)
+            needs[name] = sorted({node.key for node in planned})
+        
+        # A node task per listing; each consumer runs after its nodes and
+        # any consumers it names in "after"
+        cached = set()
+        tasks = {}
+        for key, node in nodes.items():
+            tasks[key] = (discover_node(store, cycle_id, node, cached), [])
+        for name, consumer in consumers.items():
+            tasks[name] = (
+                invoke_consumer(consumer, cache_store, cycle_id, needs[name], cached),
+                needs[name] + consumer.get('after', [])
+            )
+        
+        outcomes = discovery.run_graph(tasks, max_workers)
+        
+        for key, node in nodes.items():
+            result, error = outcomes[key]
+            report['nodes'][key] = dict(
+                node.describe(),
+                uses=sum(1 for keys in needs.values() if key in keys),
+                **(result or {'error': error})
+            )
+            if error:
+                report['issues'].append(f"⚠️ Discovery of {key} failed: {error}")
+        
+        for name in consumers:
+            result, error = outcomes[name]
+            report['consumers'][name] = result or {'error': error}
+            if error:
+                report['issues'].append(f"❌ Could not invoke {name}: {error}")
+        
+        report['status'] = 'healthy' if not report['issues'] else 'issues_detected'
+        report['api_calls'] = instrumentation.collector.stats()
+        report['circuit_breakers'] = breaker.registry.stats()
+        
+        print(json.dumps(report, indent=2, default=str))
+        
+        return {
+            'statusCode': 200,
+            'body': json.dumps(report, default=str)
+        }
+    
+    except Exception as e:
+        error_message = f"Error running discovery cycle: {str(e)}"
+        print(error_message)
+        
+        return {
+            'statusCode': 500,
+            'body': json.dumps({'error': str(e)})
+        }
+
+def discover_node(store, cycle_id, node, cached):
+    """Task that fetches one node and caches its result for the cycle"""
+    
+    def run():
+        started = time.perf_counter()
+        value = node.fetch()
+        discovery.save(store, cycle_id, node, value)
+        cached.add(node.key)
+        return {
+            'seconds': round(time.perf_counter() - started, 3),
+            'size': value if isinstance(value, int) else len(value)
+        }
+    
+    return run
+
+def invoke_consumer(consumer, cache_store, cycle_id, keys, cached):
+    """Task that invokes a consumer with the nodes the cycle cached for it"""
+    
+    def run():
+        # Its node tasks have finished; the consumer lists failed ones itself
+        available = [key for key in keys if key in cached]
+        payload = dict(consumer.get('event', {}), discovery={
+            'store': cache_store,
+            'cycle': cycle_id,
+            'nodes': available
+        })
+        lambda_client.invoke(
+            FunctionName=consumer['function_name'],
+            InvocationType='Event',
+            Payload=json.dumps(payload)
+        )
+        return {'function_name': consumer['function_name'], 'cached_nodes': len(available)}
+    
+    return run
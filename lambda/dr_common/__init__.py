@@ -0,0 +1,6 @@
+"""
+Shared helpers for the disaster recovery Lambda functions.
+
+Copy this package next to lambda_function.py before zipping a function
+(or publish it as a Lambda layer) so `import dr_common` resolves.
+"""
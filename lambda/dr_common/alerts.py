@@ -0,0 +1,320 @@
+"""
+Alert fingerprints and their open / acknowledged / resolved state.
+
+Publishing every current issue on every run sends a lasting condition
+again every six hours, and the AMI and S3 monitors repeat what the master
+monitor already reported. Instead each issue text is reduced to the
+condition it describes: CONDITIONS maps the phrasings the monitors use
+for the same condition to one name within a check ("rds", "s3", "ami"),
+scoped by the resource the check covers; any other text stands for
+itself with its figures masked. The fingerprint of (check, scope,
+condition) is shared by every monitor, and a Tracker folds a run's issues
+into the shared state and returns only the notifications now due:
+
+    opened    the first time any monitor reports the condition
+    reminder  every reminder_hours while it stays open, unless acknowledged
+    resolved  once no monitor that reported it still does
+
+State lives in a store (see dr_common.stores): alerts/open/<fingerprint>.json
+per open condition, naming the sources that currently report it, and
+alerts/sources/<source>.json with the fingerprints each source has open,
+so a run reads only the conditions it reports now or reported last time.
+Opening is a create-only write and every notification is claimed with a
+create-only marker under alerts/sent/ before it is published, so monitors
+running at the same time never send the same notification twice (expire
+alerts/sent/ with a bucket lifecycle rule). An open alert is only
+rewritten if it is still the version that was read (see
+dr_common.stores); a write that loses to another monitor or to
+acknowledge() re-reads the alert and applies its change again, so an
+acknowledgement is never overwritten and reminders stay suppressed.
+
+A check that failed or timed out did not evaluate its conditions, so its
+open alerts are left open rather than resolved.
+"""
+
+import hashlib
+import json
+import re
+from datetime import datetime, timedelta, timezone
+
+DEFAULT_REMINDER_HOURS = 24
+
+# A source that has not reported a condition for this long (disabled,
+# failing before it checks) no longer keeps it open
+STALE_SOURCE_HOURS = 48
+
+# Re-reads of an open alert that kept changing before giving up
+MAX_WRITE_ATTEMPTS = 5
+
+# (pattern, check, condition); the first match names an issue's condition
+CONDITIONS = tuple((re.compile(pattern), check, name) for pattern, check, name in (
+    (r'RDS automated backups are disabled', 'rds', 'backups-disabled'),
+    (r'No RDS snapshots found in primary region', 'rds', 'no-primary-snapshots'),
+    (r'Latest RDS snapshot is .* hours old', 'rds', 'stale-snapshot'),
+    (r'No RDS snapshots found in DR region', 'rds', 'no-dr-snapshots'),
+    (r'Latest RDS snapshot copied to DR is', 'rds', 'stale-dr-copy'),
+    (r'Error checking RDS', 'rds', 'error'),
+    (r'RDS backup check (skipped|timed out)', 'rds', 'incomplete'),
+    (r'S3 replication is not configured|Replication is not enabled', 's3', 'replication-disabled'),
+    (r'S3 versioning is disabled', 's3', 'versioning-disabled'),
+    (r'Large object count difference|Object count mismatch', 's3', 'object-count-mismatch'),
+    (r'Error checking S3|Error monitoring replication', 's3', 'error'),
+    (r'S3 replication check (skipped|timed out)', 's3', 'incomplete'),
+    (r'No enabled DLM policies found', 'ami', 'dlm-disabled'),
+    (r'No AMIs found in primary region', 'ami', 'no-primary-amis'),
+    (r'Latest AMI is .* hours old', 'ami', 'stale-ami'),
+    (r'No AMIs found in DR region', 'ami', 'no-dr-amis'),
+    (r'Latest AMI copied to DR is', 'ami', 'stale-dr-copy'),
+    (r'Error checking AMIs|Error monitoring AMI', 'ami', 'error'),
+    (r'AMI backup check (skipped|timed out)', 'ami', 'incomplete')
+))
+
+# Conditions meaning the rest of their check was not evaluated
+NOT_EVALUATED = ('error', 'incomplete')
+
+_NUMBERS = re.compile(r'\d+(\.\d+)?')
+_LEADING_SYMBOLS = re.compile(r'^\W+')
+
+EVENT_LABELS = {
+    'opened': '🔴 NEW',
+    'reminder': '🔁 STILL OPEN',
+    'resolved': '🟢 RESOLVED'
+}
+
+
+def condition(text):
+    """(check, condition) an issue text describes; check is None for unlisted texts"""
+    for pattern, check, name in CONDITIONS:
+        if pattern.search(text):
+            return check, name
+    return None, _NUMBERS.sub('#', _LEADING_SYMBOLS.sub('', text))
+
+
+def fingerprint(check, scope, name):
+    return hashlib.sha1(f"{check or ''}|{scope or ''}|{name}".encode()).hexdigest()[:16]
+
+
+def severity(text):
+    return 'critical' if text.startswith(('❌', '🚨')) else 'warning'
+
+
+def _open_key(fp):
+    return f"alerts/open/{fp}.json"
+
+
+def _sources_key(source):
+    return f"alerts/sources/{source}.json"
+
+
+def _hours(since, now):
+    return round((now - datetime.fromisoformat(since)).total_seconds() / 3600, 1)
+
+
+def _read(store, key):
+    data, tag = store.get_tagged(key)
+    return (json.loads(data) if data is not None else None), tag
+
+
+def _conflict(key):
+    return RuntimeError(f"{key} kept changing while it was updated; gave up after "
+                        f"{MAX_WRITE_ATTEMPTS} tries")
+
+
+def acknowledged(state, now=None):
+    """Whether reminders for an open alert are suppressed"""
+    ack = state.get('acknowledged')
+    if not ack:
+        return False
+    if ack.get('until') is None:
+        return True
+    return (now or datetime.now(timezone.utc)) < datetime.fromisoformat(ack['until'])
+
+
+class Tracker:
+    """One source's view of the shared alert state"""
+
+    def __init__(self, store, source, reminder_hours=DEFAULT_REMINDER_HOURS):
+        self.store = store
+        self.source = source
+        self.reminder_hours = reminder_hours
+
+    def _get(self, key):
+        data = self.store.get(key)
+        return json.loads(data) if data is not None else None
+
+    def _put(self, key, value, if_absent=False, if_match=None):
+        return self.store.put(key, json.dumps(value).encode(), if_absent=if_absent, if_match=if_match)
+
+    def _claim(self, state, event):
+        """Create-only marker for one notification; False if it was already sent"""
+        return self.store.put(
+            f"alerts/sent/{state['fingerprint']}/{state['opened']}-{event}", b'', if_absent=True
+        )
+
+    def update(self, issues, scopes=None, resolve=True, now=None):
+        """
+        Fold the issues of one run into the alert state; returns the
+        notifications due, as dicts (event, fingerprint, issue, severity,
+        check, opened, open_hours, sources, acknowledged).
+
+        scopes maps a check to the resource it covered ({'ami': instance_id});
+        resolve=False (a run that failed before checking) opens and
+        reminds but resolves nothing.
+        """
+        now = now or datetime.now(timezone.utc)
+        scopes = scopes or {}
+
+        seen = {}
+        for text in issues:
+            check, name = condition(text)
+            fp = fingerprint(check, scopes.get(check), name)
+            seen.setdefault(fp, {
+                'check': check,
+                'scope': scopes.get(check),
+                'condition': name,
+                'issue': text,
+                'severity': severity(text)
+            })
+        not_evaluated = {issue['check'] for issue in seen.values() if issue['condition'] in NOT_EVALUATED}
+
+        notifications = []
+        for fp, issue in seen.items():
+            notifications.extend(self._report(fp, issue, now))
+
+        still_open = set(seen)
+        for fp in self._get(_sources_key(self.source)) or []:
+            if fp in seen:
+                continue
+            state, tag = _read(self.store, _open_key(fp))
+            if state is None:
+                continue
+            if not resolve or state['check'] in not_evaluated:
+                still_open.add(fp)
+                continue
+            notifications.extend(self._withdraw(state, tag, now))
+
+        self._put(_sources_key(self.source), sorted(still_open))
+        return notifications
+
+    def _report(self, fp, issue, now):
+        key = _open_key(fp)
+        for _ in range(MAX_WRITE_ATTEMPTS):
+            state, tag = _read(self.store, key)
+            if state is None:
+                state = dict(issue, fingerprint=fp, opened=now.isoformat(), last_seen=now.isoformat(),
+                             sources={self.source: now.isoformat()}, reminders=0, acknowledged=None)
+                if self._put(key, state, if_absent=True):
+                    return [self._notification('opened', state, now)] if self._claim(state, 'opened') else []
+                # Another monitor opened it a moment ago
+                continue
+
+            state.update(issue=issue['issue'], severity=issue['severity'], last_seen=now.isoformat())
+            state['sources'][self.source] = now.isoformat()
+            self._drop_stale_sources(state, now)
+            reminders = int(_hours(state['opened'], now) // self.reminder_hours)
+            remind = reminders > state['reminders']
+            state['reminders'] = max(reminders, state['reminders'])
+            if not self._put(key, state, if_match=tag):
+                continue
+
+            # Claimed only once the write stands, so a retry cannot lose it
+            if remind and not acknowledged(state, now) and self._claim(state, f"reminder-{reminders}"):
+                return [self._notification('reminder', state, now)]
+            return []
+        raise _conflict(key)
+
+    def _withdraw(self, state, tag, now):
+        """This source no longer reports the condition; resolve it if none does"""
+        key = _open_key(state['fingerprint'])
+        for _ in range(MAX_WRITE_ATTEMPTS):
+            state['sources'].pop(self.source, None)
+            self._drop_stale_sources(state, now)
+            if not state['sources']:
+                self.store.delete(key)
+                return [self._notification('resolved', state, now)] if self._claim(state, 'resolved') else []
+            if self._put(key, state, if_match=tag):
+                return []
+            state, tag = _read(self.store, key)
+            if state is None:
+                return []
+        raise _conflict(key)
+
+    def _drop_stale_sources(self, state, now):
+        cutoff = now - timedelta(hours=STALE_SOURCE_HOURS)
+        state['sources'] = {
+            source: seen for source, seen in state['sources'].items()
+            if source == self.source or datetime.fromisoformat(seen) >= cutoff
+        }
+
+    def _notification(self, event, state, now):
+        return {
+            'event': event,
+            'fingerprint': state['fingerprint'],
+            'issue': state['issue'],
+            'severity': state['severity'],
+            'check': state['check'],
+            'opened': state['opened'],
+            'open_hours': _hours(state['opened'], now),
+            'sources': sorted(state['sources']),
+            'acknowledged': acknowledged(state, now)
+        }
+
+
+def open_alerts(store):
+    """The state of every open alert"""
+    alerts = []
+    for key in store.list('alerts/open/'):
+        data = store.get(key)
+        if data is not None:
+            alerts.append(json.loads(data))
+    return alerts
+
+
+def acknowledge(store, fp, by=None, hours=None):
+    """
+    Suppress reminders for an open alert, for hours or until it resolves;
+    returns its state, or None if it is not open
+    """
+    key = _open_key(fp)
+    for _ in range(MAX_WRITE_ATTEMPTS):
+        state, tag = _read(store, key)
+        if state is None:
+            return None
+        now = datetime.now(timezone.utc)
+        state['acknowledged'] = {
+            'by': by,
+            'at': now.isoformat(),
+            'until': (now + timedelta(hours=hours)).isoformat() if hours else None
+        }
+        if store.put(key, json.dumps(state).encode(), if_match=tag):
+            return state
+    raise _conflict(key)
+
+
+def due(tracker, issues, scopes=None, resolve=True):
+    """
+    The notifications tracker finds due, or None when alerts are not
+    tracked (no tracker, or its state could not be read or written) and
+    every issue should be sent as before
+    """
+    if tracker is None:
+        return None
+    try:
+        return tracker.update(issues, scopes, resolve)
+    except Exception as e:
+        print(f"Error tracking alert state: {str(e)}")
+        return None
+
+
+def describe(notifications):
+    """One line per notification, for alert messages"""
+    lines = []
+    for n in notifications:
+        if n['event'] == 'opened':
+            when = ''
+        elif n['event'] == 'resolved':
+            when = f" after {n['open_hours']}h"
+        else:
+            when = f" for {n['open_hours']}h"
+        lines.append(f"{EVENT_LABELS[n['event']]}{when}: {n['issue']} [{n['fingerprint']}]")
+    return lines
@@ -0,0 +1,195 @@
+"""
+Per-region circuit breakers for AWS calls.
+
+One breaker per (region, service) lives in a process-wide registry, so its
+state carries over between warm invocations. A breaker opens after
+FAILURE_THRESHOLD consecutive failures, where a failure is a 5xx or
+throttling error that survived botocore's retries, a connection error or
+timeout, or a call slower than LATENCY_THRESHOLD_MS. While it is open
+calls into that region and service fail immediately with a RegionDegraded
+error instead of paying the full retry and timeout cost again. After
+COOLDOWN_SECONDS one probe call is let through (half-open): success
+closes the breaker, failure opens it for another cooldown.
+"""
+
+import threading
+import time
+
+from botocore.awsrequest import AWSResponse
+
+from dr_common.throttling import THROTTLE_CODES
+
+FAILURE_THRESHOLD = 5
+COOLDOWN_SECONDS = 60.0
+LATENCY_THRESHOLD_MS = 15000.0
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+DEGRADED_CODE = 'RegionDegraded'
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a timed half-open probe"""
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, cooldown_seconds=COOLDOWN_SECONDS,
+                 latency_threshold_ms=LATENCY_THRESHOLD_MS):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.latency_threshold_ms = latency_threshold_ms
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.last_failure = None
+        self.probing = False
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+    def allow(self):
+        """Whether a call may be sent now"""
+        with self.lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.cooldown_seconds:
+                self.state = HALF_OPEN
+                self.probing = False
+
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self.probing:
+                # Exactly one probe at a time
+                self.probing = True
+                return True
+
+            self.rejected += 1
+            return False
+
+    def succeeded(self, latency_ms=0.0):
+        if latency_ms > self.latency_threshold_ms:
+            self.failed(f'slow response ({latency_ms / 1000:.1f}s)')
+            return
+        with self.lock:
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def failed(self, reason):
+        with self.lock:
+            self.consecutive_failures += 1
+            self.last_failure = reason
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+            self.probing = False
+
+    def snapshot(self):
+        with self.lock:
+            entry = {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'rejected_calls': self.rejected,
+                'last_failure': self.last_failure
+            }
+            if self.state == OPEN:
+                entry['retry_in_seconds'] = round(
+                    max(0.0, self.cooldown_seconds - (time.monotonic() - self.opened_at)), 1
+                )
+            return entry
+
+
+class BreakerRegistry:
+    """Circuit breakers keyed by (region, service)"""
+
+    def __init__(self, **settings):
+        self.settings = settings
+        self.breakers = {}
+        self.lock = threading.Lock()
+
+    def get(self, region, service):
+        key = (region, service)
+        breaker = self.breakers.get(key)
+        if breaker is None:
+            with self.lock:
+                breaker = self.breakers.setdefault(key, CircuitBreaker(**self.settings))
+        return breaker
+
+    def reset(self):
+        """Forget every breaker (fresh process)"""
+        with self.lock:
+            self.breakers = {}
+
+    def reset_counters(self):
+        """Start counting rejected calls afresh (states are kept)"""
+        with self.lock:
+            for breaker in self.breakers.values():
+                with breaker.lock:
+                    breaker.rejected = 0
+
+    def degraded(self):
+        """'region/service' of every breaker that is not closed"""
+        return sorted(
+            '/'.join(key) for key, breaker in self.breakers.items() if breaker.state != CLOSED
+        )
+
+    def stats(self):
+        """Breaker states for the report, keyed by 'region/service'"""
+        return {'/'.join(key): breaker.snapshot() for key, breaker in sorted(self.breakers.items())}
+
+
+registry = BreakerRegistry()
+
+
+def _failure_reason(http_response, parsed):
+    code = (parsed or {}).get('Error', {}).get('Code')
+    if code in THROTTLE_CODES:
+        return f'throttled ({code})'
+    if http_response is not None and http_response.status_code >= 500:
+        return f'{http_response.status_code} {code or "server error"}'
+    return None
+
+
+def install(client, shared=None):
+    """Guard every call a boto3 client makes with its (region, service) breaker"""
+    shared = shared or registry
+    region = client.meta.region_name or 'global'
+    events = client.meta.events
+
+    def before_call(event_name, context=None, **kwargs):
+        service = event_name.split('.')[1]
+        breaker = shared.get(region, service)
+        if breaker.allow():
+            if context is not None:
+                context['breaker_started'] = time.perf_counter()
+            return None
+
+        message = (f"{region} {service} API degraded: circuit open after repeated failures "
+                   f"({breaker.last_failure}); failing fast")
+        parsed = {
+            'Error': {'Code': DEGRADED_CODE, 'Message': message},
+            'ResponseMetadata': {'HTTPStatusCode': 503, 'RetryAttempts': 0}
+        }
+        return AWSResponse(None, 503, {}, None), parsed
+
+    def after_call(event_name, http_response=None, parsed=None, context=None, **kwargs):
+        context = context or {}
+        started = context.get('breaker_started')
+        if started is None:
+            # Rejected by the breaker itself
+            return
+
+        breaker = shared.get(region, event_name.split('.')[1])
+        reason = _failure_reason(http_response, parsed)
+        if reason:
+            breaker.failed(reason)
+        else:
+            breaker.succeeded((time.perf_counter() - started) * 1000)
+
+    def after_call_error(event_name, exception=None, context=None, **kwargs):
+        if (context or {}).get('breaker_started') is not None:
+            shared.get(region, event_name.split('.')[1]).failed(type(exception).__name__)
+
+    # First, so a rejected call neither waits for a rate-limit token nor is timed
+    events.register_first('before-call.*.*', before_call, unique_id='dr-breaker-before-call')
+    events.register('after-call.*.*', after_call, unique_id='dr-breaker-after-call')
+    events.register('after-call-error.*.*', after_call_error, unique_id='dr-breaker-after-call-error')
+    return client
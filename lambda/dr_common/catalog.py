@@ -0,0 +1,239 @@
+"""
+Persisted catalog of recovery points across regions.
+
+Answering "what is the latest restorable snapshot or AMI for resource X
+as of time T" by listing every snapshot or image and taking max() costs a
+full scan each time. The catalog keeps every available recovery point in
+one compact file per (kind, region) under catalog/<kind>/<region>.json.gz
+in a store (see dr_common.stores), with each resource's points held as
+parallel columns sorted by creation time, so a point-in-time lookup is a
+bisect.
+
+The monitors maintain it from the full listings they already make: sync()
+diffs a listing against the catalogued points, inserting new points in
+place and dropping the ones that are gone (deleted by retention), then
+stamps the resources it covered as fresh. Readers (the restore testers,
+the failover runbook) use latest(), which ignores resources older than
+they accept; with no answer they fall back to a live listing, and sync
+what it returns.
+
+Each partition is rewritten whole by the last monitor to sync it; since
+every sync is built from a complete listing, the last writer is also the
+most recent view.
+"""
+
+import bisect
+import gzip
+import json
+from datetime import datetime, timezone
+
+from dr_common.recovery_index import parse_image_date
+from dr_common.stores import open_store
+
+# Readers ignore a resource whose points have not been synced for this long
+DEFAULT_MAX_AGE_HOURS = 26
+
+COLUMNS = ('created', 'ids', 'types', 'names')
+
+
+def _key(kind, region):
+    return f"catalog/{kind}/{region}.json.gz"
+
+
+def _epoch(value):
+    """Epoch seconds for an epoch, an aware datetime or an EC2 date string"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = parse_image_date(value)
+    return value.timestamp()
+
+
+def from_snapshots(records):
+    """(resource_id, created, point_id, type, name) for available SnapshotRecords"""
+    for record in records:
+        if record.status == 'available' and record.created:
+            yield record.instance_id, record.created, record.snapshot_id, record.snapshot_type, None
+
+
+def from_images(records):
+    """(resource_id, created, point_id, type, name) for ImageRecords"""
+    for record in records:
+        yield record.resource_id, _epoch(record.created), record.image_id, None, record.name
+
+
+class Partition:
+    """The recovery points of one kind in one region"""
+
+    def __init__(self, kind, region, data=None):
+        data = data or {}
+        self.kind = kind
+        self.region = region
+        self.synced = data.get('synced', {})
+        self.resources = data.get('resources', {})
+        self.index = {
+            point_id: resource_id
+            for resource_id, columns in self.resources.items()
+            for point_id in columns['ids']
+        }
+
+    def __len__(self):
+        return len(self.index)
+
+    def add(self, resource_id, created, point_id, point_type=None, name=None):
+        """Insert one point in creation order; False if it is already catalogued"""
+        if point_id in self.index:
+            return False
+        columns = self.resources.setdefault(resource_id, {column: [] for column in COLUMNS})
+        position = bisect.bisect_right(columns['created'], created)
+        for column, value in zip(COLUMNS, (created, point_id, point_type, name)):
+            columns[column].insert(position, value)
+        self.index[point_id] = resource_id
+        return True
+
+    def remove(self, point_id):
+        resource_id = self.index.pop(point_id, None)
+        if resource_id is None:
+            return False
+        columns = self.resources[resource_id]
+        position = columns['ids'].index(point_id)
+        for column in COLUMNS:
+            del columns[column][position]
+        if not columns['ids']:
+            del self.resources[resource_id]
+            self.synced.pop(resource_id, None)
+        return True
+
+    def sync(self, points, resources=None, point_type=None):
+        """
+        Bring the partition in line with a complete listing of points.
+
+        resources and point_type give the listing's scope when it was
+        filtered (to one DB instance, to automated snapshots); catalogued
+        points outside that scope are left alone.
+        """
+        seen = set()
+        covered = set(resources or ())
+        added = 0
+        for resource_id, created, point_id, listed_type, name in points:
+            seen.add(point_id)
+            covered.add(resource_id)
+            added += self.add(resource_id, created, point_id, listed_type, name)
+
+        gone = [
+            point_id
+            for resource_id, columns in self.resources.items()
+            if resources is None or resource_id in resources
+            for point_id, catalogued_type in zip(columns['ids'], columns['types'])
+            if point_id not in seen and (point_type is None or catalogued_type == point_type)
+        ]
+        for point_id in gone:
+            self.remove(point_id)
+
+        synced = datetime.now(timezone.utc).isoformat()
+        for resource_id in covered:
+            if resource_id in self.resources:
+                self.synced[resource_id] = synced
+        return {'added': added, 'removed': len(gone), 'points': len(self)}
+
+    def fresh(self, resource_id, max_age_hours, now):
+        synced = self.synced.get(resource_id)
+        if synced is None:
+            return False
+        return (now - datetime.fromisoformat(synced)).total_seconds() / 3600 <= max_age_hours
+
+    def latest(self, resource_id=None, as_of=None, point_type=None, max_age_hours=None):
+        """
+        The newest point created at or before as_of (default: now), for one
+        resource or across all of them, optionally of one type only.
+        Resources not synced within max_age_hours are skipped.
+        """
+        as_of = _epoch(as_of)
+        now = datetime.now(timezone.utc)
+        resource_ids = [resource_id] if resource_id is not None else list(self.resources)
+
+        best = None
+        for rid in resource_ids:
+            columns = self.resources.get(rid)
+            if not columns:
+                continue
+            if max_age_hours is not None and not self.fresh(rid, max_age_hours, now):
+                continue
+            position = bisect.bisect_right(columns['created'], as_of) if as_of is not None \
+                else len(columns['created'])
+            # Walk back past points of other types (usually none)
+            while position and point_type is not None and columns['types'][position - 1] != point_type:
+                position -= 1
+            if position and (best is None or columns['created'][position - 1] > best['created']):
+                best = {
+                    'resource_id': rid,
+                    'point_id': columns['ids'][position - 1],
+                    'created': columns['created'][position - 1],
+                    'type': columns['types'][position - 1],
+                    'name': columns['names'][position - 1]
+                }
+        return best
+
+    def encode(self):
+        return gzip.compress(json.dumps({
+            'kind': self.kind,
+            'region': self.region,
+            'synced': self.synced,
+            'resources': self.resources
+        }).encode())
+
+
+class Catalog:
+    """Recovery point partitions read from and written back to a store"""
+
+    def __init__(self, store):
+        self.store = store
+        self.partitions = {}
+        self.changed = set()
+
+    def partition(self, kind, region):
+        if (kind, region) not in self.partitions:
+            data = self.store.get(_key(kind, region))
+            self.partitions[(kind, region)] = Partition(
+                kind, region, json.loads(gzip.decompress(data)) if data is not None else None
+            )
+        return self.partitions[(kind, region)]
+
+    def sync(self, kind, region, points, resources=None, point_type=None):
+        """Fold a complete listing into a partition (written by save())"""
+        result = self.partition(kind, region).sync(points, resources, point_type)
+        self.changed.add((kind, region))
+        return result
+
+    def save(self):
+        for kind, region in sorted(self.changed):
+            self.store.put(_key(kind, region), self.partition(kind, region).encode())
+        self.changed.clear()
+
+    def latest(self, kind, region, resource_id=None, as_of=None, point_type=None,
+               max_age_hours=DEFAULT_MAX_AGE_HOURS):
+        """The latest fresh point as Partition.latest() finds it, or None"""
+        return self.partition(kind, region).latest(resource_id, as_of, point_type, max_age_hours)
+
+
+def open_catalog(location):
+    """A Catalog over the store at location (see dr_common.stores.open_store)"""
+    return Catalog(open_store(location))
+
+
+def lookup(catalog, kind, region, **query):
+    """catalog.latest(), treating an unreadable catalog as a miss"""
+    try:
+        return catalog.latest(kind, region, **query)
+    except Exception as e:
+        print(f"Error reading recovery point catalog: {str(e)}")
+        return None
+
+
+def refresh(catalog, kind, region, points, resources=None, point_type=None):
+    """Sync a live listing into the catalog and save it; errors are only logged"""
+    try:
+        catalog.sync(kind, region, points, resources, point_type)
+        catalog.save()
+    except Exception as e:
+        print(f"Error updating recovery point catalog: {str(e)}")
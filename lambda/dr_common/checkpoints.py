@@ -0,0 +1,295 @@
+"""
+Resumable scans that continue across invocations.
+
+A Sweep is one logical monitor run that may span several invocations.
+Each check reads its long listings through sweep.scan(check, name), which
+pages from the scan's saved continuation token and folds every page into
+the scan's partial aggregates (tally() for counts, records() for the
+compact records a check needs in full). When the check's deadline budget
+is nearly spent, the scan stops at a page boundary and raises Suspended;
+the handler then saves the sweep and re-invokes itself asynchronously
+with the marker save() returns, and the next invocation carries on where
+this one stopped. The final report is only produced once no scan is
+left suspended.
+
+A scan whose check crossed its memory budget (see dr_common.memory)
+stops keeping records: stream() folds its rows into a
+RecoveryPointAggregate, and from then on its checkpoint carries that
+aggregate instead of them. Each page's records are staged and folded in
+when the page is committed, like its tallies and rows.
+
+A page's token and the aggregates it contributed are committed together,
+so a saved checkpoint never counts a page twice. Checkpoints are written
+create-only under sweeps/<id>/<sequence>.json: a retried or duplicated
+invocation finds its successor already written and does nothing, and only
+one invocation can write final.json and publish the report.
+"""
+
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from dr_common import deadline, memory
+from dr_common.pagination import page_token, paginate
+
+# A scan suspends when less than this many seconds of its check's budget
+# are left, or less than twice its slowest page so far
+SUSPEND_MARGIN_SECONDS = 5.0
+
+# The last invocation of a sweep runs its checks to the deadline instead
+MAX_INVOCATIONS = 20
+
+
+class Suspended(Exception):
+    """Raised inside a check whose scan stopped to continue in the next invocation"""
+
+
+def _key(sweep_id, name):
+    return f"sweeps/{sweep_id}/{name}"
+
+
+class Scan:
+    """One paginated listing and the partial aggregates built from it"""
+
+    def __init__(self, sweep, check, name, state=None):
+        state = state or {}
+        self.sweep = sweep
+        self.check = check
+        self.name = name
+        self.token = state.get('token')
+        self.done = state.get('done', False)
+        self.pages = state.get('pages', 0)
+        self.values = state.get('values', {})
+        self.rows = state.get('rows', [])
+        self.streaming = state.get('streaming', False)
+        self.aggregate = memory.RecoveryPointAggregate(state.get('aggregate'))
+        self.key = None
+        self.pending = {}
+        self.batch = []
+        self.staged = memory.RecoveryPointAggregate()
+        self.slowest = 0.0
+
+    def tally(self, key, amount):
+        """Add amount to values[key] once the current page is committed"""
+        self.pending[key] = self.pending.get(key, 0) + amount
+
+    def _commit(self, token):
+        with self.sweep.lock:
+            for key, amount in self.pending.items():
+                self.values[key] = self.values.get(key, 0) + amount
+            self.rows.extend(self.batch)
+            self.aggregate.merge(self.staged)
+            self.pending = {}
+            self.batch = []
+            self.staged = memory.RecoveryPointAggregate()
+            self.token = token
+            self.pages += 1
+
+    def iter_pages(self, client, operation, **kwargs):
+        """Yield the pages not yet committed, from the saved token onwards"""
+        if self.done:
+            return
+
+        started = time.monotonic()
+        for page in paginate(client, operation, starting_token=self.token, **kwargs):
+            yield page
+
+            # The caller has folded the page in; commit it with its token
+            token = page_token(operation, page)
+            self._commit(token)
+            now = time.monotonic()
+            self.slowest = max(self.slowest, now - started)
+            started = now
+            if token and self.sweep.time_short(self.slowest):
+                self.sweep.suspend(self)
+        self.done = True
+
+    def records(self, client, operation, result_key, record_cls, **kwargs):
+        """
+        Yield every record of the listing: those checkpointed by earlier
+        invocations, then the rest as they are fetched.
+
+        Rows are the record's __slots__ values in order, which is also the
+        order of its constructor's arguments.
+        """
+        restored = [row if isinstance(row, record_cls) else record_cls(*row) for row in self.rows]
+        self.rows = restored
+        yield from restored
+
+        for page in self.iter_pages(client, operation, **kwargs):
+            batch = [record_cls.from_item(item) for item in page.get(result_key, [])]
+            if self.streaming:
+                self._stage(batch)
+            elif self.sweep.enabled:
+                self.batch = batch
+            yield from batch
+
+    def _stage(self, records):
+        staged = memory.RecoveryPointAggregate()
+        for record in records:
+            staged.add(*self.key(record))
+        self.staged = staged
+
+    def stream(self, key):
+        """
+        Stop keeping records: the committed rows are folded into
+        self.aggregate by key(record) -> (resource_id, created), which
+        replaces them in the checkpoint, and every later page is staged
+        into it until committed. A resumed streaming scan is given key
+        again the same way.
+
+        Returns a copy of the committed aggregate, for a resumed scan's
+        caller to carry on from.
+        """
+        with self.sweep.lock:
+            self.key = key
+            for row in self.rows:
+                self.aggregate.add(*key(row))
+            self._stage(self.batch)
+            self.streaming = True
+            self.rows = []
+            self.batch = []
+            return memory.RecoveryPointAggregate(self.aggregate.state())
+
+    def state(self):
+        state = {
+            'token': self.token,
+            'done': self.done,
+            'pages': self.pages,
+            'values': dict(self.values),
+            'streaming': self.streaming,
+            'rows': [
+                row if isinstance(row, list) else [getattr(row, field) for field in row.__slots__]
+                for row in self.rows
+            ]
+        }
+        if self.streaming:
+            state['aggregate'] = self.aggregate.state()
+        return state
+
+
+class Sweep:
+    """A monitor run whose scans can be checkpointed to store"""
+
+    def __init__(self, store=None, sweep_id=None, sequence=0, state=None,
+                 max_invocations=MAX_INVOCATIONS):
+        state = state or {}
+        self.store = store
+        self.id = sweep_id or f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        self.sequence = sequence
+        self.max_invocations = max_invocations
+        self.started = state.get('started', datetime.now(timezone.utc).isoformat())
+        self.results = state.get('results', {})
+        self.saved_scans = state.get('scans', {})
+        self.saved_pages = state.get('pages', {})
+        self.scans = {}
+        self.suspended = set()
+        self.lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.store is not None
+
+    @classmethod
+    def open(cls, store, marker=None, max_invocations=MAX_INVOCATIONS):
+        """
+        Start a sweep, or resume the one a marker points at.
+
+        Returns None when the marker is stale: another invocation already
+        continued or finished the sweep, so this one must do nothing.
+        """
+        if store is None or not marker:
+            return cls(store, max_invocations=max_invocations)
+
+        sweep_id, sequence = marker['id'], marker['sequence']
+        data = store.get(_key(sweep_id, f"{sequence:04d}.json"))
+        if data is None or store.get(_key(sweep_id, f"{sequence + 1:04d}.json")) is not None:
+            return None
+        if store.get(_key(sweep_id, 'final.json')) is not None:
+            return None
+        return cls(store, sweep_id, sequence, json.loads(data), max_invocations)
+
+    def scan(self, check, name):
+        key = f"{check}/{name}"
+        if key not in self.scans:
+            self.scans[key] = Scan(self, check, name, self.saved_scans.get(key))
+        return self.scans[key]
+
+    def time_short(self, slowest_page):
+        if not self.enabled or self.sequence + 1 >= self.max_invocations:
+            return False
+        return deadline.remaining() < max(SUSPEND_MARGIN_SECONDS, 2 * slowest_page)
+
+    def suspend(self, scan):
+        with self.lock:
+            self.suspended.add(scan.check)
+        raise Suspended(f"{scan.check} {scan.name} scan suspended after {scan.pages} pages; "
+                        f"continuing in the next invocation")
+
+    def complete(self, check, status):
+        """Keep a finished check's results for the invocation that reports"""
+        with self.lock:
+            if check not in self.suspended:
+                self.results[check] = status
+
+    def save(self):
+        """
+        Checkpoint every scan for the next invocation.
+
+        Returns the marker to invoke it with, or None if another
+        invocation of this step already saved (this one is a duplicate).
+        """
+        # A scan's committed state only changes under the lock, so a check
+        # abandoned on its deadline is saved as of its last committed page
+        with self.lock:
+            scans = dict(self.saved_scans)
+            scans.update({key: scan.state() for key, scan in self.scans.items()})
+            # A finished check's results are kept; its listings are not needed again
+            scans = {key: scan for key, scan in scans.items() if key.split('/')[0] not in self.results}
+            state = {
+                'started': self.started,
+                'results': self.results,
+                'scans': scans,
+                'pages': self.pages()
+            }
+            data = json.dumps(state, default=str).encode()
+
+        if not self.store.put(_key(self.id, f"{self.sequence + 1:04d}.json"), data, if_absent=True):
+            return None
+        return {'id': self.id, 'sequence': self.sequence + 1}
+
+    def finish(self):
+        """
+        Mark the sweep finished and drop its checkpoints.
+
+        Returns False if another invocation finished it first.
+        """
+        if not self.enabled:
+            return True
+        finished = json.dumps({
+            'started': self.started,
+            'finished': datetime.now(timezone.utc).isoformat(),
+            'invocations': self.sequence + 1
+        }).encode()
+        if not self.store.put(_key(self.id, 'final.json'), finished, if_absent=True):
+            return False
+        for key in self.store.list(_key(self.id, '')):
+            if key != _key(self.id, 'final.json'):
+                self.store.delete(key)
+        return True
+
+    def pages(self):
+        """Pages committed per scan over the whole sweep"""
+        pages = dict(self.saved_pages)
+        pages.update({key: scan.pages for key, scan in self.scans.items()})
+        return dict(sorted(pages.items()))
+
+    def summary(self):
+        return {
+            'id': self.id,
+            'invocations': self.sequence + 1,
+            'started': self.started,
+            'pages': self.pages()
+        }
@@ -0,0 +1,27 @@
+"""
+boto3 client factory.
+
+Every client the lambdas use is created through get_client() so the shared
+botocore hooks (deadlines, circuit breakers, rate limiting, call instrumentation, ...) are attached
+exactly once per client.
+"""
+
+import boto3
+
+from dr_common import breaker, deadline, instrumentation, throttling
+
+_CLIENT_HOOKS = [deadline.install, breaker.install, throttling.install, instrumentation.install]
+
+
+def register_client_hook(hook):
+    """Run hook(client) on every client created after this call"""
+    if hook not in _CLIENT_HOOKS:
+        _CLIENT_HOOKS.append(hook)
+
+
+def get_client(service_name, region_name=None, **kwargs):
+    """Create a boto3 client with the shared hooks installed"""
+    client = boto3.client(service_name, region_name=region_name, **kwargs)
+    for hook in _CLIENT_HOOKS:
+        hook(client)
+    return client
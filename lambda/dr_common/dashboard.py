@@ -0,0 +1,296 @@
+"""
+Precomputed views for the CloudWatch dashboard's custom widgets.
+
+Per-resource views on the dashboard would otherwise need a custom metric
+per resource (high cardinality, billed per metric) or live describe_*
+listings on every refresh. Instead the master monitor, once it has synced
+the recovery point catalog (see dr_common.catalog) and recorded its report
+history (see dr_common.history), renders each view as an HTML fragment
+and writes it to a store (see dr_common.stores) under
+
+    dashboard/<view>.html
+
+DR copies do not always carry their source's resource id, so the DR
+columns come from the checks' own join of primary points to their copies
+(dr_rows() keeps a compact copy of it) rather than from the catalog.
+
+The dashboard-widget lambda only reads those fragments, so a refresh is
+one small get, or none while a warm container's copy is recent.
+
+Views:
+
+- freshness: each resource's newest recovery point in the primary and DR
+  regions, worst first
+- dr-lag: each resource's DR RPO (the age of its newest DR copy) and how
+  long that copy took to arrive, worst first, with the fleet figures per day
+- replication: the replicated bucket pair's object counts, difference and
+  settings over the last day and week
+"""
+
+import html
+from datetime import datetime, timedelta, timezone
+
+from dr_common.discovery import PRIMARY_REGION
+from dr_common.history import TIME_COLUMN
+
+VIEWS = ('freshness', 'dr-lag', 'replication')
+
+# Recovery points older than this are stale, as the monitors alert on
+STALE_HOURS = 48
+
+# Rows rendered per table; views are sorted worst first
+MAX_ROWS = 100
+
+# Days of report history the trend tables cover
+TREND_DAYS = 7
+
+KIND_TITLES = {
+    'snapshots': 'RDS',
+    'images': 'AMI'
+}
+
+STATUS_ORDER = ('❌ no DR copy', '⚠️ stale', '⚠️ DR stale', '✅ ok')
+
+
+def _key(view):
+    return f"dashboard/{view}.html"
+
+
+def _age(now, epoch):
+    return round((now.timestamp() - epoch) / 3600, 1) if epoch is not None else None
+
+
+# ============================================
+# View data
+# ============================================
+
+def dr_rows(status):
+    """
+    The compact per-resource DR figures the dashboard keeps from a check's
+    recovery point index (its dr_resources), by resource id
+    """
+    return {
+        resource['resource_id']: (
+            resource['latest_point_age_hours'], resource['primary_points'],
+            resource['dr_rpo_hours'], resource['latest_copy_lag_hours'], resource['copied_points']
+        )
+        for resource in status.get('dr_resources') or []
+    }
+
+
+def resource_rows(catalog, dr_index, now):
+    """
+    One row per resource: its newest point and count from the catalog's
+    primary partition (or the check's index without a catalog), and the
+    age and copy lag of its newest DR copy from the check's index
+    """
+    rows = []
+    for kind, title in KIND_TITLES.items():
+        index = dr_index.get(kind)
+        if catalog is not None:
+            primary = {
+                resource_id: (_age(now, columns['created'][-1]), len(columns['ids']))
+                for resource_id, columns in catalog.partition(kind, PRIMARY_REGION).resources.items()
+            }
+        else:
+            primary = {resource_id: figures[:2] for resource_id, figures in (index or {}).items()}
+
+        for resource_id, (age, points) in primary.items():
+            _, _, dr_age, lag, copies = (index or {}).get(resource_id, (None, None, None, None, 0))
+            if index is not None and dr_age is None:
+                status = STATUS_ORDER[0]
+            elif age is not None and age > STALE_HOURS:
+                status = STATUS_ORDER[1]
+            elif dr_age is not None and dr_age > STALE_HOURS:
+                status = STATUS_ORDER[2]
+            else:
+                status = STATUS_ORDER[3]
+            rows.append({
+                'kind': title,
+                'resource': resource_id,
+                'points': points,
+                'dr_points': copies,
+                'age_hours': age,
+                'dr_age_hours': dr_age,
+                'dr_lag_hours': lag,
+                'status': status
+            })
+    return rows
+
+
+def daily(history, columns, now, days=TREND_DAYS):
+    """Per-day maximum of each column over the last days, newest first"""
+    data = history.query(columns, now - timedelta(days=days), now)
+    by_day = {}
+    for index, recorded in enumerate(data[TIME_COLUMN]):
+        day = by_day.setdefault(datetime.fromtimestamp(recorded, timezone.utc).date().isoformat(), {})
+        for column in columns:
+            value = data[column][index]
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                day[column] = max(value, day.get(column, value))
+    return [dict(values, date=day) for day, values in sorted(by_day.items(), reverse=True)]
+
+
+def replication(history, now):
+    """The bucket pair's latest state and each bucket's object counts over the last day and week"""
+    data = history.query(
+        ['s3.replication_difference', 's3.replication_enabled', 's3.versioning_enabled'],
+        now - timedelta(days=TREND_DAYS), now, prefix='series.s3.objects/'
+    )
+    times = data[TIME_COLUMN]
+    if not times:
+        return None
+
+    day_ago = now.timestamp() - 86400
+    buckets = []
+    for column in sorted(name for name in data if name.startswith('series.s3.objects/')):
+        values = [(recorded, value) for recorded, value in zip(times, data[column]) if value is not None]
+        if not values:
+            continue
+        earlier = [value for recorded, value in values if recorded <= day_ago]
+        counts = [value for _, value in values]
+        buckets.append({
+            'bucket': column.split('/', 1)[1],
+            'objects': counts[-1],
+            'change_24h': counts[-1] - earlier[-1] if earlier else None,
+            'min_7d': min(counts),
+            'max_7d': max(counts)
+        })
+
+    return {
+        'reported_hours_ago': _age(now, times[-1]),
+        'difference': data['s3.replication_difference'][-1],
+        'replication_enabled': data['s3.replication_enabled'][-1],
+        'versioning_enabled': data['s3.versioning_enabled'][-1],
+        'buckets': buckets
+    }
+
+
+# ============================================
+# Rendering
+# ============================================
+
+def _cell(value):
+    if value is None:
+        return '—'
+    if isinstance(value, bool):
+        return '✅' if value else '❌'
+    return html.escape(str(value))
+
+
+def table(rows, columns):
+    """rows as an HTML table of columns ((key, title) pairs), cut to MAX_ROWS"""
+    head = ''.join(f"<th>{html.escape(title)}</th>" for _, title in columns)
+    body = ''.join(
+        '<tr>' + ''.join(f"<td>{_cell(row.get(key))}</td>" for key, _ in columns) + '</tr>'
+        for row in rows[:MAX_ROWS]
+    )
+    more = f"<p>... {len(rows) - MAX_ROWS} more</p>" if len(rows) > MAX_ROWS else ''
+    return f"<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>{more}"
+
+
+def render_freshness(rows):
+    rows = sorted(rows, key=lambda row: (STATUS_ORDER.index(row['status']), -(row['age_hours'] or 0)))
+    counts = {status: sum(1 for row in rows if row['status'] == status) for status in STATUS_ORDER}
+    return (
+        f"<p>{len(rows)} resources: "
+        + ', '.join(f"{status} {count}" for status, count in counts.items() if count)
+        + "</p>" + table(rows, [
+            ('status', 'Status'), ('kind', 'Kind'), ('resource', 'Resource'),
+            ('age_hours', 'Newest point (h)'), ('points', 'Points'),
+            ('dr_age_hours', 'Newest DR copy (h)'), ('dr_points', 'DR copies')
+        ])
+    )
+
+
+def render_dr_lag(rows, trend):
+    # Resources without any DR copy are listed first, then the oldest copies
+    rows = sorted(rows, key=lambda row: (row['dr_age_hours'] is not None, -(row['dr_age_hours'] or 0)))
+    return table(rows, [
+        ('kind', 'Kind'), ('resource', 'Resource'), ('dr_age_hours', 'Newest DR copy (h)'),
+        ('dr_lag_hours', 'Copy lag (h)'), ('age_hours', 'Newest point (h)'), ('status', 'Status')
+    ]) + "<h4>Fleet DR RPO, daily maximum</h4>" + table(trend, [
+        ('date', 'Date'), ('rds.dr_rpo_hours', 'RDS (h)'), ('ami.dr_rpo_hours', 'AMI (h)'),
+        ('rds.dr_copy_lag_hours', 'RDS copy lag (h)'), ('ami.dr_copy_lag_hours', 'AMI copy lag (h)')
+    ])
+
+
+def render_replication(state, trend):
+    if state is None:
+        return "<p>No S3 replication reports in the last week.</p>"
+    return (
+        f"<p>Replication {_cell(state['replication_enabled'])}  "
+        f"Versioning {_cell(state['versioning_enabled'])}  "
+        f"Difference {_cell(state['difference'])} objects  (reported {state['reported_hours_ago']}h ago)</p>"
+        + table(state['buckets'], [
+            ('bucket', 'Bucket'), ('objects', 'Objects'), ('change_24h', 'Change 24h'),
+            ('min_7d', 'Min 7d'), ('max_7d', 'Max 7d')
+        ])
+        + "<h4>Object count difference, daily maximum</h4>"
+        + table(trend, [('date', 'Date'), ('s3.replication_difference', 'Difference')])
+    )
+
+
+# ============================================
+# Publishing
+# ============================================
+
+def build(catalog, history, dr_index=None, now=None):
+    """
+    Every view rendered as HTML from the catalog, report history and the
+    checks' DR figures ({kind: dr_rows()}); a view whose sources are
+    missing gets a note instead. Returns {view: html}.
+    """
+    now = now or datetime.now(timezone.utc)
+    dr_index = dr_index or {}
+    views = {}
+
+    if catalog is not None or dr_index:
+        rows = resource_rows(catalog, dr_index, now)
+        trend = daily(history, ['rds.dr_rpo_hours', 'ami.dr_rpo_hours', 'rds.dr_copy_lag_hours',
+                                'ami.dr_copy_lag_hours'], now) if history is not None else []
+        views['freshness'] = render_freshness(rows)
+        views['dr-lag'] = render_dr_lag(rows, trend)
+    else:
+        views['freshness'] = views['dr-lag'] = "<p>No recovery point catalog or DR index to show.</p>"
+
+    if history is not None:
+        views['replication'] = render_replication(
+            replication(history, now), daily(history, ['s3.replication_difference'], now)
+        )
+    else:
+        views['replication'] = "<p>No report history is configured.</p>"
+
+    stamp = f"<p><small>Updated {now:%Y-%m-%d %H:%M} UTC</small></p>"
+    return {view: body + stamp for view, body in views.items()}
+
+
+def publish(store, catalog, history, dr_index=None, now=None):
+    """Render and write every view; returns each view's size in bytes"""
+    sizes = {}
+    for view, body in build(catalog, history, dr_index, now).items():
+        data = body.encode()
+        store.put(_key(view), data)
+        sizes[view] = len(data)
+    return sizes
+
+
+def read(store, view):
+    """A published view's HTML, or None if it has not been published"""
+    if view not in VIEWS:
+        raise ValueError(f"Unknown dashboard view {view}; expected one of {', '.join(VIEWS)}")
+    data = store.get(_key(view))
+    return data.decode() if data is not None else None
+
+
+# Markdown CloudWatch shows when the widget is asked to describe itself
+DOCS = """
+## DR dashboard views
+Per-resource tables precomputed by the master backup monitor.
+
+Params:
+```
+view: freshness | dr-lag | replication
+dashboard_store: s3://<bucket>/<prefix>
+```
+"""
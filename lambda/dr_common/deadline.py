@@ -0,0 +1,143 @@
+"""
+Deadline-aware check scheduling.
+
+A Deadline carves per-check budgets out of the Lambda's remaining time
+(context.get_remaining_time_in_millis()), keeping a reserve for
+publishing metrics and alerts. Each check runs on its own thread inside a
+Scope; if it overruns, the handler stops waiting and reports from the
+checks that finished. The abandoned check is cancelled cooperatively:
+every client gets a before-call hook that raises CheckTimedOut once the
+scope the call runs in has expired, so it stops at its next AWS call
+(including calls made by pagination prefetch threads).
+"""
+
+import contextvars
+import threading
+import time
+
+# Seconds kept back for metrics, alerts and the summary
+DEFAULT_RESERVE_SECONDS = 15.0
+
+# A check is not started with less time than this
+MIN_CHECK_SECONDS = 1.0
+
+_scope = contextvars.ContextVar('dr_deadline_scope', default=None)
+
+
+class CheckTimedOut(Exception):
+    """Raised inside a check whose budget has run out"""
+
+
+class Scope:
+    """The budget of one running check"""
+
+    def __init__(self, name, seconds):
+        self.name = name
+        self.seconds = seconds
+        self.expires = time.monotonic() + seconds
+        self.cancelled = threading.Event()
+        self.tripped = False
+
+    def expired(self):
+        return self.cancelled.is_set() or time.monotonic() >= self.expires
+
+    def remaining(self):
+        return 0.0 if self.cancelled.is_set() else max(0.0, self.expires - time.monotonic())
+
+    def check(self):
+        if self.expired():
+            self.tripped = True
+            raise CheckTimedOut(f"{self.name} check exceeded its {self.seconds:.1f}s budget")
+
+
+def checkpoint():
+    """Raise CheckTimedOut if the calling check's budget has run out"""
+    scope = _scope.get()
+    if scope is not None:
+        scope.check()
+
+
+def remaining():
+    """Seconds left in the calling check's budget (inf outside a check)"""
+    scope = _scope.get()
+    return float('inf') if scope is None else scope.remaining()
+
+
+class Deadline:
+    """
+    Schedules a known list of checks against the invocation's remaining time.
+
+    Unless budgets names a limit for a check, it gets an equal share of the
+    time left for the checks still to run, so a fast check leaves more for
+    the ones after it.
+    """
+
+    def __init__(self, context=None, reserve_seconds=DEFAULT_RESERVE_SECONDS, budgets=None):
+        self.context = context
+        self.reserve_seconds = reserve_seconds
+        self.budgets = budgets or {}
+        self.pending = []
+
+    def remaining(self):
+        """Seconds left for checks, after the reserve"""
+        if self.context is None or not hasattr(self.context, 'get_remaining_time_in_millis'):
+            return float('inf')
+        return self.context.get_remaining_time_in_millis() / 1000 - self.reserve_seconds
+
+    def plan(self, names):
+        self.pending = list(names)
+
+    def budget(self, name):
+        remaining = self.remaining()
+        if name in self.budgets:
+            return min(float(self.budgets[name]), remaining)
+        return remaining / max(1, len(self.pending))
+
+    def run(self, name, check, *args, **kwargs):
+        """
+        Run check(*args, **kwargs) within its budget.
+
+        Returns (result, None) when it finished, or (None, reason) with
+        reason 'skipped' (no time left to start it) or 'timed_out'.
+        """
+        seconds = self.budget(name)
+        if name in self.pending:
+            self.pending.remove(name)
+        if seconds < MIN_CHECK_SECONDS:
+            return None, 'skipped'
+
+        scope = Scope(name, seconds)
+        outcome = {}
+
+        def target():
+            _scope.set(scope)
+            try:
+                outcome['result'] = check(*args, **kwargs)
+            except CheckTimedOut:
+                scope.tripped = True
+            except Exception as e:
+                outcome['error'] = e
+
+        thread = threading.Thread(target=target, name=f'check-{name}', daemon=True)
+        thread.start()
+        thread.join(None if seconds == float('inf') else seconds)
+
+        # Checks catch their own errors, so a cancelled call may surface as a
+        # normal return with an issue; the partial result is discarded either way
+        if thread.is_alive() or scope.tripped:
+            scope.cancelled.set()
+            return None, 'timed_out'
+        if 'error' in outcome:
+            raise outcome['error']
+        return outcome['result'], None
+
+
+def install(client):
+    """Cancel calls made from a check whose budget has run out"""
+
+    def before_call(**kwargs):
+        checkpoint()
+
+    # First, so a cancelled call does not wait for a rate-limit token
+    client.meta.events.register_first('before-call.*.*', before_call, unique_id='dr-deadline-before-call')
+    return client
@@ -0,0 +1,175 @@
+"""
+Alert digests: one message per run rather than one per issue.
+
+A Digest groups a run's issues, or its alert notifications (see
+dr_common.alerts), by subsystem (the check an issue belongs to) and by
+severity, and renders them as one block of text. publish() sends a whole
+digest as a single SNS message. publish_teams() sends each subsystem's
+part to the topic of the team that owns it, packing the messages for a
+topic into publish_batch calls of at most BATCH_ENTRIES entries and
+SNS_MAX_BYTES per request, so a fleet-wide digest is a handful of calls
+however many resources it covers.
+
+A message over the SNS size limit is written whole to a store (see
+dr_common.stores) under digests/<date>/ and sent as its first lines and
+a pointer to the full text.
+"""
+
+import uuid
+from datetime import datetime, timezone
+
+from dr_common import alerts
+
+# SNS limit for one message, and for all the messages of one batch request
+SNS_MAX_BYTES = 256 * 1024
+
+# Most entries publish_batch accepts
+BATCH_ENTRIES = 10
+
+# How much of an offloaded message is still sent inline
+INLINE_BYTES = 16 * 1024
+
+SUBSYSTEM_TITLES = {
+    'rds': 'RDS DATABASE BACKUPS',
+    's3': 'S3 BUCKET REPLICATION',
+    'ami': 'EC2 AMI BACKUPS',
+    None: 'GENERAL'
+}
+
+SEVERITY_TITLES = {
+    'critical': '🚨 CRITICAL',
+    'warning': '⚠️ WARNING',
+    'resolved': '🟢 RESOLVED'
+}
+
+
+def _size(text):
+    return len(text.encode())
+
+
+class Digest:
+    """Issue lines grouped by subsystem, then severity"""
+
+    def __init__(self):
+        self.groups = {}
+
+    def __len__(self):
+        return sum(len(lines) for severities in self.groups.values() for lines in severities.values())
+
+    def add(self, text, subsystem=None, severity=None):
+        self.groups.setdefault(subsystem, {}).setdefault(severity or alerts.severity(text), []).append(text)
+
+    def add_issues(self, issues):
+        """Issue texts, filed under the check their condition belongs to"""
+        for text in issues:
+            self.add(text, alerts.condition(text)[0])
+
+    def add_notifications(self, notifications):
+        """Alert notifications; resolved ones are filed apart from open ones"""
+        for notification, line in zip(notifications, alerts.describe(notifications)):
+            severity = 'resolved' if notification['event'] == 'resolved' else notification['severity']
+            self.add(line, notification['check'], severity)
+
+    def subsystems(self):
+        return sorted(self.groups, key=lambda name: list(SUBSYSTEM_TITLES).index(name)
+                      if name in SUBSYSTEM_TITLES else len(SUBSYSTEM_TITLES))
+
+    def counts(self):
+        """Lines per severity"""
+        counts = {}
+        for severities in self.groups.values():
+            for severity, lines in severities.items():
+                counts[severity] = counts.get(severity, 0) + len(lines)
+        return counts
+
+    def render(self, subsystems=None):
+        """The digest (or the sections of some subsystems) as text"""
+        sections = []
+        for name in subsystems or self.subsystems():
+            severities = self.groups.get(name)
+            if not severities:
+                continue
+            lines = [SUBSYSTEM_TITLES.get(name, str(name).upper())]
+            for severity in sorted(severities, key=lambda s: list(SEVERITY_TITLES).index(s)
+                                   if s in SEVERITY_TITLES else len(SEVERITY_TITLES)):
+                lines.append(f"  {SEVERITY_TITLES.get(severity, severity.upper())} ({len(severities[severity])}):")
+                lines.extend(f"    {text}" for text in severities[severity])
+            sections.append('\n'.join(lines))
+        return '\n\n'.join(sections) or 'None'
+
+
+def fit(message, store=None):
+    """
+    The message as it can be sent: unchanged if within the SNS limit,
+    otherwise its first lines and a pointer to the full text saved in
+    store (or a note that it was cut, without one). Returns
+    (message, pointer).
+    """
+    if _size(message) <= SNS_MAX_BYTES:
+        return message, None
+
+    head = message.encode()[:INLINE_BYTES].decode(errors='ignore').rpartition('\n')[0]
+    omitted = message.count('\n') - head.count('\n')
+    pointer = None
+    if store is not None:
+        key = f"digests/{datetime.now(timezone.utc):%Y/%m/%d}/{uuid.uuid4().hex}.txt"
+        store.put(key, message.encode())
+        pointer = store.url(key)
+    note = f"Full digest: {pointer}" if pointer else "The rest of the digest was cut to fit SNS."
+    return f"{head}\n\n... {omitted} more lines ({_size(message) // 1024} KB). {note}\n", pointer
+
+
+def publish(sns_client, topic_arn, subject, message, store=None):
+    """Publish one message, offloading it if too large; returns the pointer, if any"""
+    message, pointer = fit(message, store)
+    sns_client.publish(TopicArn=topic_arn, Subject=subject, Message=message)
+    return pointer
+
+
+def _batches(entries):
+    """Entries split into publish_batch requests by count and total size"""
+    batch, size = [], 0
+    for entry in entries:
+        entry_size = _size(entry['Message']) + _size(entry.get('Subject', ''))
+        if batch and (len(batch) == BATCH_ENTRIES or size + entry_size > SNS_MAX_BYTES):
+            yield batch
+            batch, size = [], 0
+        batch.append(entry)
+        size += entry_size
+    if batch:
+        yield batch
+
+
+def publish_teams(sns_client, topics, digest, subject, header='', store=None):
+    """
+    Send each subsystem's part of a digest to its team's topic (topics maps
+    a subsystem, or "default" for the rest, to a topic ARN), batching the
+    messages for each topic. Returns counts of messages, batch requests,
+    offloaded messages and the entries SNS failed.
+    """
+    by_topic = {}
+    for name in digest.subsystems():
+        topic_arn = topics.get(name or 'default', topics.get('default'))
+        if topic_arn:
+            by_topic.setdefault(topic_arn, []).append(name)
+
+    result = {'messages': 0, 'batches': 0, 'offloaded': 0, 'failed': []}
+    for topic_arn, names in by_topic.items():
+        entries = []
+        for index, name in enumerate(names):
+            message, pointer = fit(f"{header}{digest.render([name])}\n", store)
+            result['offloaded'] += pointer is not None
+            entries.append({
+                'Id': str(index),
+                'Subject': f"{subject} - {(name or 'general').upper()}"[:100],
+                'Message': message
+            })
+        for batch in _batches(entries):
+            response = sns_client.publish_batch(TopicArn=topic_arn, PublishBatchRequestEntries=batch)
+            result['batches'] += 1
+            result['messages'] += len(response.get('Successful', []))
+            result['failed'].extend(
+                f"{topic_arn} #{failed['Id']}: {failed.get('Message', failed.get('Code'))}"
+                for failed in response.get('Failed', [])
+            )
+    return result
@@ -0,0 +1,263 @@
+"""
+Shared discovery for the scheduled lambdas.
+
+The monitors and restore testers list the same AMIs, snapshots and
+buckets on overlapping schedules. A discovery Node is one such listing,
+identified by its kind, region and request parameters, so two consumers
+asking for the same thing build equal nodes. plan() declares the nodes
+each consumer reads for its event.
+
+The discovery-orchestrator lambda runs every node its due consumers need
+once per cycle, concurrently where the graph allows (run_graph), stores
+the compact results under discovery/<cycle>/ and then invokes each
+consumer with a "discovery" pointer. A consumer reads through a Cycle:
+cached results when the orchestrator provided them, otherwise the same
+listing made live, so every lambda still works when invoked on its own.
+"""
+
+import gzip
+import hashlib
+import json
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+
+from dr_common.clients import get_client
+from dr_common.pagination import items, paginate
+from dr_common.records import ImageRecord, SnapshotRecord, project
+from dr_common.stores import open_store
+
+PRIMARY_REGION = 'us-east-1'
+DR_REGION = 'us-west-2'
+
+DEFAULT_WORKERS = 8
+
+# Request parameters shared by every consumer of the same listing
+AVAILABLE_IMAGES = {
+    'Owners': ['self'],
+    'Filters': [{'Name': 'state', 'Values': ['available']}]
+}
+DAILY_BACKUP_IMAGES = {
+    'Owners': ['self'],
+    'Filters': [
+        {'Name': 'tag:Backup', 'Values': ['daily']},
+        {'Name': 'state', 'Values': ['available']}
+    ]
+}
+
+
+# ============================================
+# Nodes
+# ============================================
+
+def _rows(records):
+    # Rows are a record's __slots__ values in order, as its constructor takes them
+    return [[getattr(record, field) for field in record.__slots__] for record in records]
+
+
+def _fetch_images(client, params):
+    return list(project(items(client, 'describe_images', 'Images', **params), ImageRecord))
+
+
+def _fetch_snapshots(client, params):
+    return list(project(items(client, 'describe_db_snapshots', 'DBSnapshots', **params), SnapshotRecord))
+
+
+def _fetch_object_count(client, params):
+    return sum(page.get('KeyCount', 0) for page in paginate(client, 'list_objects_v2', **params))
+
+
+# kind -> (service, fetch, encode, decode)
+KINDS = {
+    'images': ('ec2', _fetch_images, _rows, lambda rows: [ImageRecord(*row) for row in rows]),
+    'snapshots': ('rds', _fetch_snapshots, _rows, lambda rows: [SnapshotRecord(*row) for row in rows]),
+    'object_count': ('s3', _fetch_object_count, int, int)
+}
+
+
+class Node:
+    """One discovery listing: a kind, a region and its request parameters"""
+
+    def __init__(self, kind, region, params):
+        self.kind = kind
+        self.region = region
+        self.params = params
+
+    @property
+    def key(self):
+        digest = hashlib.sha1(json.dumps(self.params, sort_keys=True).encode()).hexdigest()[:12]
+        return f"{self.kind}-{self.region or 'global'}-{digest}"
+
+    def fetch(self, client=None):
+        service, fetch, _, _ = KINDS[self.kind]
+        return fetch(client or get_client(service, region_name=self.region), self.params)
+
+    def encode(self, value):
+        return KINDS[self.kind][2](value)
+
+    def decode(self, data):
+        return KINDS[self.kind][3](data)
+
+    def describe(self):
+        return {'kind': self.kind, 'region': self.region, 'params': self.params}
+
+
+def images(region, **params):
+    return Node('images', region, params)
+
+
+def snapshots(region, **params):
+    return Node('snapshots', region, params)
+
+
+def object_count(bucket):
+    return Node('object_count', None, {'Bucket': bucket})
+
+
+# ============================================
+# Consumer plans
+# ============================================
+
+def _master_plan(event):
+    config = event.get('config', {})
+    db_instance_id = config.get('db_instance_id', 'dr-project-primary-db')
+    nodes = [
+        snapshots(PRIMARY_REGION, DBInstanceIdentifier=db_instance_id),
+        snapshots(DR_REGION, DBInstanceIdentifier=db_instance_id)
+    ]
+    if config.get('primary_bucket') and config.get('dr_bucket'):
+        nodes += [object_count(config['primary_bucket']), object_count(config['dr_bucket'])]
+    if config.get('instance_id'):
+        nodes += [images(PRIMARY_REGION, **AVAILABLE_IMAGES), images(DR_REGION, **AVAILABLE_IMAGES)]
+    return nodes
+
+
+def _ami_monitor_plan(event):
+    return [images(PRIMARY_REGION, **DAILY_BACKUP_IMAGES), images(DR_REGION, **AVAILABLE_IMAGES)]
+
+
+def _s3_monitor_plan(event):
+    return [object_count(event['primary_bucket']), object_count(event['dr_bucket'])]
+
+
+def _rds_tester_plan(event):
+    # The tester reads the DR region, or the primary for any other test region
+    test_region = event.get('config', {}).get('test_region', DR_REGION)
+    region = DR_REGION if test_region == DR_REGION else PRIMARY_REGION
+    return [snapshots(region, SnapshotType='automated')]
+
+
+def _ec2_tester_plan(event):
+    return [images(DR_REGION, **AVAILABLE_IMAGES)]
+
+
+PLANS = {
+    'master-backup-monitor': _master_plan,
+    'ami-monitor': _ami_monitor_plan,
+    's3-replication-monitor': _s3_monitor_plan,
+    'rds-restore-tester': _rds_tester_plan,
+    'ec2-restore-tester': _ec2_tester_plan
+}
+
+
+def plan(consumer, event):
+    """The discovery nodes a consumer reads when invoked with event"""
+    return PLANS[consumer](event) if consumer in PLANS else []
+
+
+# ============================================
+# Cycle cache
+# ============================================
+
+def _cache_key(cycle_id, node_key):
+    return f"discovery/{cycle_id}/{node_key}.json.gz"
+
+
+def new_cycle_id():
+    return datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')
+
+
+def save(store, cycle_id, node, value):
+    """Write one node's result for the cycle"""
+    store.put(_cache_key(cycle_id, node.key),
+              gzip.compress(json.dumps(node.encode(value), default=str).encode()))
+
+
+class Cycle:
+    """A consumer's view of the discovery cycle it was invoked for"""
+
+    def __init__(self, store=None, cycle_id=None, nodes=()):
+        self.store = store
+        self.cycle_id = cycle_id
+        self.nodes = set(nodes)
+        self.hits = []
+        self.misses = []
+
+    @classmethod
+    def from_event(cls, event):
+        pointer = event.get('discovery')
+        if not pointer:
+            return cls()
+        return cls(open_store(pointer['store']), pointer['cycle'], pointer.get('nodes', []))
+
+    def get(self, node):
+        """The cached result for node, or None if this cycle did not discover it"""
+        data = None
+        if self.store is not None and node.key in self.nodes:
+            data = self.store.get(_cache_key(self.cycle_id, node.key))
+        if data is None:
+            self.misses.append(node.key)
+            return None
+        self.hits.append(node.key)
+        return node.decode(json.loads(gzip.decompress(data)))
+
+    def fetch(self, node, client=None):
+        """The cached result for node, or the same listing made now"""
+        value = self.get(node)
+        return node.fetch(client) if value is None else value
+
+    def stats(self):
+        return {'cycle': self.cycle_id, 'cached': len(self.hits), 'live': len(self.misses)}
+
+
+# ============================================
+# Graph execution
+# ============================================
+
+def run_graph(tasks, workers=DEFAULT_WORKERS):
+    """
+    Run a DAG of tasks, each as soon as its dependencies have finished.
+
+    tasks maps name -> (callable, dependency names). A task runs whether
+    or not its dependencies succeeded (consumers fall back to live calls).
+    Returns name -> (result, error message or None).
+    """
+    unknown = {dep for _, deps in tasks.values() for dep in deps if dep not in tasks}
+    if unknown:
+        raise ValueError(f"Unknown dependencies: {', '.join(sorted(unknown))}")
+
+    waiting = {name: set(deps) for name, (_, deps) in tasks.items()}
+    outcomes = {}
+
+    def call(function):
+        try:
+            return function(), None
+        except Exception as e:
+            return None, str(e)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        running = {}
+        while waiting or running:
+            for name in [name for name, deps in waiting.items() if not deps]:
+                del waiting[name]
+                running[pool.submit(call, tasks[name][0])] = name
+            if not running:
+                raise ValueError(f"Dependency cycle between: {', '.join(sorted(waiting))}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                outcomes[name] = future.result()
+                for deps in waiting.values():
+                    deps.discard(name)
+
+    return outcomes
@@ -0,0 +1,236 @@
+"""
+Scatter-gather fan-out of scans to child workers.
+
+A scan that splits into independent shards (one bucket prefix range, one
+region, ...) is described as a list of shards, each naming a registered
+task and its parameters. FanOut.run() hands every shard to an executor,
+then gathers the partial results the workers write to a results store
+(sweeps use the same stores, see dr_common.stores) until all are in or
+the time runs out; missing shards are reported, never silently dropped.
+
+LambdaExecutor invokes the calling function asynchronously with a
+{"fanout_shard": ...} event, which the handler passes to handle().
+LocalExecutor stands in for it with a forked process pool (offline runs
+only: Lambda has no /dev/shm for multiprocessing), so workers inherit
+the parent's clients and any test doubles.
+
+Lambda workers run in other containers, so their results store must be
+an s3:// location; only a LocalExecutor falls back to a temporary
+directory.
+
+Worker results are written create-only, so a duplicated child invocation
+never replaces a result that was already gathered.
+"""
+
+import json
+import multiprocessing
+import tempfile
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from dr_common import deadline, instrumentation
+from dr_common.clients import get_client
+from dr_common.pagination import paginate
+from dr_common.stores import open_store
+
+DEFAULT_SHARDS = 8
+
+# How often run() looks for new results
+POLL_SECONDS = 0.25
+
+# Seconds of the check's budget kept back after gathering, and the longest
+# wait when there is no budget (a Lambda's own maximum)
+GATHER_RESERVE_SECONDS = 1.0
+MAX_GATHER_SECONDS = 900.0
+
+# How deep s3_prefix_shards looks for enough prefixes to shard on
+MAX_PREFIX_DEPTH = 3
+
+TASKS = {}
+
+
+def task(name):
+    """Register a function as a shard task under name"""
+
+    def register(function):
+        TASKS[name] = function
+        return function
+
+    return register
+
+
+def _result_key(job_id, shard_id):
+    return f"fanout/{job_id}/{shard_id}.json"
+
+
+def run_shard(job_id, shard, store_location):
+    """Run one shard and write its result (the worker side)"""
+    store = open_store(store_location)
+    key = _result_key(job_id, shard['id'])
+    if store.get(key) is not None:
+        return
+
+    instrumentation.collector.reset()
+    started = time.perf_counter()
+    try:
+        outcome = {'result': TASKS[shard['task']](**shard['params'])}
+    except Exception as e:
+        outcome = {'error': str(e)}
+    outcome['seconds'] = round(time.perf_counter() - started, 3)
+    outcome['api_calls'] = instrumentation.collector.stats()['calls']
+    store.put(key, json.dumps(outcome, default=str).encode(), if_absent=True)
+
+
+def handle(event):
+    """Handler entry point for a {"fanout_shard": ...} child invocation"""
+    run_shard(event['job'], event['shard'], event['store'])
+    return {
+        'statusCode': 200,
+        'body': json.dumps({'job': event['job'], 'shard': event['shard']['id']})
+    }
+
+
+class LambdaExecutor:
+    """Runs each shard in an asynchronous invocation of a Lambda function"""
+
+    def __init__(self, function_name, client=None):
+        self.function_name = function_name
+        self.client = client or get_client('lambda')
+
+    def submit(self, job_id, shard, store_location):
+        self.client.invoke(
+            FunctionName=self.function_name,
+            InvocationType='Event',
+            Payload=json.dumps({'fanout_shard': {
+                'job': job_id,
+                'shard': shard,
+                'store': store_location
+            }})
+        )
+
+    def shutdown(self):
+        pass
+
+
+class LocalExecutor:
+    """Runs each shard in a forked worker process"""
+
+    def __init__(self, processes=None):
+        self.pool = ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context('fork'))
+
+    def submit(self, job_id, shard, store_location):
+        self.pool.submit(run_shard, job_id, shard, store_location)
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _check_store(executor, store_location):
+    if not isinstance(executor, LocalExecutor) and not str(store_location or '').startswith('s3://'):
+        raise ValueError(
+            f"Fan-out to Lambda workers needs an s3:// results_store, not {store_location or 'none'}"
+        )
+
+
+def executor_from(config, context=None):
+    """The executor a fanout config asks for"""
+    if config.get('executor', 'lambda') == 'local':
+        return LocalExecutor(config.get('processes'))
+    _check_store(None, config.get('results_store'))
+    return LambdaExecutor(config.get('function_name') or context.function_name)
+
+
+class FanOut:
+    """Scatters shards to an executor and gathers their results from a store"""
+
+    def __init__(self, executor, store_location=None):
+        _check_store(executor, store_location)
+        self.executor = executor
+        self.store_location = store_location or tempfile.mkdtemp(prefix='dr-fanout-')
+        self.store = open_store(self.store_location)
+
+    def run(self, shards, timeout=None):
+        """
+        Run every shard; returns (results by shard id, errors by shard id,
+        ids of shards with no result in time, worker stats).
+        """
+        job_id = uuid.uuid4().hex
+        for shard in shards:
+            self.executor.submit(job_id, shard, self.store_location)
+
+        if timeout is None:
+            timeout = min(deadline.remaining() - GATHER_RESERVE_SECONDS, MAX_GATHER_SECONDS)
+        expires = time.monotonic() + timeout
+
+        outcomes = {}
+        wanted = {_result_key(job_id, shard['id']): shard['id'] for shard in shards}
+        while True:
+            for key in self.store.list(f"fanout/{job_id}/"):
+                if key in wanted and wanted[key] not in outcomes:
+                    outcomes[wanted[key]] = json.loads(self.store.get(key))
+            if len(outcomes) == len(shards) or time.monotonic() >= expires:
+                break
+            deadline.checkpoint()
+            time.sleep(POLL_SECONDS)
+
+        results = {sid: outcome['result'] for sid, outcome in outcomes.items() if 'result' in outcome}
+        errors = {sid: outcome['error'] for sid, outcome in outcomes.items() if 'error' in outcome}
+        missing = [shard['id'] for shard in shards if shard['id'] not in outcomes]
+        stats = {
+            'shards': len(shards),
+            'api_calls': sum(outcome.get('api_calls', 0) for outcome in outcomes.values()),
+            'slowest_shard_seconds': max((outcome.get('seconds', 0) for outcome in outcomes.values()),
+                                         default=0)
+        }
+        return results, errors, missing, stats
+
+
+# ============================================
+# S3 listing shards
+# ============================================
+
+def s3_prefix_shards(client, bucket, count):
+    """
+    Split a bucket listing into at most count shards of key prefixes.
+
+    Descends the "/" hierarchy (at most MAX_PREFIX_DEPTH levels) until
+    there are at least count prefixes. Returns (shards, objects) where
+    objects is the number of keys above those prefixes, which the
+    planning listings have already counted.
+    """
+    prefixes = ['']
+    objects = 0
+    for _ in range(MAX_PREFIX_DEPTH):
+        if len(prefixes) >= count:
+            break
+        expanded = []
+        for prefix in prefixes:
+            for page in paginate(client, 'list_objects_v2', prefetch=0,
+                                 Bucket=bucket, Prefix=prefix, Delimiter='/'):
+                expanded.extend(entry['Prefix'] for entry in page.get('CommonPrefixes', []))
+                objects += len(page.get('Contents', []))
+        prefixes = expanded
+
+    # Contiguous runs of prefixes keep each worker's listing sequential
+    size = -(-len(prefixes) // max(1, count))
+    shards = [
+        {
+            'id': f"{bucket}-{n:03d}",
+            'task': 's3_count',
+            'params': {'bucket': bucket, 'prefixes': prefixes[start:start + size]}
+        }
+        for n, start in enumerate(range(0, len(prefixes), max(1, size)))
+    ]
+    return shards, objects
+
+
+@task('s3_count')
+def count_objects(bucket, prefixes, region=None):
+    """Count the objects under each of prefixes"""
+    client = get_client('s3', region_name=region)
+    total = 0
+    for prefix in prefixes:
+        for page in paginate(client, 'list_objects_v2', Bucket=bucket, Prefix=prefix):
+            total += page.get('KeyCount', 0)
+    return {'objects': total}
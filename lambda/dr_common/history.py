@@ -0,0 +1,246 @@
+"""
+Compressed, partitioned history of monitor reports.
+
+Every report is flattened to one row of dotted columns
+("rds.latest_snapshot_age_hours", "s3.replication_difference", ...) and
+appended to the partition for its UTC day:
+
+    history/<source>/<YYYY>/<MM>/<DD>.jsonl.gz
+
+in a store (see dr_common.stores). A partition is gzip-compressed JSON
+lines laid out by column: a header line naming the row count and
+columns, then one "<column>\\t<JSON list of values>" line per column.
+Queries compute the day partitions a time range covers from their keys
+(no listing), fetch them concurrently and only parse the lines of the
+columns they asked for, so a month of 6-hourly reports is about thirty
+small reads.
+
+window() aggregates the reports of the last hours (min, max and latest
+of numeric columns, worst status, how long each issue stayed open), which
+is what the daily summary is built from.
+
+Appends rewrite the day's partition. The master monitor is its only
+writer and reports once per sweep (see dr_common.checkpoints), so the
+read-modify-write does not race.
+"""
+
+import gzip
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+DEFAULT_WORKERS = 8
+
+# Nested detail that is only useful within one report
+SKIPPED_COLUMNS = (
+    'api_calls.operations',
+    'throttling.operations',
+    'circuit_breakers',
+    'memory',
+    'rds.dr_resources',
+    'ami.dr_resources'
+)
+
+TIME_COLUMN = 'recorded_at'
+
+STATUS_SEVERITY = {'healthy': 0, 'warning': 1, 'critical': 2}
+
+# Issue texts carry the current figures ("... is 49.2 hours old"); the same
+# issue in successive reports matches once the numbers are masked
+_NUMBERS = re.compile(r'\d+(\.\d+)?')
+
+
+def flatten(report, prefix=''):
+    """Dotted column -> value for every non-dict value in a report"""
+    row = {}
+    for key, value in report.items():
+        column = f"{prefix}{key}"
+        if column in SKIPPED_COLUMNS:
+            continue
+        if isinstance(value, dict):
+            row.update(flatten(value, f"{column}."))
+        else:
+            row[column] = value
+    return row
+
+
+def _key(source, day):
+    return f"history/{source}/{day:%Y/%m/%d}.jsonl.gz"
+
+
+def _encode(rows, columns):
+    lines = [json.dumps({'rows': rows, 'columns': list(columns)})]
+    lines.extend(f"{name}\t{json.dumps(values, default=str)}" for name, values in columns.items())
+    return gzip.compress('\n'.join(lines).encode())
+
+
+def _decode(data, wanted=None, prefix=None):
+    """
+    (row count, {column: values}) for the wanted columns and those
+    starting with prefix (all columns by default)
+    """
+    lines = gzip.decompress(data).decode().split('\n')
+    rows = json.loads(lines[0])['rows']
+    columns = {}
+    everything = wanted is None and prefix is None
+    for line in lines[1:]:
+        name, _, values = line.partition('\t')
+        if everything or (wanted and name in wanted) or (prefix and name.startswith(prefix)):
+            columns[name] = json.loads(values)
+    return rows, columns
+
+
+def _days(start, end):
+    day = start.date()
+    while day <= end.date():
+        yield day
+        day += timedelta(days=1)
+
+
+class History:
+    """A source's report history in a store"""
+
+    def __init__(self, store, source='master-backup-monitor', workers=DEFAULT_WORKERS):
+        self.store = store
+        self.source = source
+        self.workers = workers
+
+    def append(self, report, when=None, extra=None):
+        """
+        Add a report as a row of its day's partition, with any extra
+        columns that are stored but not part of the report; returns the
+        partition key.
+        """
+        when = when or datetime.now(timezone.utc)
+        row = flatten(report)
+        row.update(extra or {})
+        row[TIME_COLUMN] = when.timestamp()
+
+        key = _key(self.source, when)
+        data = self.store.get(key)
+        rows, columns = _decode(data) if data is not None else (0, {})
+
+        # Columns new to this partition are None for its earlier rows
+        for name in row:
+            columns.setdefault(name, [None] * rows)
+        for name, values in columns.items():
+            values.append(row.get(name))
+
+        self.store.put(key, _encode(rows + 1, columns))
+        return key
+
+    def _partition(self, day, wanted, prefix):
+        data = self.store.get(_key(self.source, day))
+        if data is None:
+            return 0, {}
+        return _decode(data, wanted, prefix)
+
+    def query(self, columns, start, end=None, prefix=None):
+        """
+        The columns (and every column starting with prefix) of each row
+        recorded in [start, end), oldest first, as {column: values};
+        TIME_COLUMN is always included.
+        """
+        end = end or datetime.now(timezone.utc)
+        wanted = [TIME_COLUMN] + [name for name in columns if name != TIME_COLUMN]
+
+        days = list(_days(start, end))
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            partitions = list(pool.map(lambda day: self._partition(day, set(wanted), prefix), days))
+
+        names = wanted + sorted({
+            name for _, values in partitions for name in values if name not in wanted
+        })
+        result = {name: [] for name in names}
+        low, high = start.timestamp(), end.timestamp()
+        for rows, values in partitions:
+            recorded_at = values.get(TIME_COLUMN, [None] * rows)
+            for index, recorded in enumerate(recorded_at):
+                if recorded is None or not low <= recorded < high:
+                    continue
+                # A column missing from a partition reads as None for its rows
+                for name in names:
+                    result[name].append(values[name][index] if name in values else None)
+        return result
+
+    def trend(self, column, days=90, end=None):
+        """Per-day min, max, mean and last value of a numeric column"""
+        end = end or datetime.now(timezone.utc)
+        data = self.query([column], end - timedelta(days=days), end)
+
+        buckets = {}
+        for recorded, value in zip(data[TIME_COLUMN], data[column]):
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                day = datetime.fromtimestamp(recorded, timezone.utc).date().isoformat()
+                buckets.setdefault(day, []).append(value)
+
+        return [
+            {
+                'date': day,
+                'samples': len(values),
+                'min': min(values),
+                'max': max(values),
+                'mean': round(sum(values) / len(values), 2),
+                'last': values[-1]
+            }
+            for day, values in sorted(buckets.items())
+        ]
+
+    def window(self, numeric, latest=(), hours=24, end=None):
+        """
+        Aggregate the reports recorded in the last hours, or None if there
+        are none: min, max and latest of each numeric column, the latest
+        value of each latest column, the worst status and every issue or
+        warning with when it was first and last reported.
+        """
+        end = end or datetime.now(timezone.utc)
+        data = self.query(
+            list(numeric) + list(latest) + ['status', 'issues', 'warnings'],
+            end - timedelta(hours=hours), end
+        )
+        times = data[TIME_COLUMN]
+        if not times:
+            return None
+
+        metrics = {}
+        for column in numeric:
+            values = [v for v in data[column] if isinstance(v, (int, float)) and not isinstance(v, bool)]
+            metrics[column] = {
+                'min': min(values, default=None),
+                'max': max(values, default=None),
+                'latest': data[column][-1]
+            }
+
+        issues = {}
+        for index, recorded in enumerate(times):
+            for text in (data['issues'][index] or []) + (data['warnings'][index] or []):
+                issue = issues.setdefault(_NUMBERS.sub('#', text), {
+                    'first_seen': recorded,
+                    'reports': 0
+                })
+                issue.update(issue=text, last_seen=recorded, reports=issue['reports'] + 1)
+
+        statuses = [status for status in data['status'] if status]
+        return {
+            'reports': len(times),
+            'from': datetime.fromtimestamp(times[0], timezone.utc).isoformat(),
+            'to': datetime.fromtimestamp(times[-1], timezone.utc).isoformat(),
+            'latest_age_hours': round((end.timestamp() - times[-1]) / 3600, 2),
+            'latest_status': data['status'][-1],
+            'worst_status': max(statuses, key=lambda s: STATUS_SEVERITY.get(s, -1), default=None),
+            'metrics': metrics,
+            'latest': {column: data[column][-1] for column in latest},
+            'issues': sorted(
+                (
+                    {
+                        'issue': issue['issue'],
+                        'reports': issue['reports'],
+                        'open_hours': round((issue['last_seen'] - issue['first_seen']) / 3600, 1),
+                        'open': issue['last_seen'] == times[-1]
+                    }
+                    for issue in issues.values()
+                ),
+                key=lambda issue: (not issue['open'], -issue['open_hours'])
+            )
+        }
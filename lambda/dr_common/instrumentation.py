@@ -0,0 +1,145 @@
+"""
+Per-call AWS latency instrumentation.
+
+Registers before-call/after-call/after-call-error/needs-retry handlers on
+every client and records, per region and operation, how many calls and
+pages were made, how many retries and failed attempts they needed, and
+their latency (p50/p95/max). A call that ends in an exception (a
+connection error or read timeout, once its retries are used up) never
+reaches after-call; after-call-error records it as an error. The summary
+goes into each lambda's report.
+"""
+
+import threading
+import time
+
+from dr_common.pagination import PAGE_TOKENS
+
+
+def percentile(ordered, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return None
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class CallCollector:
+    """Thread-safe per-(region, operation) call statistics"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def _entry(self, key):
+        entry = self.calls.get(key)
+        if entry is None:
+            entry = self.calls[key] = {
+                'calls': 0,
+                'pages': 0,
+                'errors': 0,
+                'retries': 0,
+                'failed_attempts': 0,
+                'latencies_ms': []
+            }
+        return entry
+
+    def record_call(self, key, latency_ms, retries, error, paginated=False):
+        with self.lock:
+            entry = self._entry(key)
+            entry['calls'] += 1
+            entry['retries'] += retries
+            entry['latencies_ms'].append(latency_ms)
+            if error:
+                entry['errors'] += 1
+            elif paginated:
+                entry['pages'] += 1
+
+    def record_failed_attempt(self, key):
+        with self.lock:
+            self._entry(key)['failed_attempts'] += 1
+
+    def reset(self):
+        with self.lock:
+            self.calls = {}
+
+    def stats(self):
+        """Summary keyed by "region/service/Operation" plus totals"""
+        with self.lock:
+            operations = {}
+            for key, entry in sorted(self.calls.items()):
+                latencies = sorted(entry['latencies_ms'])
+                operations['/'.join(key)] = {
+                    'calls': entry['calls'],
+                    'pages': entry['pages'],
+                    'errors': entry['errors'],
+                    'retries': entry['retries'],
+                    'failed_attempts': entry['failed_attempts'],
+                    'latency_p50_ms': percentile(latencies, 50),
+                    'latency_p95_ms': percentile(latencies, 95),
+                    'latency_max_ms': latencies[-1] if latencies else None,
+                    'total_ms': round(sum(latencies), 1)
+                }
+
+        return {
+            'calls': sum(op['calls'] for op in operations.values()),
+            'retries': sum(op['retries'] for op in operations.values()),
+            'errors': sum(op['errors'] for op in operations.values()),
+            'total_ms': round(sum(op['total_ms'] for op in operations.values()), 1),
+            'operations': operations
+        }
+
+
+collector = CallCollector()
+
+
+def _key(region, event_name):
+    # Event names look like "after-call.ec2.DescribeImages"
+    _, service, operation = event_name.split('.', 2)
+    return (region or 'global', service, operation)
+
+
+def install(client, shared=None):
+    """Record latency and retries for every call a boto3 client makes"""
+    shared = shared or collector
+    region = client.meta.region_name
+    events = client.meta.events
+    # API names (DescribeDBSnapshots...) of the calls paginate() drives
+    paginated = {client.meta.method_to_api_mapping.get(name) for name in PAGE_TOKENS}
+
+    def before_call(context=None, **kwargs):
+        if context is not None:
+            context['instrumentation_started'] = time.perf_counter()
+
+    def needs_retry(event_name, response=None, caught_exception=None, attempts=None,
+                    request_dict=None, **kwargs):
+        failed = caught_exception is not None or (
+            response is not None and response[0].status_code >= 300
+        )
+        if failed:
+            shared.record_failed_attempt(_key(region, event_name))
+        # request_dict['context'] is the call's context, which after-call-error gets
+        if request_dict is not None and attempts:
+            request_dict['context']['instrumentation_attempts'] = attempts
+
+    def after_call(event_name, http_response=None, parsed=None, context=None, **kwargs):
+        started = (context or {}).get('instrumentation_started')
+        latency_ms = round((time.perf_counter() - started) * 1000, 1) if started else 0.0
+        retries = (parsed or {}).get('ResponseMetadata', {}).get('RetryAttempts', 0)
+        error = http_response is None or http_response.status_code >= 300
+        key = _key(region, event_name)
+        shared.record_call(key, latency_ms, retries, error, key[2] in paginated)
+
+    def after_call_error(event_name, exception=None, context=None, **kwargs):
+        context = context or {}
+        started = context.get('instrumentation_started')
+        latency_ms = round((time.perf_counter() - started) * 1000, 1) if started else 0.0
+        retries = max(0, context.get('instrumentation_attempts', 1) - 1)
+        shared.record_call(_key(region, event_name), latency_ms, retries, True)
+
+    events.register_first('before-call.*.*', before_call, unique_id='dr-instrumentation-before-call')
+    events.register('needs-retry.*.*', needs_retry, unique_id='dr-instrumentation-needs-retry')
+    events.register('after-call.*.*', after_call, unique_id='dr-instrumentation-after-call')
+    events.register('after-call-error.*.*', after_call_error,
+                    unique_id='dr-instrumentation-after-call-error')
+    return client
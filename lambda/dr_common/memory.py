@@ -0,0 +1,143 @@
+"""
+Memory instrumentation and bounded-memory scans.
+
+profile() wraps each check and records its peak Python allocations
+(tracemalloc, when enabled) and process RSS. A Budget lets the snapshot
+and listing checks switch from keeping every record to streaming
+aggregation once a byte budget is crossed, so a huge fleet degrades the
+report's detail instead of running the function out of memory.
+"""
+
+import os
+import resource
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# How many records to consume between budget checks
+CHECK_EVERY = 1000
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def rss_bytes():
+    """Current resident set size of this process"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        # ru_maxrss is the high-water mark (KB on Linux), the best we have
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def enabled(config):
+    """Whether allocation tracing was requested for this invocation"""
+    return bool(config.get('memory_profile') or os.environ.get('DR_MEMORY_PROFILE'))
+
+
+def budget_from(config):
+    """The byte budget configured for this invocation, if any"""
+    megabytes = config.get('memory_budget_mb') or os.environ.get('DR_MEMORY_BUDGET_MB')
+    return Budget(int(float(megabytes) * 1024 * 1024)) if megabytes else None
+
+
+@contextmanager
+def profile(name, results, trace=False):
+    """Record peak allocations and RSS for the wrapped block into results[name]"""
+    started_tracing = False
+    if trace and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        started_tracing = True
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+
+    rss_start = rss_bytes()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        entry = {
+            'rss_start_mb': round(rss_start / 1048576, 1),
+            'rss_end_mb': round(rss_bytes() / 1048576, 1),
+            'seconds': round(time.perf_counter() - started, 3)
+        }
+        if tracemalloc.is_tracing():
+            entry['peak_alloc_mb'] = round(tracemalloc.get_traced_memory()[1] / 1048576, 2)
+        if started_tracing:
+            tracemalloc.stop()
+        results[name] = entry
+
+
+class Budget:
+    """A byte budget measured against traced allocations or RSS"""
+
+    def __init__(self, limit_bytes):
+        self.limit_bytes = limit_bytes
+        self.baseline = self.used()
+
+    def used(self):
+        if tracemalloc.is_tracing():
+            return tracemalloc.get_traced_memory()[0]
+        return rss_bytes()
+
+    def exceeded(self):
+        return self.used() - self.baseline > self.limit_bytes
+
+
+class RecoveryPointAggregate:
+    """
+    Streaming per-resource counts and newest recovery point.
+
+    Creation times only need to be comparable (epoch seconds for RDS,
+    ISO strings for AMIs) so nothing is parsed per item.
+    """
+
+    def __init__(self, state=None):
+        state = state or {}
+        self.count = state.get('count', 0)
+        self.latest = dict(state.get('latest', {}))
+
+    def state(self):
+        return {'count': self.count, 'latest': dict(self.latest)}
+
+    def merge(self, other):
+        """Fold another aggregate's counts and newest points into this one"""
+        self.count += other.count
+        for resource_id, created in other.latest.items():
+            current = self.latest.get(resource_id)
+            if current is None or created > current:
+                self.latest[resource_id] = created
+
+    def add(self, resource_id, created):
+        self.count += 1
+        if created is None:
+            return
+        current = self.latest.get(resource_id)
+        if current is None or created > current:
+            self.latest[resource_id] = created
+
+
+def retain(records, aggregate, key, budget=None, keep=True, on_drop=None):
+    """
+    Feed every record into aggregate and return the list of records.
+
+    key(record) returns the (resource_id, created) pair for the aggregate.
+    If budget is crossed the records kept so far are dropped, on_drop() is
+    called and None is returned; the caller then reports from the
+    aggregate alone. keep=False streams from the start, for records whose
+    earlier part was already dropped (a resumed checkpointed scan, whose
+    aggregate then starts from the scan's committed one).
+    """
+    kept = [] if keep else None
+    for record in records:
+        aggregate.add(*key(record))
+        if kept is None:
+            continue
+
+        kept.append(record)
+        if budget is not None and len(kept) % CHECK_EVERY == 0 and budget.exceeded():
+            kept = None
+            if on_drop is not None:
+                on_drop()
+
+    return kept
@@ -0,0 +1,129 @@
+"""
+Pipelined pagination for describe_* and list_* calls.
+
+paginate() fetches page N+1 on a worker thread while the caller is still
+processing page N, so a scan costs roughly max(network, processing)
+instead of their sum. At most `prefetch` pages are buffered, which caps
+the memory held on behalf of a slow consumer. Errors raised by the API
+(including throttling ClientErrors) are re-raised in the caller's thread
+at the point the failed page would have been returned.
+"""
+
+import contextvars
+import queue
+import threading
+
+# operation -> (request token, response token, page size parameter)
+PAGE_TOKENS = {
+    'describe_db_instances': ('Marker', 'Marker', 'MaxRecords'),
+    'describe_db_snapshots': ('Marker', 'Marker', 'MaxRecords'),
+    'describe_images': ('NextToken', 'NextToken', 'MaxResults'),
+    'describe_instances': ('NextToken', 'NextToken', 'MaxResults'),
+    'describe_security_groups': ('NextToken', 'NextToken', 'MaxResults'),
+    'list_objects_v2': ('ContinuationToken', 'NextContinuationToken', 'MaxKeys'),
+    'get_parameters_by_path': ('NextToken', 'NextToken', 'MaxResults')
+}
+
+DEFAULT_PREFETCH = 2
+
+# How often a blocked worker re-checks whether the consumer went away
+_POLL_SECONDS = 0.5
+
+_DONE = object()
+
+
+class _PageError:
+    """Carries an exception from the worker to the consumer"""
+
+    __slots__ = ('exception',)
+
+    def __init__(self, exception):
+        self.exception = exception
+
+
+def page_token(operation, page):
+    """The token to resume after `page`, or None on the last page"""
+    return page.get(PAGE_TOKENS[operation][1])
+
+
+def _fetch_pages(client, operation, params, starting_token):
+    """Synchronously yield pages of one operation"""
+    request_token, response_token, _ = PAGE_TOKENS[operation]
+    method = getattr(client, operation)
+    token = starting_token
+
+    while True:
+        if token:
+            params[request_token] = token
+        page = method(**params)
+        yield page
+
+        token = page.get(response_token)
+        if not token:
+            return
+
+
+def _worker(pages, buffer, stop):
+    try:
+        for page in pages:
+            while not stop.is_set():
+                try:
+                    buffer.put(page, timeout=_POLL_SECONDS)
+                    break
+                except queue.Full:
+                    continue
+            if stop.is_set():
+                return
+        item = _DONE
+    except Exception as e:
+        item = _PageError(e)
+
+    while not stop.is_set():
+        try:
+            buffer.put(item, timeout=_POLL_SECONDS)
+            return
+        except queue.Full:
+            continue
+
+
+def paginate(client, operation, starting_token=None, page_size=None,
+             prefetch=DEFAULT_PREFETCH, **params):
+    """
+    Yield every page of a paginated call.
+
+    With prefetch=0 pages are fetched inline on the caller's thread.
+    """
+    if page_size:
+        params[PAGE_TOKENS[operation][2]] = page_size
+
+    pages = _fetch_pages(client, operation, params, starting_token)
+    if prefetch <= 0:
+        yield from pages
+        return
+
+    buffer = queue.Queue(maxsize=prefetch)
+    stop = threading.Event()
+    # The worker inherits the caller's context (e.g. its deadline scope)
+    worker = threading.Thread(
+        target=contextvars.copy_context().run, args=(_worker, pages, buffer, stop),
+        name=f'prefetch-{operation}', daemon=True
+    )
+    worker.start()
+
+    try:
+        while True:
+            item = buffer.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _PageError):
+                raise item.exception
+            yield item
+    finally:
+        # The consumer finished, failed or stopped early
+        stop.set()
+
+
+def items(client, operation, result_key, **kwargs):
+    """Yield every item of a paginated call across all of its pages"""
+    for page in paginate(client, operation, **kwargs):
+        yield from page.get(result_key, [])
@@ -0,0 +1,125 @@
+"""
+Compact records for snapshots, images and S3 objects.
+
+boto3 returns large nested dicts (BlockDeviceMappings, tag lists, ARNs,
+option groups...) for every item while the checks only read a handful of
+fields. These __slots__ classes and columns project just those fields as
+each page arrives so the raw page can be garbage collected straight away.
+"""
+
+import sys
+from array import array
+
+from dr_common.recovery_index import image_resource_id, image_source_id
+
+
+def _intern(value):
+    """Share repeated strings (instance IDs, statuses) between records"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class SnapshotRecord:
+    """The fields of an RDS DBSnapshot the checks use"""
+
+    __slots__ = (
+        'snapshot_id', 'instance_id', 'created', 'status',
+        'snapshot_type', 'source', 'allocated_storage'
+    )
+
+    def __init__(self, snapshot_id, instance_id, created, status,
+                 snapshot_type=None, source=None, allocated_storage=0):
+        self.snapshot_id = snapshot_id
+        self.instance_id = instance_id
+        self.created = created
+        self.status = status
+        self.snapshot_type = snapshot_type
+        self.source = source
+        self.allocated_storage = allocated_storage
+
+    @classmethod
+    def from_item(cls, item):
+        created = item.get('SnapshotCreateTime')
+        return cls(
+            item['DBSnapshotIdentifier'],
+            _intern(item.get('DBInstanceIdentifier')),
+            # Epoch seconds; a float is half the size of an aware datetime
+            created.timestamp() if created else None,
+            _intern(item.get('Status')),
+            _intern(item.get('SnapshotType')),
+            item.get('SourceDBSnapshotIdentifier'),
+            item.get('AllocatedStorage', 0)
+        )
+
+
+class ImageRecord:
+    """The fields of an EC2 Image the checks use"""
+
+    __slots__ = ('image_id', 'name', 'resource_id', 'created', 'source_image_id', 'volume_gb')
+
+    def __init__(self, image_id, name, resource_id, created, source_image_id=None, volume_gb=0):
+        self.image_id = image_id
+        self.name = name
+        self.resource_id = resource_id
+        self.created = created
+        self.source_image_id = source_image_id
+        self.volume_gb = volume_gb
+
+    @classmethod
+    def from_item(cls, item):
+        volume_gb = sum(
+            mapping.get('Ebs', {}).get('VolumeSize', 0)
+            for mapping in item.get('BlockDeviceMappings', [])
+        )
+        return cls(
+            item['ImageId'],
+            item.get('Name'),
+            _intern(image_resource_id(item)),
+            # Kept as the ISO string so the timeline can parse in bulk
+            item['CreationDate'],
+            image_source_id(item),
+            volume_gb
+        )
+
+
+class ObjectColumns:
+    """
+    Array-backed columns for an S3 listing.
+
+    Object listings are the largest scans (millions of keys), so instead of
+    one record per object only the size and modification time are kept in
+    typed arrays; keys are retained only when a caller asks for them.
+    """
+
+    __slots__ = ('sizes', 'modified', 'keys')
+
+    def __init__(self, keep_keys=False):
+        self.sizes = array('q')
+        self.modified = array('d')
+        self.keys = [] if keep_keys else None
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def append(self, item):
+        self.sizes.append(item.get('Size', 0))
+        modified = item.get('LastModified')
+        self.modified.append(modified.timestamp() if modified else 0.0)
+        if self.keys is not None:
+            self.keys.append(item['Key'])
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+        return self
+
+    def total_bytes(self):
+        return sum(self.sizes)
+
+    def newest_modified(self):
+        return max(self.modified) if self.modified else None
+
+
+def project(items, record_cls):
+    """Yield compact records for a stream of boto3 items"""
+    for item in items:
+        yield record_cls.from_item(item)
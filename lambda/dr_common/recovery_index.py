@@ -0,0 +1,193 @@
+"""
+Cross-region recovery point index.
+
+Joins primary RDS snapshots and AMIs to their DR-region copies so the
+monitors can tell which recovery points are actually protected.
+"""
+
+import re
+from datetime import datetime, timezone
+
+# Default description written by CopyImage: "[Copied ami-xxx from us-east-1] ..."
+COPIED_IMAGE_PATTERN = re.compile(r'\[Copied (ami-[0-9a-f]+) from [a-z0-9-]+\]')
+
+# Tags that carry the source AMI ID on copies (DLM CopyTags / copy scripts)
+SOURCE_IMAGE_TAG_KEYS = ('SourceImageId', 'SourceAmiId')
+
+
+def parse_image_date(value):
+    """Parse an EC2 CreationDate string into an aware datetime"""
+    return datetime.strptime(value, '%Y-%m-%dT%H:%M:%S.%fZ').replace(tzinfo=timezone.utc)
+
+
+def _hours(delta):
+    return round(delta.total_seconds() / 3600, 2)
+
+
+def _snapshot_id_from_arn(value):
+    """Cross-region copies record the source as an ARN"""
+    if ':snapshot:' in value:
+        return value.split(':snapshot:', 1)[1]
+    return value
+
+
+def image_source_id(image):
+    """Find the primary AMI an image was copied from"""
+    if image.get('SourceImageId'):
+        return image['SourceImageId']
+
+    for tag in image.get('Tags', []):
+        if tag['Key'] in SOURCE_IMAGE_TAG_KEYS:
+            return tag['Value']
+
+    match = COPIED_IMAGE_PATTERN.search(image.get('Description') or '')
+    return match.group(1) if match else None
+
+
+def image_resource_id(image):
+    """Group AMIs by the instance they were taken from"""
+    if image.get('SourceInstanceId'):
+        return image['SourceInstanceId']
+
+    for tag in image.get('Tags', []):
+        if tag['Key'] == 'instance-id':
+            return tag['Value']
+
+    return image.get('Name') or image['ImageId']
+
+
+def join_recovery_points(primary_points, dr_points, now):
+    """
+    Hash join primary recovery points to their DR copies.
+
+    Primary points are dicts with point_id, resource_id, created (aware
+    datetime) and keys; DR points carry source_ids that may match one of
+    those keys. Each side is walked once so the join is linear.
+    """
+    primary_by_key = {}
+    for point in primary_points:
+        for key in point['keys']:
+            if key:
+                primary_by_key[key] = point
+
+    copies = {}
+    orphan_copies = 0
+    for copy in dr_points:
+        source = None
+        for key in copy['source_ids']:
+            source = primary_by_key.get(key)
+            if source:
+                break
+
+        if source is None:
+            orphan_copies += 1
+            continue
+
+        # Keep the earliest copy of each primary point
+        current = copies.get(source['point_id'])
+        if current is None or copy['created'] < current['created']:
+            copies[source['point_id']] = copy
+
+    resources = {}
+    missing = []
+    for point in primary_points:
+        resource = resources.setdefault(point['resource_id'], {
+            'resource_id': point['resource_id'],
+            'primary_points': 0,
+            'copied_points': 0,
+            'latest_point_age_hours': None,
+            'dr_rpo_hours': None,
+            'latest_copy_lag_hours': None,
+            'max_copy_lag_hours': None,
+            '_latest': None,
+            '_latest_copied': None
+        })
+        resource['primary_points'] += 1
+
+        if resource['_latest'] is None or point['created'] > resource['_latest']:
+            resource['_latest'] = point['created']
+
+        copy = copies.get(point['point_id'])
+        if copy is None:
+            missing.append({
+                'resource_id': point['resource_id'],
+                'point_id': point['point_id'],
+                'age_hours': _hours(now - point['created'])
+            })
+            continue
+
+        resource['copied_points'] += 1
+        lag = _hours(copy['created'] - point['created'])
+        if resource['max_copy_lag_hours'] is None or lag > resource['max_copy_lag_hours']:
+            resource['max_copy_lag_hours'] = lag
+
+        if resource['_latest_copied'] is None or point['created'] > resource['_latest_copied']:
+            resource['_latest_copied'] = point['created']
+            resource['latest_copy_lag_hours'] = lag
+
+    for resource in resources.values():
+        latest = resource.pop('_latest')
+        latest_copied = resource.pop('_latest_copied')
+        resource['latest_point_age_hours'] = _hours(now - latest)
+        # Age of the newest point that survives losing the primary region
+        if latest_copied is not None:
+            resource['dr_rpo_hours'] = _hours(now - latest_copied)
+
+    missing.sort(key=lambda x: x['age_hours'])
+
+    return {
+        'resources': resources,
+        'copied_points': len(copies),
+        'orphan_copies': orphan_copies,
+        'missing_copies': missing
+    }
+
+
+def rds_points(primary_snapshots, dr_snapshots):
+    """Normalize SnapshotRecords for join_recovery_points"""
+    primary = []
+    for snapshot in primary_snapshots:
+        if snapshot.status != 'available':
+            continue
+        primary.append({
+            'point_id': snapshot.snapshot_id,
+            'resource_id': snapshot.instance_id,
+            'created': datetime.fromtimestamp(snapshot.created, timezone.utc),
+            'keys': [snapshot.snapshot_id]
+        })
+
+    dr = []
+    for snapshot in dr_snapshots:
+        if not snapshot.source or snapshot.status != 'available':
+            continue
+        dr.append({
+            'point_id': snapshot.snapshot_id,
+            'created': datetime.fromtimestamp(snapshot.created, timezone.utc),
+            'source_ids': [_snapshot_id_from_arn(snapshot.source)]
+        })
+
+    return primary, dr
+
+
+def image_points(primary_images, dr_images):
+    """Normalize ImageRecords for join_recovery_points"""
+    primary = []
+    for image in primary_images:
+        primary.append({
+            'point_id': image.image_id,
+            'resource_id': image.resource_id,
+            'created': parse_image_date(image.created),
+            'keys': [image.image_id]
+        })
+
+    dr = []
+    for image in dr_images:
+        if not image.source_image_id:
+            continue
+        dr.append({
+            'point_id': image.image_id,
+            'created': parse_image_date(image.created),
+            'source_ids': [image.source_image_id]
+        })
+
+    return primary, dr
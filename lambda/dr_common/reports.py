@@ -0,0 +1,134 @@
+"""
+Full monitor reports streamed to a store, with a compact summary.
+
+A fleet-scale report (every resource's recovery points, per-operation API
+stats, ...) built as one dict and serialized twice, indented into the log
+and again as the response body, spikes memory, floods CloudWatch Logs and
+eventually exceeds the 6 MB Lambda response limit. A ReportWriter instead
+writes the report as one JSON object, a section (top-level key) at a
+time, to a streaming writer of a store (see dr_common.stores): a local
+file, or an S3 multipart upload under
+
+    reports/<source>/<YYYY>/<MM>/<DD>/<timestamp>.json
+
+Sections can be written as soon as they are final and their bulky detail
+dropped from memory (detach()); long lists are written item by item.
+The handler then logs and returns compact(report), which cuts long
+lists and very large maps to their first entries and a count, along with
+a pointer to the full report.
+"""
+
+import json
+from datetime import datetime, timezone
+
+from dr_common.stores import open_store
+
+# Lists longer than this are cut in the compact summary
+MAX_ITEMS = 20
+
+# Maps with more keys than this (per-resource or per-operation) are cut too
+MAX_KEYS = 50
+
+# Per-resource detail that only the full report carries
+DETAIL_KEYS = ('dr_resources',)
+
+
+def _json(value):
+    return json.dumps(value, default=str)
+
+
+class ReportWriter:
+    """One JSON report object written section by section"""
+
+    def __init__(self, store, key):
+        self.store = store
+        self.key = key
+        self.sink = store.writer(key)
+        self.sections = []
+        self.bytes = 0
+        self._write('{')
+
+    def _write(self, text):
+        data = text.encode()
+        self.sink.write(data)
+        self.bytes += len(data)
+
+    def _start(self, name):
+        if name in self.sections:
+            raise ValueError(f"Section {name} was already written")
+        self._write(f"{',' if self.sections else ''}\n{_json(name)}: ")
+        self.sections.append(name)
+
+    def section(self, name, value):
+        """Write one top-level key; dicts are written one key at a time"""
+        self._start(name)
+        if isinstance(value, dict):
+            self._write('{')
+            for index, (key, item) in enumerate(value.items()):
+                self._write(f"{', ' if index else ''}{_json(key)}: ")
+                self._value(item)
+            self._write('}')
+        else:
+            self._value(value)
+
+    def _value(self, value):
+        # Lists are written item by item rather than as one string
+        if isinstance(value, list):
+            self._write('[')
+            for index, item in enumerate(value):
+                self._write(f"{', ' if index else ''}{_json(item)}")
+            self._write(']')
+        else:
+            self._write(_json(value))
+
+    def detach(self, report, name):
+        """
+        Write a final section, then keep only a copy without its per-resource
+        detail in the report (the section dict itself is left untouched)
+        """
+        value = report[name]
+        self.section(name, value)
+        if isinstance(value, dict):
+            report[name] = {key: item for key, item in value.items() if key not in DETAIL_KEYS}
+
+    def close(self, report):
+        """Write the sections not yet written and finish the object; returns its location"""
+        for name, value in report.items():
+            if name not in self.sections:
+                self.section(name, value)
+        self._write('\n}\n')
+        self.sink.close()
+        return self.store.url(self.key)
+
+    def abort(self):
+        try:
+            self.sink.abort()
+        except Exception as e:
+            print(f"Error discarding partial report: {str(e)}")
+
+
+def open_writer(location, source, now=None):
+    """A ReportWriter for a new report of source in the store at location"""
+    now = now or datetime.now(timezone.utc)
+    return ReportWriter(
+        open_store(location), f"reports/{source}/{now:%Y/%m/%d}/{now:%Y%m%dT%H%M%S.%fZ}.json"
+    )
+
+
+def compact(value, max_items=MAX_ITEMS, max_keys=MAX_KEYS):
+    """
+    value with lists over max_items and maps over max_keys entries cut to
+    their first entries and a count of the rest
+    """
+    if isinstance(value, dict):
+        items = list(value.items())
+        kept = {key: compact(item, max_items, max_keys) for key, item in items[:max_keys]}
+        if len(items) > max_keys:
+            kept['_omitted'] = len(items) - max_keys
+        return kept
+    if isinstance(value, list):
+        kept = [compact(item, max_items, max_keys) for item in value[:max_items]]
+        if len(value) > max_items:
+            kept.append(f"... {len(value) - max_items} more")
+        return kept
+    return value
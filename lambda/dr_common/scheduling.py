@@ -0,0 +1,281 @@
+"""
+Adaptive scheduling of the full checks.
+
+The monitors and restore testers run full scans (every snapshot, AMI and
+object listing) on fixed cron schedules whether or not anything changed.
+The check-scheduler lambda instead runs cheap probes often: one describe
+or metric call per check (probe_rds, probe_ami, probe_s3), each returning
+a small observation of values that only change when something happened
+(an instance status, a retention period, whether replication is enabled
+or the DR bucket is behind, ...). A Schedule compares each observation
+with the last one it persisted and hands a consumer (a lambda and the
+checks it covers) a full run only when
+
+- one of its checks drifted since its last run (after min_interval_hours),
+- or its max_interval_hours SLA would lapse before the next probe.
+
+A check inside one of its quiet windows (the RDS backup window, the DLM
+creation window) is not probed, since its state is expected to move
+then, and its consumers are deferred until the window ends. The probe
+interval drops straight to MIN_PROBE_MINUTES after drift or a deferral
+and doubles while nothing changes, up to MAX_PROBE_MINUTES; the
+scheduler applies it to its own EventBridge rule.
+
+State is one JSON document, schedule/state.json, in a store (see
+dr_common.stores).
+"""
+
+import json
+from datetime import datetime, timedelta, timezone
+
+from botocore.exceptions import ClientError
+
+STATE_KEY = 'schedule/state.json'
+
+# Probe interval bounds, in minutes
+MIN_PROBE_MINUTES = 15
+MAX_PROBE_MINUTES = 120
+DEFAULT_PROBE_MINUTES = 30
+
+# Full run bounds per consumer, in hours, unless its config sets them
+DEFAULT_MIN_INTERVAL_HOURS = 1
+DEFAULT_MAX_INTERVAL_HOURS = 24
+
+# Point-in-time recovery further behind than this counts as lagging
+RESTORABLE_LAG_MINUTES = 30
+
+# DR bucket further behind the primary than this counts as behind
+REPLICATION_GAP_OBJECTS = 10
+
+# DLM starts creating within this long of a policy's scheduled time
+DLM_WINDOW_MINUTES = 60
+
+# Quiet windows (UTC) used when a probe cannot read them
+DEFAULT_WINDOWS = {
+    'rds': ['03:00-04:00'],
+    'ami': ['03:00-04:00']
+}
+
+# Checks each consumer's full run covers, unless its config lists them
+CONSUMER_CHECKS = {
+    'master-backup-monitor': ['rds', 's3', 'ami'],
+    'ami-monitor': ['ami'],
+    's3-replication-monitor': ['s3'],
+    'rds-restore-tester': ['rds'],
+    'ec2-restore-tester': ['ami']
+}
+
+
+def _utc(value):
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+# ============================================
+# Quiet windows
+# ============================================
+
+def parse_window(window):
+    """'HH:MM-HH:MM' (UTC) as a (start, end) pair of minutes after midnight"""
+    start, end = window.split('-')
+    return tuple(int(hours) * 60 + int(minutes)
+                 for hours, minutes in (part.strip().split(':') for part in (start, end)))
+
+
+def in_window(now, windows):
+    """The window now falls in, if any; windows may wrap past midnight"""
+    minute = now.hour * 60 + now.minute
+    for window in windows:
+        start, end = parse_window(window)
+        if (start <= minute < end) if start <= end else (minute >= start or minute < end):
+            return window
+    return None
+
+
+def _window_from(time, minutes):
+    start = datetime.strptime(time, '%H:%M')
+    return f"{time}-{start + timedelta(minutes=minutes):%H:%M}"
+
+
+# ============================================
+# Probes
+# ============================================
+
+def probe_rds(rds_client, db_instance_id):
+    """The primary instance's status and backup settings, and its backup window"""
+    instance = rds_client.describe_db_instances(DBInstanceIdentifier=db_instance_id)['DBInstances'][0]
+
+    restorable = instance.get('LatestRestorableTime')
+    lag = (datetime.now(timezone.utc) - _utc(restorable)).total_seconds() / 60 if restorable else None
+    observed = {
+        'status': instance['DBInstanceStatus'],
+        'retention': instance.get('BackupRetentionPeriod', 0),
+        'restorable_lagging': lag is None or lag > RESTORABLE_LAG_MINUTES
+    }
+    window = instance.get('PreferredBackupWindow')
+    return observed, [window] if window else DEFAULT_WINDOWS['rds']
+
+
+def probe_ami(dlm_client):
+    """How many DLM policies are enabled, and the windows they create AMIs in"""
+    policies = dlm_client.get_lifecycle_policies()['Policies']
+    enabled = [policy['PolicyId'] for policy in policies if policy.get('State') == 'ENABLED']
+
+    windows = set()
+    for policy_id in enabled:
+        details = dlm_client.get_lifecycle_policy(PolicyId=policy_id)['Policy'].get('PolicyDetails', {})
+        for schedule in details.get('Schedules', []):
+            for time in schedule.get('CreateRule', {}).get('Times', []):
+                windows.add(_window_from(time, DLM_WINDOW_MINUTES))
+
+    observed = {'policies': len(policies), 'enabled_policies': len(enabled)}
+    return observed, sorted(windows) or DEFAULT_WINDOWS['ami']
+
+
+def _object_count(cloudwatch_client, bucket, now):
+    # The daily storage metric; its latest datapoint is the current count
+    results = cloudwatch_client.get_metric_data(
+        MetricDataQueries=[{
+            'Id': 'objects',
+            'MetricStat': {
+                'Metric': {
+                    'Namespace': 'AWS/S3',
+                    'MetricName': 'NumberOfObjects',
+                    'Dimensions': [
+                        {'Name': 'BucketName', 'Value': bucket},
+                        {'Name': 'StorageType', 'Value': 'AllStorageTypes'}
+                    ]
+                },
+                'Period': 86400,
+                'Stat': 'Average'
+            }
+        }],
+        StartTime=now - timedelta(days=2),
+        EndTime=now,
+        ScanBy='TimestampDescending'
+    )['MetricDataResults'][0]
+    return int(results['Values'][0]) if results['Values'] else None
+
+
+def probe_s3(s3_client, primary_cloudwatch, dr_cloudwatch, primary_bucket, dr_bucket, now=None):
+    """Replication status of the primary bucket and whether the DR bucket is behind"""
+    now = now or datetime.now(timezone.utc)
+    try:
+        rules = s3_client.get_bucket_replication(Bucket=primary_bucket)['ReplicationConfiguration']['Rules']
+        replication = 'Enabled' if any(rule.get('Status') == 'Enabled' for rule in rules) else 'Disabled'
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ReplicationConfigurationNotFoundError':
+            raise
+        replication = 'NotConfigured'
+
+    primary = _object_count(primary_cloudwatch, primary_bucket, now)
+    dr = _object_count(dr_cloudwatch, dr_bucket, now)
+    behind = None if primary is None or dr is None else primary - dr > REPLICATION_GAP_OBJECTS
+    return {'replication': replication, 'dr_behind': behind}, []
+
+
+# ============================================
+# Schedule state
+# ============================================
+
+class Schedule:
+    """Persisted probe observations and consumer runs"""
+
+    def __init__(self, store):
+        self.store = store
+        data = store.get(STATE_KEY)
+        state = json.loads(data) if data else {}
+        self.probe_minutes = state.get('probe_minutes', DEFAULT_PROBE_MINUTES)
+        self.checks = state.get('checks', {})
+        self.consumers = state.get('consumers', {})
+        self.deferred = []
+
+    def _consumer(self, name):
+        return self.consumers.setdefault(name, {'last_run': None, 'drift': []})
+
+    def quiet(self, check, now):
+        """The quiet window check is in at now, if any"""
+        return in_window(now, self.checks.get(check, {}).get('windows', DEFAULT_WINDOWS.get(check, [])))
+
+    def observe(self, check, observed, windows, consumers, now):
+        """
+        Record a probe result; each value that changed since the last one is
+        queued as drift for the consumers covering check. Returns the drift.
+        """
+        previous = self.checks.get(check, {}).get('observed')
+        self.checks[check] = {'observed': observed, 'windows': windows, 'probed': now.isoformat()}
+        if previous is None:
+            return []
+
+        drift = [f"{check}.{key}" for key in sorted(set(previous) | set(observed))
+                 if previous.get(key) != observed.get(key)]
+        self._queue(drift, check, consumers)
+        return drift
+
+    def failed(self, check, consumers):
+        """A probe that could not run counts as drift; the full run reports why"""
+        self._queue([f"{check}.probe"], check, consumers)
+
+    def _queue(self, drift, check, consumers):
+        for name, consumer in consumers.items():
+            if check in consumer_checks(name, consumer):
+                pending = self._consumer(name)['drift']
+                pending.extend(key for key in drift if key not in pending)
+
+    def decide(self, name, consumer, now):
+        """(due, reason) for a consumer's full run at now"""
+        state = self._consumer(name)
+        min_hours = consumer.get('min_interval_hours', DEFAULT_MIN_INTERVAL_HOURS)
+        max_hours = consumer.get('max_interval_hours', DEFAULT_MAX_INTERVAL_HOURS)
+        if not state['last_run']:
+            return True, 'first run'
+        elapsed = (now - _utc(state['last_run'])).total_seconds() / 3600
+
+        # Overdue runs go ahead even in a quiet window
+        quiet = [window for window in (self.quiet(check, now) for check in consumer_checks(name, consumer))
+                 if window]
+        if quiet and elapsed < max_hours:
+            self.deferred.append(name)
+            return False, f"quiet window {quiet[0]}"
+
+        if elapsed + self.probe_minutes / 60 >= max_hours:
+            return True, f"SLA: {elapsed:.1f}h of {max_hours:g}h since the last run"
+        if state['drift'] and elapsed >= min_hours:
+            return True, f"drift: {', '.join(state['drift'])}"
+        return False, 'no change'
+
+    def ran(self, name, now):
+        state = self._consumer(name)
+        state['last_run'] = now.isoformat()
+        state['drift'] = []
+
+    def next_probe_minutes(self, consumers, now):
+        """
+        MIN_PROBE_MINUTES while drift is pending or a run was deferred,
+        otherwise double the current interval; never past the point where
+        a consumer's SLA needs checking
+        """
+        if self.deferred or any(self._consumer(name)['drift'] for name in consumers):
+            minutes = MIN_PROBE_MINUTES
+        else:
+            minutes = min(self.probe_minutes * 2, MAX_PROBE_MINUTES)
+
+        for name, consumer in consumers.items():
+            last_run = self._consumer(name)['last_run']
+            if last_run:
+                max_hours = consumer.get('max_interval_hours', DEFAULT_MAX_INTERVAL_HOURS)
+                left = (_utc(last_run) + timedelta(hours=max_hours) - now).total_seconds() / 60
+                minutes = min(minutes, max(left, MIN_PROBE_MINUTES))
+        return int(minutes)
+
+    def save(self):
+        self.store.put(STATE_KEY, json.dumps({
+            'probe_minutes': self.probe_minutes,
+            'checks': self.checks,
+            'consumers': self.consumers
+        }, indent=2).encode())
+
+
+def consumer_checks(name, consumer):
+    return consumer.get('checks', CONSUMER_CHECKS.get(name, []))
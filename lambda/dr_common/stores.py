@@ -0,0 +1,237 @@
+"""
+Small key/value object stores for state that outlives one invocation.
+
+open_store() takes either an s3://bucket/prefix URL (S3Store, for state
+that must survive across Lambda containers) or a local directory
+(LocalStore, for offline runs). Both offer the same get/put/delete/list
+interface over bytes; put(..., if_absent=True) is a create-only write that
+returns False when the key already exists, which is what callers use to
+make a step idempotent. get_tagged() also returns a tag of the version
+read (S3's ETag, a content hash locally), and put(..., if_match=tag)
+only replaces that version, returning False if the object was written or
+deleted since, so read-modify-write callers can re-read and try again.
+url() names an object for people to fetch.
+
+writer() streams one large object instead of building it in memory: a
+local file written under a temporary name, or an S3 multipart upload
+that sends a part each time PART_BYTES are buffered (a single PutObject
+if the object stays smaller). The object only appears once the writer is
+closed; abort() discards it.
+"""
+
+import hashlib
+import os
+import threading
+
+from botocore.exceptions import ClientError
+
+from dr_common.clients import get_client
+from dr_common.pagination import paginate
+
+# Buffered before each multipart upload part (S3's minimum part is 5 MB)
+PART_BYTES = 8 * 1024 * 1024
+
+
+class _FileWriter:
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.file = open(f"{path}.partial", 'wb')
+
+    def write(self, data):
+        self.file.write(data)
+
+    def close(self):
+        self.file.close()
+        os.replace(f"{self.path}.partial", self.path)
+
+    def abort(self):
+        self.file.close()
+        os.remove(f"{self.path}.partial")
+
+
+class _MultipartWriter:
+    def __init__(self, client, bucket, key, part_bytes=PART_BYTES):
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.part_bytes = part_bytes
+        self.buffer = bytearray()
+        self.upload_id = None
+        self.parts = []
+
+    def write(self, data):
+        self.buffer += data
+        if len(self.buffer) >= self.part_bytes:
+            self._upload_part()
+
+    def _upload_part(self):
+        if self.upload_id is None:
+            self.upload_id = self.client.create_multipart_upload(
+                Bucket=self.bucket, Key=self.key
+            )['UploadId']
+        number = len(self.parts) + 1
+        response = self.client.upload_part(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+            PartNumber=number, Body=bytes(self.buffer)
+        )
+        self.parts.append({'ETag': response['ETag'], 'PartNumber': number})
+        self.buffer.clear()
+
+    def close(self):
+        if self.upload_id is None:
+            self.client.put_object(Bucket=self.bucket, Key=self.key, Body=bytes(self.buffer))
+            return
+        if self.buffer:
+            self._upload_part()
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+            MultipartUpload={'Parts': self.parts}
+        )
+
+    def abort(self):
+        if self.upload_id is not None:
+            self.client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+
+
+def _content_tag(data):
+    return hashlib.md5(data).hexdigest()
+
+
+class LocalStore:
+    """Objects as files under a root directory"""
+
+    # Conditional writes compare and replace under this lock, so they are
+    # atomic within one process (offline runs); S3Store relies on S3
+    _lock = threading.Lock()
+
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, key):
+        return os.path.join(self.root, *key.split('/'))
+
+    def get(self, key):
+        """The object's bytes, or None if it does not exist"""
+        try:
+            with open(self._path(key), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def get_tagged(self, key):
+        """(bytes, tag) of the object, or (None, None) if it does not exist"""
+        data = self.get(key)
+        return data, _content_tag(data) if data is not None else None
+
+    def put(self, key, data, if_absent=False, if_match=None):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if if_match is not None:
+            with self._lock:
+                current = self.get(key)
+                if current is None or _content_tag(current) != if_match:
+                    return False
+                with open(f"{path}.partial", 'wb') as f:
+                    f.write(data)
+                os.replace(f"{path}.partial", path)
+            return True
+        try:
+            with open(path, 'xb' if if_absent else 'wb') as f:
+                f.write(data)
+        except FileExistsError:
+            return False
+        return True
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def url(self, key):
+        """Where a person can find the object"""
+        return self._path(key)
+
+    def writer(self, key):
+        """A streaming writer (write, close, abort) for one object"""
+        return _FileWriter(self._path(key))
+
+    def list(self, prefix=''):
+        """Sorted keys starting with prefix"""
+        keys = []
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                key = os.path.relpath(os.path.join(directory, name), self.root).replace(os.sep, '/')
+                if key.startswith(prefix):
+                    keys.append(key)
+        return sorted(keys)
+
+
+class S3Store:
+    """Objects under a prefix of an S3 bucket"""
+
+    def __init__(self, bucket, prefix='', client=None):
+        self.bucket = bucket
+        self.prefix = prefix.strip('/') + '/' if prefix.strip('/') else ''
+        self.client = client or get_client('s3')
+
+    def get(self, key):
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self.prefix + key)
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+                return None
+            raise
+        return response['Body'].read()
+
+    def get_tagged(self, key):
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self.prefix + key)
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+                return None, None
+            raise
+        return response['Body'].read(), response['ETag']
+
+    def put(self, key, data, if_absent=False, if_match=None):
+        params = {'IfNoneMatch': '*'} if if_absent else {}
+        if if_match is not None:
+            params = {'IfMatch': if_match}
+        try:
+            self.client.put_object(Bucket=self.bucket, Key=self.prefix + key, Body=data, **params)
+        except ClientError as e:
+            code = e.response['Error']['Code']
+            # 412: another writer created the key first, or replaced the
+            # version if_match named; 409: a concurrent conditional write
+            # won; 404: the version was deleted
+            if (if_absent or if_match is not None) and code in ('PreconditionFailed', '412'):
+                return False
+            if if_match is not None and code in ('ConditionalRequestConflict', '409', 'NoSuchKey', '404'):
+                return False
+            raise
+        return True
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self.prefix + key)
+
+    def url(self, key):
+        return f"s3://{self.bucket}/{self.prefix}{key}"
+
+    def writer(self, key):
+        return _MultipartWriter(self.client, self.bucket, self.prefix + key)
+
+    def list(self, prefix=''):
+        keys = []
+        for page in paginate(self.client, 'list_objects_v2', prefetch=0,
+                             Bucket=self.bucket, Prefix=self.prefix + prefix):
+            keys.extend(item['Key'][len(self.prefix):] for item in page.get('Contents', []))
+        return sorted(keys)
+
+
+def open_store(location):
+    """S3Store for an s3://bucket/prefix URL, otherwise a LocalStore"""
+    if location.startswith('s3://'):
+        bucket, _, prefix = location[len('s3://'):].partition('/')
+        return S3Store(bucket, prefix)
+    return LocalStore(location)
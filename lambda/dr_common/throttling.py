@@ -0,0 +1,193 @@
+"""
+Throttle-aware API rate limiting.
+
+One process-wide Limiter keeps a token bucket per (region, service,
+operation). Every call takes a token before it is sent; throttling
+responses halve that bucket's rate and successful calls grow it back
+additively (AIMD), so parallel scans converge on the rate AWS allows
+instead of bouncing between bursts and retry storms.
+"""
+
+import threading
+import time
+
+# Sustained calls per second to start from, by service (hyphenized service id)
+DEFAULT_RATES = {
+    'ec2': 20.0,
+    'rds': 10.0,
+    'cloudwatch': 50.0,
+    's3': 100.0,
+    'sns': 30.0,
+    'dlm': 5.0,
+    'ssm': 10.0,
+    'lambda': 10.0
+}
+FALLBACK_RATE = 10.0
+MIN_RATE = 0.5
+
+# Extra calls per second granted after each successful call
+RECOVERY_STEP = 0.1
+
+THROTTLE_CODES = {
+    'Throttling',
+    'ThrottlingException',
+    'ThrottledException',
+    'RequestLimitExceeded',
+    'RequestThrottled',
+    'RequestThrottledException',
+    'TooManyRequestsException',
+    'SlowDown',
+    'PriorRequestNotComplete'
+}
+
+
+def is_throttle(parsed):
+    """Whether a parsed botocore response is a throttling error"""
+    return bool(parsed) and parsed.get('Error', {}).get('Code') in THROTTLE_CODES
+
+
+class TokenBucket:
+    """Blocking token bucket with an adjustable refill rate"""
+
+    def __init__(self, rate, burst=None):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """Take one token, sleeping until one is available; returns seconds waited"""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def throttled(self):
+        with self.lock:
+            self._refill(time.monotonic())
+            self.rate = max(MIN_RATE, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+
+    def succeeded(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + RECOVERY_STEP)
+
+
+class Limiter:
+    """Token buckets and counters keyed by (region, service, operation)"""
+
+    def __init__(self, rates=None):
+        self.rates = dict(DEFAULT_RATES, **(rates or {}))
+        self.buckets = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    def _bucket(self, key):
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            with self.lock:
+                bucket = self.buckets.get(key)
+                if bucket is None:
+                    bucket = TokenBucket(self.rates.get(key[1], FALLBACK_RATE))
+                    self.buckets[key] = bucket
+                    self.counters[key] = {
+                        'calls': 0,
+                        'throttle_events': 0,
+                        'wait_seconds': 0.0
+                    }
+        return bucket
+
+    def acquire(self, key):
+        waited = self._bucket(key).acquire()
+        with self.lock:
+            counters = self.counters[key]
+            counters['calls'] += 1
+            counters['wait_seconds'] += waited
+        return waited
+
+    def throttled(self, key):
+        self._bucket(key).throttled()
+        with self.lock:
+            self.counters[key]['throttle_events'] += 1
+
+    def succeeded(self, key):
+        self._bucket(key).succeeded()
+
+    def reset_counters(self):
+        """Start counting afresh (buckets keep their learned rates)"""
+        with self.lock:
+            for counters in self.counters.values():
+                counters.update(calls=0, throttle_events=0, wait_seconds=0.0)
+
+    def stats(self):
+        """Counters and current rates for the report"""
+        with self.lock:
+            operations = {}
+            for key, counters in self.counters.items():
+                if not counters['calls']:
+                    continue
+                operations['/'.join(key)] = dict(
+                    counters,
+                    wait_seconds=round(counters['wait_seconds'], 3),
+                    rate=round(self.buckets[key].rate, 2)
+                )
+
+        return {
+            'throttle_events': sum(op['throttle_events'] for op in operations.values()),
+            'wait_seconds': round(sum(op['wait_seconds'] for op in operations.values()), 3),
+            'operations': operations
+        }
+
+
+limiter = Limiter()
+
+
+def _key(region, event_name):
+    # Event names look like "before-call.ec2.DescribeImages"
+    _, service, operation = event_name.split('.', 2)
+    return (region or 'global', service, operation)
+
+
+def install(client, shared=None):
+    """Route every call made by a boto3 client through the shared limiter"""
+    shared = shared or limiter
+    region = client.meta.region_name
+    events = client.meta.events
+
+    def before_call(event_name, context=None, **kwargs):
+        shared.acquire(_key(region, event_name))
+
+    def needs_retry(event_name, response=None, request_dict=None, **kwargs):
+        if response is not None and is_throttle(response[1]):
+            shared.throttled(_key(region, event_name))
+            if request_dict is not None:
+                request_dict['context']['throttle_attempts'] = \
+                    request_dict['context'].get('throttle_attempts', 0) + 1
+
+    def after_call(event_name, parsed=None, http_response=None, context=None, **kwargs):
+        key = _key(region, event_name)
+        if is_throttle(parsed):
+            # Responses served by a before-call hook never reach needs-retry
+            if not (context or {}).get('throttle_attempts'):
+                shared.throttled(key)
+        elif http_response is not None and http_response.status_code < 300:
+            shared.succeeded(key)
+
+    # register_first so the token is taken even when a stub answers the call
+    events.register_first('before-call.*.*', before_call, unique_id='dr-throttling-before-call')
+    events.register('needs-retry.*.*', needs_retry, unique_id='dr-throttling-needs-retry')
+    events.register('after-call.*.*', after_call, unique_id='dr-throttling-after-call')
+    return client
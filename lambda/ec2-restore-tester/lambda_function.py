@@ -1,9 +1,11 @@
-import boto3
 import json
 from datetime import datetime
 
-ec2_dr = boto3.client('ec2', region_name='us-west-2')
-sns_client = boto3.client('sns', region_name='us-east-1')
+from dr_common import breaker, catalog, discovery, instrumentation
+from dr_common.clients import get_client
+
+ec2_dr = get_client('ec2', region_name='us-west-2')
+sns_client = get_client('sns', region_name='us-east-1')
 
 def lambda_handler(event, context):
     """
@@ -15,6 +17,10 @@ def lambda_handler(event, context):
     
     test_id = f"ec2-restore-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
     
+    instrumentation.collector.reset()
+    breaker.registry.reset_counters()
+    cycle = discovery.Cycle.from_event(event)
+    
     report = {
         'test_id': test_id,
         'timestamp': datetime.now().isoformat(),
@@ -22,20 +28,35 @@ def lambda_handler(event, context):
     }
     
     try:
-        # Get latest AMI in DR region
-        amis = ec2_dr.describe_images(
-            Owners=['self'],
-            Filters=[{'Name': 'state', 'Values': ['available']}]
-        )
-        
-        if not amis['Images']:
-            raise Exception("No AMIs found in DR region")
+        # Get latest AMI in DR region, from a fresh recovery point catalog
+        # when there is one
+        points = catalog.open_catalog(config['catalog_store']) if config.get('catalog_store') else None
+        latest_point = None
+        if points is not None:
+            latest_point = catalog.lookup(
+                points, 'images', 'us-west-2',
+                max_age_hours=config.get('catalog_max_age_hours', catalog.DEFAULT_MAX_AGE_HOURS)
+            )
         
-        latest_ami = max(amis['Images'], key=lambda x: x['CreationDate'])
-        ami_id = latest_ami['ImageId']
+        if latest_point:
+            ami_id = latest_point['point_id']
+            ami_name = latest_point['name']
+            report['ami_source'] = 'catalog'
+        else:
+            amis = cycle.fetch(discovery.images('us-west-2', **discovery.AVAILABLE_IMAGES), ec2_dr)
+            
+            if not amis:
+                raise Exception("No AMIs found in DR region")
+            
+            latest_ami = max(amis, key=lambda x: x.created)
+            ami_id = latest_ami.image_id
+            ami_name = latest_ami.name
+            
+            if points is not None:
+                catalog.refresh(points, 'images', 'us-west-2', catalog.from_images(amis))
         
         report['ami_id'] = ami_id
-        report['ami_name'] = latest_ami['Name']
+        report['ami_name'] = ami_name
         
         # Get default VPC and subnet
         vpcs = ec2_dr.describe_vpcs(
@@ -100,6 +121,10 @@ def lambda_handler(event, context):
         if sns_topic_arn:
             send_notification(report, sns_topic_arn)
         
+        report['api_calls'] = instrumentation.collector.stats()
+        report['circuit_breakers'] = breaker.registry.stats()
+        report['discovery'] = cycle.stats()
+        
         print(json.dumps(report, indent=2, default=str))
         
         return {
@@ -113,6 +138,8 @@ def lambda_handler(event, context):
         
         report['status'] = 'failed'
         report['error'] = str(e)
+        report['api_calls'] = instrumentation.collector.stats()
+        report['circuit_breakers'] = breaker.registry.stats()
         
         if sns_topic_arn:
             sns_client.publish(
@@ -129,7 +156,7 @@ def lambda_handler(event, context):
 def store_test_resources(test_id, instance_id, sg_id):
     """Store test resource info for cleanup"""
     try:
-        ssm = boto3.client('ssm', region_name='us-east-1')
+        ssm = get_client('ssm', region_name='us-east-1')
         ssm.put_parameter(
             Name=f'/dr/test-resources/{test_id}',
             Value=json.dumps({
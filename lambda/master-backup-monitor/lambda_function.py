@@ -1,16 +1,58 @@
-import boto3
 import json
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+
+from dr_common import (
+    alerts, anomaly, breaker, dashboard, digest, discovery, fanout, instrumentation, memory, reports,
+    throttling
+)
+from dr_common.catalog import from_images, from_snapshots, open_catalog
+from dr_common.checkpoints import Sweep
+from dr_common.deadline import DEFAULT_RESERVE_SECONDS, Deadline
+from dr_common.history import TIME_COLUMN, History
+from dr_common.clients import get_client
+from dr_common.pagination import DEFAULT_PREFETCH, items
+from dr_common.records import ImageRecord, SnapshotRecord, project
+from dr_common.recovery_index import (
+    image_points, join_recovery_points, parse_image_date, rds_points
+)
+from dr_common.stores import open_store
+from dr_common.timeline import build_timeline, summarize
+
+CHECK_TITLES = {
+    'rds': 'RDS backup',
+    's3': 'S3 replication',
+    'ami': 'AMI backup'
+}
+
+# Columns the daily summary aggregates from the report history
+SUMMARY_METRICS = (
+    'rds.latest_snapshot_age_hours', 'rds.dr_rpo_hours', 'rds.primary_snapshots',
+    'rds.dr_snapshots', 'rds.missing_dr_copies',
+    's3.primary_objects', 's3.dr_objects', 's3.replication_difference',
+    'ami.latest_ami_age_hours', 'ami.dr_rpo_hours', 'ami.primary_amis',
+    'ami.dr_amis', 'ami.missing_dr_copies'
+)
+SUMMARY_FLAGS = (
+    'rds.backup_enabled', 's3.replication_enabled', 's3.versioning_enabled', 'ami.dlm_enabled'
+)
+
+# The summary is only built from history whose latest report is at most
+# this old (one 6-hourly run plus slack); otherwise the checks run live
+SUMMARY_MAX_AGE_HOURS = 7
+
+# Days of report history the anomaly detector scores the latest values against
+ANOMALY_HISTORY_DAYS = 10
 
 # Initialize AWS clients
-rds_primary = boto3.client('rds', region_name='us-east-1')
-rds_dr = boto3.client('rds', region_name='us-west-2')
-s3_client = boto3.client('s3')
-ec2_primary = boto3.client('ec2', region_name='us-east-1')
-ec2_dr = boto3.client('ec2', region_name='us-west-2')
-dlm_client = boto3.client('dlm', region_name='us-east-1')
-cloudwatch = boto3.client('cloudwatch', region_name='us-east-1')
-sns_client = boto3.client('sns', region_name='us-east-1')
+rds_primary = get_client('rds', region_name='us-east-1')
+rds_dr = get_client('rds', region_name='us-west-2')
+s3_client = get_client('s3')
+ec2_primary = get_client('ec2', region_name='us-east-1')
+ec2_dr = get_client('ec2', region_name='us-west-2')
+dlm_client = get_client('dlm', region_name='us-east-1')
+cloudwatch = get_client('cloudwatch', region_name='us-east-1')
+sns_client = get_client('sns', region_name='us-east-1')
+lambda_client = get_client('lambda')
 
 def lambda_handler(event, context):
     """
@@ -19,6 +61,10 @@ def lambda_handler(event, context):
     Sends comprehensive report via SNS
     """
     
+    # A shard of a fanned-out scan, invoked by this function itself
+    if 'fanout_shard' in event:
+        return fanout.handle(event['fanout_shard'])
+    
     config = event.get('config', {})
     db_instance_id = config.get('db_instance_id', 'dr-project-primary-db')
     primary_bucket = config.get('primary_bucket')
@@ -31,18 +77,115 @@ def lambda_handler(event, context):
         'status': 'healthy',
         'issues': [],
         'warnings': [],
-        'metrics': {}
+        'metrics': {},
+        'memory': {},
+        'checks': {},
+        'timed_out': []
     }
     
+    # Optional allocation tracing and bounded-memory mode
+    trace_memory = memory.enabled(config)
+    budget = memory.budget_from(config)
+    
+    # Rate limits and breaker states are learned across warm invocations;
+    # counters are per run
+    throttling.limiter.reset_counters()
+    breaker.registry.reset_counters()
+    instrumentation.collector.reset()
+    
+    # Listings the discovery orchestrator already made for this cycle
+    cycle = discovery.Cycle.from_event(event)
+    
+    # Checks share the invocation's remaining time; metrics and alerts are
+    # published from whatever finished, even if a check overruns
+    deadline = Deadline(
+        context,
+        config.get('deadline_reserve_seconds', DEFAULT_RESERVE_SECONDS),
+        config.get('check_budgets')
+    )
+    
+    # With a checkpoint store, long scans stop before the deadline and the
+    # sweep continues in a new invocation; only the last one reports
+    store = open_store(config['checkpoint_store']) if config.get('checkpoint_store') else None
+    
+    # Full listings also refresh the recovery point catalog the restore
+    # testers and the failover runbook read
+    catalog = open_catalog(config['catalog_store']) if config.get('catalog_store') else None
+    
+    # Every final report is kept for trend queries
+    history = History(open_store(config['history_store'])) if config.get('history_store') else None
+    
+    # Per-resource DR figures the dashboard views need, kept before the
+    # report sections drop them
+    dr_index = {} if config.get('dashboard_store') else None
+    
+    # With an alert store, issues are alerted when they open, as reminders
+    # and when they resolve, instead of on every run
+    tracker = alerts.Tracker(
+        open_store(config['alert_store']), 'master-backup-monitor',
+        config.get('alert_reminder_hours', alerts.DEFAULT_REMINDER_HOURS)
+    ) if config.get('alert_store') else None
+    scopes = {'rds': db_instance_id, 's3': primary_bucket, 'ami': instance_id}
+    
+    # The daily summary aggregates the last day of stored reports; only
+    # without recent history does it run the checks live
+    if event.get('send_summary', False) and history is not None and 'sweep' not in event:
+        summary = summary_from_history(history, config)
+        if summary is not None:
+            send_history_summary(summary, sns_topic_arn)
+            summary['api_calls'] = instrumentation.collector.stats()
+            print(json.dumps(summary, indent=2, default=str))
+            return {
+                'statusCode': 200,
+                'body': json.dumps(summary, default=str)
+            }
+    
+    # Optionally split the S3 listings into prefix shards run by child workers
+    fanout_config = config.get('fanout')
+    fan_out = None
+    
+    writer = None
     try:
+        if fanout_config:
+            fan_out = fanout.FanOut(fanout.executor_from(fanout_config, context),
+                                    fanout_config.get('results_store'))
+        
+        sweep = Sweep.open(store, event.get('sweep'))
+        if sweep is None:
+            print(f"Sweep {event['sweep']['id']} was already continued by another invocation")
+            return {
+                'statusCode': 200,
+                'body': json.dumps({'status': 'duplicate', 'sweep': event['sweep']})
+            }
+        
+        deadline.plan([
+            name for name in (
+                ['rds'] +
+                (['s3'] if primary_bucket and dr_bucket else []) +
+                (['ami'] if instance_id else [])
+            )
+            if name not in sweep.results
+        ])
+        
+        # With a report store, each section is streamed there once final
+        # and only a compact summary is logged and returned
+        if config.get('report_store'):
+            writer = reports.open_writer(config['report_store'], 'master-backup-monitor')
+        
         # ============================================
         # 1. CHECK RDS BACKUPS
         # ============================================
         print("Checking RDS backups...")
-        rds_status = check_rds_backups(db_instance_id)
-        report['rds'] = rds_status
+        rds_status = run_check(report, deadline, sweep, 'rds', trace_memory,
+                               check_rds_backups, db_instance_id, budget, sweep, cycle, catalog)
+        if rds_status:
+            report['rds'] = rds_status
+            if dr_index is not None:
+                dr_index['snapshots'] = dashboard.dr_rows(rds_status)
+            if writer is not None:
+                writer.detach(report, 'rds')
         
-        if rds_status['issues']:
+        if rds_status and rds_status['issues']:
             report['issues'].extend(rds_status['issues'])
             report['status'] = 'critical'
         
@@ -51,10 +194,15 @@ def lambda_handler(event, context):
         # ============================================
         if primary_bucket and dr_bucket:
             print("Checking S3 replication...")
-            s3_status = check_s3_replication(primary_bucket, dr_bucket)
-            report['s3'] = s3_status
+            s3_status = run_check(report, deadline, sweep, 's3', trace_memory,
+                                  check_s3_replication, primary_bucket, dr_bucket, budget, sweep,
+                                  fan_out, (fanout_config or {}).get('shards', fanout.DEFAULT_SHARDS), cycle)
+            if s3_status:
+                report['s3'] = s3_status
+                if writer is not None:
+                    writer.detach(report, 's3')
             
-            if s3_status['issues']:
+            if s3_status and s3_status['issues']:
                 report['issues'].extend(s3_status['issues'])
                 if report['status'] == 'healthy':
                     report['status'] = 'warning'
@@ -64,14 +212,70 @@ def lambda_handler(event, context):
         # ============================================
         if instance_id:
             print("Checking AMI backups...")
-            ami_status = check_ami_backups(instance_id)
-            report['ami'] = ami_status
+            ami_status = run_check(report, deadline, sweep, 'ami', trace_memory,
+                                   check_ami_backups, instance_id, budget, cycle, catalog)
+            if ami_status:
+                report['ami'] = ami_status
+                if dr_index is not None:
+                    dr_index['images'] = dashboard.dr_rows(ami_status)
+                if writer is not None:
+                    writer.detach(report, 'ami')
             
-            if ami_status['issues']:
+            if ami_status and ami_status['issues']:
                 report['issues'].extend(ami_status['issues'])
                 if report['status'] == 'healthy':
                     report['status'] = 'warning'
         
+        if fan_out is not None:
+            fan_out.executor.shutdown()
+        if catalog is not None:
+            save_catalog(catalog, report)
+        
+        # Suspended scans continue in the next invocation, which reports
+        if sweep.suspended:
+            if writer is not None:
+                writer.abort()
+            return continue_sweep(sweep, event, context, report)
+        if not sweep.finish():
+            if writer is not None:
+                writer.abort()
+            print(f"Sweep {sweep.id} was already reported by another invocation")
+            return {
+                'statusCode': 200,
+                'body': json.dumps({'status': 'duplicate', 'sweep': event.get('sweep')})
+            }
+        if sweep.enabled:
+            report['sweep'] = sweep.summary()
+        report['discovery'] = cycle.stats()
+        
+        # Missing sections leave the report incomplete
+        if report['timed_out'] and report['status'] == 'healthy':
+            report['status'] = 'warning'
+        
+        # Per-resource sizes and counts are stored with the history rather
+        # than reported, and scored against it
+        series = {}
+        for name in ('rds', 's3', 'ami'):
+            if report.get(name):
+                series.update(report[name].pop('series', {}))
+        if history is not None and series:
+            check_anomalies(history, report, series, config)
+        
+        report['throttling'] = throttling.limiter.stats()
+        report['api_calls'] = instrumentation.collector.stats()
+        report['circuit_breakers'] = breaker.registry.stats()
+        report['degraded_regions'] = [
+            key for key, state in report['circuit_breakers'].items() if state['state'] != breaker.CLOSED
+        ]
+        
+        # Calls into a degraded region were failed fast instead of retried
+        for key in report['degraded_regions']:
+            state = report['circuit_breakers'][key]
+            report['warnings'].append(
+                f"🔌 {key} circuit breaker {state['state'].replace('_', '-')} "
+                f"({state['last_failure']}); {state['rejected_calls']} calls failed fast"
+            )
+        
         # ============================================
         # 4. SEND CLOUDWATCH METRICS
         # ============================================
@@ -80,8 +284,14 @@ def lambda_handler(event, context):
         # ============================================
         # 5. SEND ALERTS IF ISSUES FOUND
         # ============================================
-        if report['issues'] or report['warnings']:
-            send_alert(report, sns_topic_arn)
+        notifications = alerts.due(tracker, report['issues'] + report['warnings'], scopes)
+        if notifications is None:
+            if report['issues'] or report['warnings']:
+                send_alert(report, sns_topic_arn, config=config)
+        else:
+            report['alerts'] = notifications
+            if notifications:
+                send_alert(report, sns_topic_arn, notifications, config)
         
         # ============================================
         # 6. SEND DAILY SUMMARY (if scheduled)
@@ -89,6 +299,21 @@ def lambda_handler(event, context):
         if event.get('send_summary', False):
             send_daily_summary(report, sns_topic_arn)
         
+        # ============================================
+        # 7. RECORD REPORT HISTORY
+        # ============================================
+        if history is not None:
+            record_history(history, report, series)
+        
+        # ============================================
+        # 8. PUBLISH DASHBOARD VIEWS
+        # ============================================
+        if dr_index is not None:
+            publish_dashboard(config['dashboard_store'], catalog, history, dr_index, report)
+        
+        if writer is not None:
+            return finish_report(writer, report)
+        
         print(json.dumps(report, indent=2, default=str))
         
         return {
@@ -99,8 +324,12 @@ def lambda_handler(event, context):
     except Exception as e:
         error_message = f"Error in master backup monitor: {str(e)}"
         print(error_message)
+        if writer is not None:
+            writer.abort()
         
-        if sns_topic_arn:
+        # A failing run resolves nothing and repeats only as reminders
+        notifications = alerts.due(tracker, [f"❌ {error_message}"], scopes, resolve=False)
+        if sns_topic_arn and notifications != []:
             sns_client.publish(
                 TopicArn=sns_topic_arn,
                 Subject='❌ Master Backup Monitor Error',
@@ -112,12 +341,98 @@ def lambda_handler(event, context):
             'body': json.dumps({'error': str(e)})
         }
 
-def check_rds_backups(db_instance_id):
+def finish_report(writer, report):
+    """Close the streamed report; log and return a compact summary pointing at it"""
+    try:
+        location = writer.close(report)
+    except Exception as e:
+        print(f"Error writing full report: {str(e)}")
+        writer.abort()
+        print(json.dumps(report, indent=2, default=str))
+        return {
+            'statusCode': 200,
+            'body': json.dumps(report, default=str)
+        }
+    
+    summary = reports.compact(report)
+    summary['report'] = {'location': location, 'bytes': writer.bytes, 'sections': len(writer.sections)}
+    print(json.dumps(summary, default=str))
+    
+    return {
+        'statusCode': 200,
+        'body': json.dumps(summary, default=str)
+    }
+
+def run_check(report, deadline, sweep, name, trace_memory, check, *args):
+    """Run one check within its deadline budget; None if it did not finish"""
+    if name in sweep.results:
+        # Finished by an earlier invocation of this sweep
+        report['checks'][name] = 'completed'
+        return sweep.results[name]
+    
+    seconds = deadline.budget(name)
+    with memory.profile(name, report['memory'], trace_memory):
+        status, reason = deadline.run(name, check, *args)
+    
+    if name in sweep.suspended:
+        report['checks'][name] = 'suspended'
+        return None
+    
+    if reason is None:
+        report['checks'][name] = 'completed'
+        sweep.complete(name, status)
+        return status
+    
+    report['checks'][name] = reason
+    report['timed_out'].append(name)
+    if reason == 'skipped':
+        report['issues'].append(
+            f"⏱️ {CHECK_TITLES[name]} check skipped: no time left before the Lambda timeout"
+        )
+    else:
+        report['issues'].append(
+            f"⏱️ {CHECK_TITLES[name]} check timed out after {seconds:.0f}s; its results are missing"
+        )
+    print(f"{CHECK_TITLES[name]} check {reason.replace('_', ' ')}")
+    return None
+
+def continue_sweep(sweep, event, context, report):
+    """Checkpoint the sweep and invoke this function again to resume it"""
+    marker = sweep.save()
+    if marker is None:
+        print(f"Sweep {sweep.id} was already continued by another invocation")
+        return {
+            'statusCode': 200,
+            'body': json.dumps({'status': 'duplicate', 'sweep': event.get('sweep')})
+        }
+    
+    lambda_client.invoke(
+        FunctionName=context.function_name,
+        InvocationType='Event',
+        Payload=json.dumps(dict(event, sweep=marker))
+    )
+    print(f"Sweep {sweep.id} suspended ({', '.join(sorted(sweep.suspended))}); "
+          f"continuing in invocation {marker['sequence'] + 1}")
+    
+    return {
+        'statusCode': 202,
+        'body': json.dumps({
+            'status': 'in_progress',
+            'sweep': marker,
+            'suspended': sorted(sweep.suspended),
+            'checks': report['checks']
+        })
+    }
+
+def check_rds_backups(db_instance_id, budget=None, sweep=None, cycle=None, catalog=None):
     """Check RDS backup status"""
     status = {
         'primary_snapshots': 0,
         'dr_snapshots': 0,
         'latest_snapshot_age_hours': None,
+        'dr_rpo_hours': None,
+        'dr_copy_lag_hours': None,
+        'missing_dr_copies': 0,
         'backup_enabled': False,
         'issues': []
     }
@@ -134,42 +449,98 @@ def check_rds_backups(db_instance_id):
         if not status['backup_enabled']:
             status['issues'].append("❌ RDS automated backups are disabled")
         
-        # Get snapshots from primary region
-        primary_snapshots = rds_primary.describe_db_snapshots(
-            DBInstanceIdentifier=db_instance_id
+        # Get snapshots from primary region (from the discovery cycle, or
+        # resuming a suspended scan)
+        sweep = sweep or Sweep()
+        cycle = cycle or discovery.Cycle()
+        scan = None
+        key = lambda x: (x.instance_id, x.created)
+        aggregate = memory.RecoveryPointAggregate()
+        source = cycle.get(discovery.snapshots('us-east-1', DBInstanceIdentifier=db_instance_id))
+        if source is None:
+            # Over budget, the scan checkpoints an aggregate of its committed
+            # pages instead of every record; a resumed scan carries on from it
+            scan = sweep.scan('rds', 'primary')
+            if scan.streaming:
+                aggregate = scan.stream(key)
+            source = scan.records(
+                rds_primary, 'describe_db_snapshots', 'DBSnapshots', SnapshotRecord,
+                DBInstanceIdentifier=db_instance_id
+            )
+        primary_snapshots = memory.retain(
+            source, aggregate, key, budget,
+            keep=scan is None or not scan.streaming,
+            on_drop=(lambda: scan.stream(key)) if scan is not None else None
         )
-        status['primary_snapshots'] = len(primary_snapshots['DBSnapshots'])
+        status['primary_snapshots'] = aggregate.count
         
         if status['primary_snapshots'] == 0:
             status['issues'].append("❌ No RDS snapshots found in primary region")
+        elif primary_snapshots is None:
+            # Memory budget crossed: report from the streaming aggregate only
+            status['streaming'] = True
+            latest = max(aggregate.latest.values(), default=None)
+            if latest is not None:
+                status['latest_snapshot_age_hours'] = round(
+                    (datetime.now(timezone.utc).timestamp() - latest) / 3600, 2
+                )
         else:
             # Check latest snapshot age
-            latest = max(primary_snapshots['DBSnapshots'], 
-                        key=lambda x: x['SnapshotCreateTime'])
-            
-            age = datetime.now(latest['SnapshotCreateTime'].tzinfo) - latest['SnapshotCreateTime']
-            status['latest_snapshot_age_hours'] = age.total_seconds() / 3600
-            
-            if status['latest_snapshot_age_hours'] > 48:
-                status['issues'].append(
-                    f"⚠️ Latest RDS snapshot is {status['latest_snapshot_age_hours']:.1f} hours old"
-                )
+            # (snapshots still being created have no create time yet)
+            timeline = summarize(build_timeline(
+                (x.instance_id, x.created) for x in primary_snapshots if x.created
+            ), sla_hours=48)
+            status['latest_snapshot_age_hours'] = timeline['fleet'].get('min_age_hours')
+            status['max_backup_gap_hours'] = max(
+                (r['max_gap_hours'] for r in timeline['resources'].values()), default=None
+            )
+            status['series'] = latest_series(
+                'rds.allocated_gb',
+                (x for x in primary_snapshots if x.status == 'available' and x.created),
+                lambda x: x.instance_id, lambda x: x.created, lambda x: x.allocated_storage
+            )
         
-        # Get snapshots from DR region
-        dr_snapshots = rds_dr.describe_db_snapshots()
-        dr_relevant = [s for s in dr_snapshots['DBSnapshots'] 
-                      if 'dr' in s['DBSnapshotIdentifier'].lower()]
-        status['dr_snapshots'] = len(dr_relevant)
+        if (status['latest_snapshot_age_hours'] is not None
+                and status['latest_snapshot_age_hours'] > 48):
+            status['issues'].append(
+                f"⚠️ Latest RDS snapshot is {status['latest_snapshot_age_hours']:.1f} hours old"
+            )
+        
+        # Join primary snapshots to their copies in the DR region
+        dr_snapshots = cycle.get(discovery.snapshots('us-west-2', DBInstanceIdentifier=db_instance_id))
+        if dr_snapshots is None:
+            dr_snapshots = sweep.scan('rds', 'dr').records(
+                rds_dr, 'describe_db_snapshots', 'DBSnapshots', SnapshotRecord,
+                DBInstanceIdentifier=db_instance_id
+            )
+        if primary_snapshots is None:
+            # Without the primary records only the copies can be counted
+            status['dr_snapshots'] = sum(1 for x in dr_snapshots if x.source)
+        else:
+            if catalog is not None:
+                dr_snapshots = list(dr_snapshots)
+                update_catalog(catalog, status, 'snapshots', {
+                    'us-east-1': primary_snapshots, 'us-west-2': dr_snapshots
+                }, from_snapshots, [db_instance_id])
+            primary, dr = rds_points(primary_snapshots, dr_snapshots)
+            index = join_recovery_points(primary, dr, datetime.now(timezone.utc))
+            apply_dr_index(status, index, db_instance_id)
+            status['dr_snapshots'] = index['copied_points']
         
         if status['dr_snapshots'] == 0:
             status['issues'].append("⚠️ No RDS snapshots found in DR region")
+        elif status['dr_rpo_hours'] is not None and status['dr_rpo_hours'] > 48:
+            status['issues'].append(
+                f"⚠️ Latest RDS snapshot copied to DR is {status['dr_rpo_hours']:.1f} hours old"
+            )
         
     except Exception as e:
         status['issues'].append(f"❌ Error checking RDS: {str(e)}")
     
     return status
 
-def check_s3_replication(primary_bucket, dr_bucket):
+def check_s3_replication(primary_bucket, dr_bucket, budget=None, sweep=None,
+                         fan_out=None, shards=fanout.DEFAULT_SHARDS, cycle=None):
     """Check S3 replication status"""
     status = {
         'replication_enabled': False,
@@ -196,19 +567,39 @@ def check_s3_replication(primary_bucket, dr_bucket):
         if not status['versioning_enabled']:
             status['issues'].append("❌ S3 versioning is disabled")
         
-        # Count objects
-        primary_objects = s3_client.list_objects_v2(Bucket=primary_bucket)
-        status['primary_objects'] = primary_objects.get('KeyCount', 0)
-        
-        dr_objects = s3_client.list_objects_v2(Bucket=dr_bucket)
-        status['dr_objects'] = dr_objects.get('KeyCount', 0)
+        # Count objects across every page of the listing; counting is
+        # already a streaming aggregate, so over budget only stop buffering pages
+        prefetch = 0 if budget is not None and budget.exceeded() else DEFAULT_PREFETCH
+        buckets = (('primary', primary_bucket), ('dr', dr_bucket))
+        complete = True
+        cycle = cycle or discovery.Cycle()
+        cached = [cycle.get(discovery.object_count(bucket)) for _, bucket in buckets]
+        if None not in cached:
+            for (name, _), count in zip(buckets, cached):
+                status[f'{name}_objects'] = count
+        elif fan_out is not None:
+            complete = count_objects_sharded(status, fan_out, shards, buckets)
+        else:
+            sweep = sweep or Sweep()
+            for name, bucket in buckets:
+                listing = sweep.scan('s3', name)
+                for page in listing.iter_pages(s3_client, 'list_objects_v2', prefetch=prefetch,
+                                               Bucket=bucket):
+                    listing.tally('objects', page.get('KeyCount', 0))
+                status[f'{name}_objects'] = listing.values.get('objects', 0)
         
         # Check for significant difference
         status['replication_difference'] = abs(
             status['primary_objects'] - status['dr_objects']
         )
         
-        if status['replication_difference'] > 10:
+        if complete:
+            status['series'] = {
+                f"s3.objects/{primary_bucket}": status['primary_objects'],
+                f"s3.objects/{dr_bucket}": status['dr_objects']
+            }
+        
+        if complete and status['replication_difference'] > 10:
             status['issues'].append(
                 f"⚠️ Large object count difference: "
                 f"Primary={status['primary_objects']}, DR={status['dr_objects']}"
@@ -219,12 +610,37 @@ def check_s3_replication(primary_bucket, dr_bucket):
     
     return status
 
-def check_ami_backups(instance_id):
+def count_objects_sharded(status, fan_out, shards, buckets):
+    """Count each bucket's objects by fanning prefix shards out to workers"""
+    planned = []
+    for name, bucket in buckets:
+        bucket_shards, status[f'{name}_objects'] = fanout.s3_prefix_shards(s3_client, bucket, shards)
+        planned.extend((name, shard) for shard in bucket_shards)
+    
+    results, errors, missing, stats = fan_out.run([shard for _, shard in planned])
+    for name, shard in planned:
+        if shard['id'] in results:
+            status[f'{name}_objects'] += results[shard['id']]['objects']
+    status['fanout'] = stats
+    
+    failed = len(errors) + len(missing)
+    if failed:
+        status['issues'].append(
+            f"❌ S3 object counts incomplete: {failed} of {stats['shards']} shards "
+            f"failed or did not report ({', '.join(sorted(errors) + missing)})"
+        )
+    return failed == 0
+
+def check_ami_backups(instance_id, budget=None, cycle=None, catalog=None):
     """Check AMI backup status"""
     status = {
         'primary_amis': 0,
         'dr_amis': 0,
+        'copied_amis': 0,
         'latest_ami_age_hours': None,
+        'dr_rpo_hours': None,
+        'dr_copy_lag_hours': None,
+        'missing_dr_copies': 0,
         'dlm_enabled': False,
         'issues': []
     }
@@ -239,47 +655,193 @@ def check_ami_backups(instance_id):
             status['issues'].append("❌ No enabled DLM policies found")
         
         # Get AMIs in primary region
-        primary_amis = ec2_primary.describe_images(
-            Owners=['self'],
-            Filters=[{'Name': 'state', 'Values': ['available']}]
+        cycle = cycle or discovery.Cycle()
+        source = cycle.get(discovery.images('us-east-1', **discovery.AVAILABLE_IMAGES))
+        if source is None:
+            source = project(items(
+                ec2_primary, 'describe_images', 'Images', **discovery.AVAILABLE_IMAGES
+            ), ImageRecord)
+        aggregate = memory.RecoveryPointAggregate()
+        primary_amis = memory.retain(
+            source, aggregate, lambda x: (x.resource_id, x.created), budget
         )
-        status['primary_amis'] = len(primary_amis['Images'])
+        status['primary_amis'] = aggregate.count
         
         if status['primary_amis'] == 0:
             status['issues'].append("❌ No AMIs found in primary region")
+        elif primary_amis is None:
+            # Memory budget crossed: report from the streaming aggregate only
+            status['streaming'] = True
+            now = datetime.now(timezone.utc)
+            ages = [
+                (now - parse_image_date(created)).total_seconds() / 3600
+                for created in aggregate.latest.values()
+            ]
+            status['latest_ami_age_hours'] = round(min(ages), 2)
+            status['stale_ami_resources'] = sum(1 for age in ages if age > 48)
         else:
-            # Check latest AMI age
-            latest = max(primary_amis['Images'], 
-                        key=lambda x: x['CreationDate'])
-            
-            creation_time = datetime.strptime(
-                latest['CreationDate'],
-                '%Y-%m-%dT%H:%M:%S.%fZ'
+            # Check latest AMI age across every backed-up instance
+            timeline = summarize(build_timeline(
+                (x.resource_id, x.created) for x in primary_amis
+            ), sla_hours=48)
+            status['latest_ami_age_hours'] = timeline['fleet']['min_age_hours']
+            status['stale_ami_resources'] = timeline['fleet']['stale_resources']
+            status['ami_age_percentiles'] = {
+                key: value for key, value in timeline['fleet'].items()
+                if key.startswith('p')
+            }
+            status['series'] = latest_series(
+                'ami.volume_gb', primary_amis,
+                lambda x: x.resource_id, lambda x: x.created, lambda x: x.volume_gb
             )
-            
-            age = datetime.utcnow() - creation_time
-            status['latest_ami_age_hours'] = age.total_seconds() / 3600
-            
-            if status['latest_ami_age_hours'] > 48:
-                status['issues'].append(
-                    f"⚠️ Latest AMI is {status['latest_ami_age_hours']:.1f} hours old"
-                )
         
-        # Get AMIs in DR region
-        dr_amis = ec2_dr.describe_images(
-            Owners=['self'],
-            Filters=[{'Name': 'state', 'Values': ['available']}]
-        )
-        status['dr_amis'] = len(dr_amis['Images'])
+        if status['latest_ami_age_hours'] is not None and status['latest_ami_age_hours'] > 48:
+            status['issues'].append(
+                f"⚠️ Latest AMI is {status['latest_ami_age_hours']:.1f} hours old"
+            )
+        
+        # Join primary AMIs to their copies in the DR region
+        dr_amis = cycle.get(discovery.images('us-west-2', **discovery.AVAILABLE_IMAGES))
+        if dr_amis is None:
+            dr_amis = project(items(
+                ec2_dr, 'describe_images', 'Images', **discovery.AVAILABLE_IMAGES
+            ), ImageRecord)
+        if primary_amis is None:
+            # Without the primary records only the copies can be counted
+            for x in dr_amis:
+                status['dr_amis'] += 1
+                status['copied_amis'] += 1 if x.source_image_id else 0
+        else:
+            dr_amis = list(dr_amis)
+            status['dr_amis'] = len(dr_amis)
+            if catalog is not None:
+                update_catalog(catalog, status, 'images', {
+                    'us-east-1': primary_amis, 'us-west-2': dr_amis
+                }, from_images)
+            primary, dr = image_points(primary_amis, dr_amis)
+            index = join_recovery_points(primary, dr, datetime.now(timezone.utc))
+            apply_dr_index(status, index, instance_id)
+            # DR AMIs traced back to a primary image; the rest are still
+            # counted in dr_amis
+            status['copied_amis'] = index['copied_points']
         
         if status['dr_amis'] == 0:
             status['issues'].append("⚠️ No AMIs found in DR region")
+        elif status['dr_rpo_hours'] is not None and status['dr_rpo_hours'] > 48:
+            status['issues'].append(
+                f"⚠️ Latest AMI copied to DR is {status['dr_rpo_hours']:.1f} hours old"
+            )
         
     except Exception as e:
         status['issues'].append(f"❌ Error checking AMIs: {str(e)}")
     
     return status
 
+def update_catalog(catalog, status, kind, listings, points, resources=None):
+    """Fold each region's complete listing into the recovery point catalog"""
+    try:
+        status['catalog'] = {
+            region: catalog.sync(kind, region, points(records), resources)
+            for region, records in listings.items()
+        }
+    except Exception as e:
+        print(f"Error updating recovery point catalog: {str(e)}")
+
+def save_catalog(catalog, report):
+    """Write back the catalog partitions this invocation synced"""
+    try:
+        catalog.save()
+    except Exception as e:
+        report['warnings'].append(f"⚠️ Recovery point catalog not saved: {str(e)}")
+
+def record_history(history, report, series=None):
+    """Append the report and its per-resource series to the report history"""
+    try:
+        extra = {f"series.{name}": value for name, value in (series or {}).items()}
+        report['history'] = {'partition': history.append(report, extra=extra)}
+    except Exception as e:
+        print(f"Error recording report history: {str(e)}")
+
+def publish_dashboard(location, catalog, history, dr_index, report):
+    """Render the custom widget views from the catalog and history just written"""
+    try:
+        report['dashboard'] = dashboard.publish(open_store(location), catalog, history, dr_index)
+    except Exception as e:
+        report['warnings'].append(f"⚠️ Dashboard views not published: {str(e)}")
+
+def summary_from_history(history, config):
+    """The last 24 hours of reports aggregated, or None if history cannot cover them"""
+    try:
+        summary = history.window(SUMMARY_METRICS, SUMMARY_FLAGS, hours=24)
+    except Exception as e:
+        print(f"Error reading report history: {str(e)}")
+        return None
+    
+    max_age_hours = config.get('summary_max_age_hours', SUMMARY_MAX_AGE_HOURS)
+    if summary is None or summary['latest_age_hours'] > max_age_hours:
+        print("No recent report history; running the checks for the daily summary")
+        return None
+    
+    summary['source'] = 'history'
+    return summary
+
+def check_anomalies(history, report, series, config):
+    """Flag series whose latest value deviates sharply from their history"""
+    try:
+        now = datetime.now(timezone.utc)
+        columns = history.query(
+            [], now - timedelta(days=config.get('anomaly_history_days', ANOMALY_HISTORY_DAYS)),
+            now, prefix='series.'
+        )
+        # The current values are the last column of every series
+        for name, value in series.items():
+            columns.setdefault(f"series.{name}", [None] * len(columns[TIME_COLUMN]))
+        for name, values in columns.items():
+            if name.startswith('series.'):
+                values.append(series.get(name[len('series.'):]))
+        
+        names, matrix = anomaly.series_matrix(columns, prefix='series.')
+        names, matrix = anomaly.with_changes(names, matrix, ['s3.objects/'])
+        anomalies = anomaly.detect(
+            names, matrix, threshold=config.get('anomaly_threshold', anomaly.DEFAULT_THRESHOLD)
+        )
+    except Exception as e:
+        print(f"Error checking for anomalies: {str(e)}")
+        return
+    
+    report['anomalies'] = [
+        {key: value for key, value in found.items() if key != 'index'} for found in anomalies
+    ]
+    for found in anomalies:
+        report['warnings'].append(
+            f"📈 Unusual {found['series']}: {found['value']:g} "
+            f"({'above' if found['direction'] == 'up' else 'below'} its median of "
+            f"{found['median']:g}, robust z-score {found['score']})"
+        )
+
+def latest_series(prefix, records, resource, created, value):
+    """Series name -> value of each resource's newest record"""
+    newest = {}
+    for record in records:
+        key = resource(record)
+        if key not in newest or created(record) > created(newest[key]):
+            newest[key] = record
+    return {f"{prefix}/{key}": value(record) for key, record in newest.items()}
+
+def apply_dr_index(status, index, resource_id):
+    """Copy cross-region RPO figures from a recovery point index into a check status"""
+    status['missing_dr_copies'] = len(index['missing_copies'])
+    status['missing_dr_copy_ids'] = [m['point_id'] for m in index['missing_copies'][:20]]
+    status['dr_resources'] = list(index['resources'].values())
+    
+    resource = index['resources'].get(resource_id)
+    if resource is None and len(index['resources']) == 1:
+        resource = next(iter(index['resources'].values()))
+    
+    if resource:
+        status['dr_rpo_hours'] = resource['dr_rpo_hours']
+        status['dr_copy_lag_hours'] = resource['latest_copy_lag_hours']
+
 def send_metrics_to_cloudwatch(report):
     """Send metrics to CloudWatch"""
     try:
@@ -311,6 +873,13 @@ def send_metrics_to_cloudwatch(report):
                     'Value': report['rds']['latest_snapshot_age_hours'],
                     'Unit': 'Hours'
                 })
+            
+            if report['rds'].get('dr_rpo_hours') is not None:
+                metrics.append({
+                    'MetricName': 'RDSDRRecoveryPointAge',
+                    'Value': report['rds']['dr_rpo_hours'],
+                    'Unit': 'None'
+                })
         
         # S3 metrics
         if 's3' in report:
@@ -346,6 +915,71 @@ def send_metrics_to_cloudwatch(report):
                     'Unit': 'Count'
                 }
             ])
+            
+            if report['ami'].get('dr_rpo_hours') is not None:
+                metrics.append({
+                    'MetricName': 'AMIDRRecoveryPointAge',
+                    'Value': report['ami']['dr_rpo_hours'],
+                    'Unit': 'None'
+                })
+        
+        # API calls
+        if 'api_calls' in report:
+            metrics.extend([
+                {
+                    'MetricName': 'APICallCount',
+                    'Value': report['api_calls']['calls'],
+                    'Unit': 'Count'
+                },
+                {
+                    'MetricName': 'APIRetryCount',
+                    'Value': report['api_calls']['retries'],
+                    'Unit': 'Count'
+                },
+                {
+                    'MetricName': 'APICallTime',
+                    'Value': report['api_calls']['total_ms'],
+                    'Unit': 'Milliseconds'
+                }
+            ])
+        
+        # API throttling
+        if 'throttling' in report:
+            metrics.extend([
+                {
+                    'MetricName': 'APIThrottleEvents',
+                    'Value': report['throttling']['throttle_events'],
+                    'Unit': 'Count'
+                },
+                {
+                    'MetricName': 'APIThrottleWaitTime',
+                    'Value': report['throttling']['wait_seconds'],
+                    'Unit': 'Seconds'
+                }
+            ])
+        
+        # Series flagged by the anomaly detector
+        if 'anomalies' in report:
+            metrics.append({
+                'MetricName': 'AnomaliesDetected',
+                'Value': len(report['anomalies']),
+                'Unit': 'Count'
+            })
+        
+        # Regions/services whose breaker is not closed
+        if 'degraded_regions' in report:
+            metrics.append({
+                'MetricName': 'OpenCircuitBreakers',
+                'Value': len(report['degraded_regions']),
+                'Unit': 'Count'
+            })
+        
+        # Checks that did not finish in time
+        metrics.append({
+            'MetricName': 'ChecksTimedOut',
+            'Value': len(report.get('timed_out', [])),
+            'Unit': 'Count'
+        })
         
         # Overall health
         metrics.append({
@@ -370,24 +1004,52 @@ def send_metrics_to_cloudwatch(report):
     except Exception as e:
         print(f"Error sending metrics: {str(e)}")
 
-def send_alert(report, sns_topic_arn):
-    """Send alert for issues"""
-    if not sns_topic_arn:
+def send_alert(report, sns_topic_arn, notifications=None, config=None):
+    """
+    Send one digest of the issues (or of the alert state changes given),
+    and each subsystem's part to its team's topic when alert_topics is set
+    """
+    config = config or {}
+    topics = config.get('alert_topics')
+    if not sns_topic_arn and not topics:
         return
     
     severity = "🚨 CRITICAL" if report['status'] == 'critical' else "⚠️ WARNING"
+    if notifications and all(n['event'] == 'resolved' for n in notifications):
+        severity = "✅ RESOLVED"
     
-    message = f"""
+    # Issues and warnings grouped by subsystem and severity
+    current = digest.Digest()
+    current.add_issues(report['issues'] + report['warnings'])
+    
+    changed = None
+    changes = ''
+    if notifications:
+        changed = digest.Digest()
+        changed.add_notifications(notifications)
+        changes = f"""
+{'='*50}
+ALERT CHANGES:
+{'='*50}
+
+{changed.render()}
+"""
+    
+    header = f"""
 {severity} Disaster Recovery Backup Alert
 
 Timestamp: {report['timestamp']}
 Overall Status: {report['status'].upper()}
-
+Timed Out Checks: {', '.join(report.get('timed_out', [])) or 'None'}
+Degraded Regions: {', '.join(report.get('degraded_regions', [])) or 'None'}
+"""
+    
+    message = f"""{header}{changes}
 {'='*50}
 ISSUES DETECTED:
 {'='*50}
 
-{chr(10).join(report['issues'])}
+{current.render()}
 
 {'='*50}
 BACKUP STATUS SUMMARY:
@@ -397,6 +1059,8 @@ RDS Backups:
   Primary Snapshots: {report.get('rds', {}).get('primary_snapshots', 'N/A')}
   DR Snapshots: {report.get('rds', {}).get('dr_snapshots', 'N/A')}
   Latest Snapshot Age: {report.get('rds', {}).get('latest_snapshot_age_hours', 'N/A')} hours
+  DR Recovery Point Age: {report.get('rds', {}).get('dr_rpo_hours', 'N/A')} hours
+  Snapshots Missing DR Copy: {report.get('rds', {}).get('missing_dr_copies', 'N/A')}
 
 S3 Replication:
   Primary Objects: {report.get('s3', {}).get('primary_objects', 'N/A')}
@@ -406,17 +1070,27 @@ S3 Replication:
 AMI Backups:
   Primary AMIs: {report.get('ami', {}).get('primary_amis', 'N/A')}
   DR AMIs: {report.get('ami', {}).get('dr_amis', 'N/A')}
+  DR Recovery Point Age: {report.get('ami', {}).get('dr_rpo_hours', 'N/A')} hours
   DLM Enabled: {report.get('ami', {}).get('dlm_enabled', 'N/A')}
 
 Action Required: Please investigate and resolve the issues above.
     """
     
+    # Digests over the SNS size limit are saved whole and sent as a pointer
+    store = open_store(config['digest_store']) if config.get('digest_store') else None
+    
     try:
-        sns_client.publish(
-            TopicArn=sns_topic_arn,
-            Subject=f'{severity} Backup Status Alert',
-            Message=message
-        )
+        if sns_topic_arn:
+            pointer = digest.publish(
+                sns_client, sns_topic_arn, f'{severity} Backup Status Alert', message, store
+            )
+            if pointer:
+                report['alert_digest'] = pointer
+        if topics:
+            report['team_alerts'] = digest.publish_teams(
+                sns_client, topics, changed or current, f'{severity} Backup Status Alert',
+                f"{header}\n", store
+            )
     except Exception as e:
         print(f"Error sending alert: {str(e)}")
 
@@ -436,6 +1110,8 @@ def send_daily_summary(report, sns_topic_arn):
 
 Date: {datetime.now().strftime('%Y-%m-%d')}
 Overall Status: {report['status'].upper()}
+Timed Out Checks: {', '.join(report.get('timed_out', [])) or 'None'}
+Degraded Regions: {', '.join(report.get('degraded_regions', [])) or 'None'}
 
 {'='*50}
 RDS DATABASE BACKUPS
@@ -445,6 +1121,7 @@ Primary Region Snapshots: {report.get('rds', {}).get('primary_snapshots', 0)}
 DR Region Snapshots: {report.get('rds', {}).get('dr_snapshots', 0)}
 Automated Backups: {'Enabled' if report.get('rds', {}).get('backup_enabled') else 'Disabled'}
 Latest Snapshot Age: {report.get('rds', {}).get('latest_snapshot_age_hours', 'N/A')} hours
+DR Recovery Point Age: {report.get('rds', {}).get('dr_rpo_hours', 'N/A')} hours
 
 {'='*50}
 S3 BUCKET REPLICATION
@@ -463,6 +1140,7 @@ Primary Region AMIs: {report.get('ami', {}).get('primary_amis', 0)}
 DR Region AMIs: {report.get('ami', {}).get('dr_amis', 0)}
 DLM Policies: {'Active' if report.get('ami', {}).get('dlm_enabled') else 'Inactive'}
 Latest AMI Age: {report.get('ami', {}).get('latest_ami_age_hours', 'N/A')} hours
+DR Recovery Point Age: {report.get('ami', {}).get('dr_rpo_hours', 'N/A')} hours
 
 {'='*50}
 
@@ -478,3 +1156,89 @@ Next summary report: Tomorrow at the same time.
         )
     except Exception as e:
         print(f"Error sending daily summary: {str(e)}")
+
+def send_history_summary(summary, sns_topic_arn):
+    """Send the daily summary email built from the last day of reports"""
+    if not sns_topic_arn:
+        return
+    
+    status_emoji = {
+        'healthy': '✅',
+        'warning': '⚠️',
+        'critical': '🚨'
+    }
+    metrics = summary['metrics']
+    latest = summary['latest']
+    
+    def span(column, unit=''):
+        values = metrics[column]
+        if values['latest'] is None:
+            return 'N/A'
+        return f"{values['latest']}{unit} (min {values['min']}{unit}, max {values['max']}{unit})"
+    
+    issues = [
+        f"{'🔴 open' if issue['open'] else '🟢 resolved'} after {issue['open_hours']}h "
+        f"({issue['reports']} reports): {issue['issue']}"
+        for issue in summary['issues']
+    ]
+    
+    message = f"""
+{status_emoji.get(summary['latest_status'], '❓')} Daily Disaster Recovery Backup Report
+
+Date: {datetime.now().strftime('%Y-%m-%d')}
+Overall Status: {(summary['latest_status'] or 'unknown').upper()}
+Worst Status (24h): {(summary['worst_status'] or 'unknown').upper()}
+Reports Aggregated: {summary['reports']} ({summary['from']} to {summary['to']})
+
+{'='*50}
+RDS DATABASE BACKUPS
+{'='*50}
+
+Primary Region Snapshots: {span('rds.primary_snapshots')}
+DR Region Snapshots: {span('rds.dr_snapshots')}
+Automated Backups: {'Enabled' if latest['rds.backup_enabled'] else 'Disabled'}
+Latest Snapshot Age: {span('rds.latest_snapshot_age_hours', 'h')}
+DR Recovery Point Age: {span('rds.dr_rpo_hours', 'h')}
+Missing DR Copies: {span('rds.missing_dr_copies')}
+
+{'='*50}
+S3 BUCKET REPLICATION
+{'='*50}
+
+Primary Bucket Objects: {span('s3.primary_objects')}
+DR Bucket Objects: {span('s3.dr_objects')}
+Replication Difference: {span('s3.replication_difference')}
+Replication Status: {'Enabled' if latest['s3.replication_enabled'] else 'Disabled'}
+Versioning: {'Enabled' if latest['s3.versioning_enabled'] else 'Disabled'}
+
+{'='*50}
+EC2 AMI BACKUPS
+{'='*50}
+
+Primary Region AMIs: {span('ami.primary_amis')}
+DR Region AMIs: {span('ami.dr_amis')}
+DLM Policies: {'Active' if latest['ami.dlm_enabled'] else 'Inactive'}
+Latest AMI Age: {span('ami.latest_ami_age_hours', 'h')}
+DR Recovery Point Age: {span('ami.dr_rpo_hours', 'h')}
+Missing DR Copies: {span('ami.missing_dr_copies')}
+
+{'='*50}
+ISSUES IN THE LAST 24 HOURS
+{'='*50}
+
+{chr(10).join(issues) or 'None'}
+
+{'='*50}
+
+All backup systems are being monitored continuously.
+Next summary report: Tomorrow at the same time.
+    """
+    
+    try:
+        sns_client.publish(
+            TopicArn=sns_topic_arn,
+            Subject=f'{status_emoji.get(summary["latest_status"], "❓")} Daily Backup Report - {datetime.now().strftime("%Y-%m-%d")}',
+            Message=message
+        )
+    except Exception as e:
+        print(f"Error sending daily summary: {str(e)}")
@@ -1,11 +1,13 @@
-import boto3
 import json
 from datetime import datetime
 import time
 
-rds_primary = boto3.client('rds', region_name='us-east-1')
-rds_dr = boto3.client('rds', region_name='us-west-2')
-sns_client = boto3.client('sns', region_name='us-east-1')
+from dr_common import breaker, catalog, discovery, instrumentation
+from dr_common.clients import get_client
+
+rds_primary = get_client('rds', region_name='us-east-1')
+rds_dr = get_client('rds', region_name='us-west-2')
+sns_client = get_client('sns', region_name='us-east-1')
 
 def lambda_handler(event, context):
     """
@@ -19,6 +21,10 @@ def lambda_handler(event, context):
     
     test_id = f"restore-test-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
     
+    instrumentation.collector.reset()
+    breaker.registry.reset_counters()
+    cycle = discovery.Cycle.from_event(event)
+    
     report = {
         'test_id': test_id,
         'timestamp': datetime.now().isoformat(),
@@ -35,25 +41,44 @@ def lambda_handler(event, context):
         })
         
         dr_client = rds_dr if test_region == 'us-west-2' else rds_primary
+        snapshot_region = dr_client.meta.region_name
+        
+        # A fresh recovery point catalog answers without listing every snapshot
+        points = catalog.open_catalog(config['catalog_store']) if config.get('catalog_store') else None
+        latest_point = None
+        if points is not None:
+            latest_point = catalog.lookup(
+                points, 'snapshots', snapshot_region, point_type='automated',
+                max_age_hours=config.get('catalog_max_age_hours', catalog.DEFAULT_MAX_AGE_HOURS)
+            )
         
-        snapshots = dr_client.describe_db_snapshots(
-            SnapshotType='automated'
-        )
-        
-        if not snapshots['DBSnapshots']:
-            raise Exception("No snapshots found for testing")
-        
-        # Get most recent available snapshot
-        available_snapshots = [s for s in snapshots['DBSnapshots'] 
-                             if s['Status'] == 'available']
-        
-        if not available_snapshots:
-            raise Exception("No available snapshots found")
-        
-        latest_snapshot = max(available_snapshots, 
-                            key=lambda x: x['SnapshotCreateTime'])
-        
-        snapshot_id = latest_snapshot['DBSnapshotIdentifier']
+        if latest_point:
+            snapshot_id = latest_point['point_id']
+            report['steps'][-1]['source'] = 'catalog'
+        else:
+            snapshots = cycle.fetch(
+                discovery.snapshots(snapshot_region, SnapshotType='automated'), dr_client
+            )
+            
+            if not snapshots:
+                raise Exception("No snapshots found for testing")
+            
+            # Get most recent available snapshot
+            available_snapshots = [s for s in snapshots 
+                                 if s.status == 'available']
+            
+            if not available_snapshots:
+                raise Exception("No available snapshots found")
+            
+            latest_snapshot = max(available_snapshots, 
+                                key=lambda x: x.created)
+            
+            snapshot_id = latest_snapshot.snapshot_id
+            
+            # The listing was complete for automated snapshots; keep the catalog current
+            if points is not None:
+                catalog.refresh(points, 'snapshots', snapshot_region,
+                                catalog.from_snapshots(snapshots), point_type='automated')
         
         report['steps'][-1]['status'] = 'completed'
         report['steps'][-1]['snapshot_id'] = snapshot_id
@@ -71,12 +96,12 @@ def lambda_handler(event, context):
         # Get VPC security group for the region
         if test_region == 'us-west-2':
             # Use default security group for testing
-            vpcs = boto3.client('ec2', region_name='us-west-2').describe_vpcs(
+            vpcs = get_client('ec2', region_name='us-west-2').describe_vpcs(
                 Filters=[{'Name': 'isDefault', 'Values': ['true']}]
             )
             vpc_id = vpcs['Vpcs'][0]['VpcId']
             
-            sgs = boto3.client('ec2', region_name='us-west-2').describe_security_groups(
+            sgs = get_client('ec2', region_name='us-west-2').describe_security_groups(
                 Filters=[
                     {'Name': 'vpc-id', 'Values': [vpc_id]},
                     {'Name': 'group-name', 'Values': ['default']}
@@ -126,6 +151,10 @@ def lambda_handler(event, context):
         # Store test instance ID for cleanup
         store_test_instance(test_instance_id, test_region)
         
+        report['api_calls'] = instrumentation.collector.stats()
+        report['circuit_breakers'] = breaker.registry.stats()
+        report['discovery'] = cycle.stats()
+        
         print(json.dumps(report, indent=2, default=str))
         
         return {
@@ -139,6 +168,8 @@ def lambda_handler(event, context):
         
         report['status'] = 'failed'
         report['error'] = str(e)
+        report['api_calls'] = instrumentation.collector.stats()
+        report['circuit_breakers'] = breaker.registry.stats()
         
         if sns_topic_arn:
             send_notification(report, sns_topic_arn, 'failed')
@@ -151,7 +182,7 @@ def lambda_handler(event, context):
 def store_test_instance(instance_id, region):
     """Store test instance info in parameter store for cleanup"""
     try:
-        ssm = boto3.client('ssm', region_name='us-east-1')
+        ssm = get_client('ssm', region_name='us-east-1')
         ssm.put_parameter(
             Name=f'/dr/test-instances/{instance_id}',
             Value=json.dumps({
@@ -1,9 +1,12 @@
-import boto3
 import json
 from datetime import datetime
 
-s3_client = boto3.client('s3')
-sns_client = boto3.client('sns')
+from dr_common import alerts, breaker, discovery, instrumentation
+from dr_common.clients import get_client
+from dr_common.stores import open_store
+
+s3_client = get_client('s3')
+sns_client = get_client('sns')
 
 def lambda_handler(event, context):
     """
@@ -14,6 +17,18 @@ def lambda_handler(event, context):
     dr_bucket = event['dr_bucket']
     sns_topic_arn = event['sns_topic_arn']
     
+    instrumentation.collector.reset()
+    breaker.registry.reset_counters()
+    cycle = discovery.Cycle.from_event(event)
+    
+    # Alert state shared with the master monitor, so a condition either
+    # reports is alerted once when it opens and once when it resolves
+    tracker = alerts.Tracker(
+        open_store(event['alert_store']), 's3-replication-monitor',
+        event.get('alert_reminder_hours', alerts.DEFAULT_REMINDER_HOURS)
+    ) if event.get('alert_store') else None
+    scopes = {'s3': primary_bucket}
+    
     issues = []
     
     try:
@@ -23,12 +38,9 @@ def lambda_handler(event, context):
         if not replication_config['ReplicationConfiguration']['Rules'][0]['Status'] == 'Enabled':
             issues.append("❌ Replication is not enabled")
         
-        # Get replication metrics
-        primary_objects = s3_client.list_objects_v2(Bucket=primary_bucket)
-        dr_objects = s3_client.list_objects_v2(Bucket=dr_bucket)
-        
-        primary_count = primary_objects.get('KeyCount', 0)
-        dr_count = dr_objects.get('KeyCount', 0)
+        # Get replication metrics across every page of each listing
+        primary_count = cycle.fetch(discovery.object_count(primary_bucket), s3_client)
+        dr_count = cycle.fetch(discovery.object_count(dr_bucket), s3_client)
         
         # Check if counts match (allowing for replication delay)
         if abs(primary_count - dr_count) > 5:
@@ -45,8 +57,15 @@ def lambda_handler(event, context):
             'issues': issues
         }
         
-        # Send alert if issues found
-        if issues:
+        # Send alert if issues found (or, with alert tracking, on changes)
+        notifications = alerts.due(tracker, issues, scopes)
+        if notifications is not None:
+            report['alerts'] = notifications
+        if notifications or (notifications is None and issues):
+            changes = ''
+            if notifications:
+                changes = f"\nAlert Changes:\n{chr(10).join(alerts.describe(notifications))}\n"
+            
             message = f"""
 S3 Replication Monitoring Alert
 
@@ -55,18 +74,23 @@ Primary Bucket: {primary_bucket}
 DR Bucket: {dr_bucket}
 
 Issues Detected:
-{chr(10).join(issues)}
-
+{chr(10).join(issues) or 'None'}
+{changes}
 Primary Object Count: {primary_count}
 DR Object Count: {dr_count}
             """
             
+            resolved = notifications and all(n['event'] == 'resolved' for n in notifications)
             sns_client.publish(
                 TopicArn=sns_topic_arn,
-                Subject='⚠️ S3 Replication Alert',
+                Subject='✅ S3 Replication Alert Resolved' if resolved else '⚠️ S3 Replication Alert',
                 Message=message
             )
         
+        report['api_calls'] = instrumentation.collector.stats()
+        report['circuit_breakers'] = breaker.registry.stats()
+        report['discovery'] = cycle.stats()
+        
         print(json.dumps(report, indent=2))
         
         return {
@@ -78,12 +102,13 @@ DR Object Count: {dr_count}
         error_message = f"Error monitoring replication: {str(e)}"
         print(error_message)
         
-        # Send error alert
-        sns_client.publish(
-            TopicArn=sns_topic_arn,
-            Subject='❌ S3 Replication Monitor Error',
-            Message=error_message
-        )
+        # A failing run resolves nothing and repeats only as reminders
+        if alerts.due(tracker, [f"❌ {error_message}"], scopes, resolve=False) != []:
+            sns_client.publish(
+                TopicArn=sns_topic_arn,
+                Subject='❌ S3 Replication Monitor Error',
+                Message=error_message
+            )
         
         return {
             'statusCode': 500,
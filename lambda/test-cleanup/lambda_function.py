@@ -1,11 +1,14 @@
-import boto3
 import json
 from datetime import datetime, timedelta
 
-ssm = boto3.client('ssm', region_name='us-east-1')
-rds_dr = boto3.client('rds', region_name='us-west-2')
-ec2_dr = boto3.client('ec2', region_name='us-west-2')
-sns_client = boto3.client('sns', region_name='us-east-1')
+from dr_common import breaker, instrumentation
+from dr_common.clients import get_client
+from dr_common.pagination import items
+
+ssm = get_client('ssm', region_name='us-east-1')
+rds_dr = get_client('rds', region_name='us-west-2')
+ec2_dr = get_client('ec2', region_name='us-west-2')
+sns_client = get_client('sns', region_name='us-east-1')
 
 def lambda_handler(event, context):
     """
@@ -15,6 +18,9 @@ def lambda_handler(event, context):
     sns_topic_arn = event.get('sns_topic_arn')
     max_age_hours = event.get('max_age_hours', 24)
     
+    instrumentation.collector.reset()
+    breaker.registry.reset_counters()
+    
     report = {
         'timestamp': datetime.now().isoformat(),
         'cleaned_resources': [],
@@ -34,6 +40,9 @@ def lambda_handler(event, context):
         if report['cleaned_resources'] and sns_topic_arn:
             send_cleanup_report(report, sns_topic_arn)
         
+        report['api_calls'] = instrumentation.collector.stats()
+        report['circuit_breakers'] = breaker.registry.stats()
+        
         print(json.dumps(report, indent=2, default=str))
         
         return {
@@ -54,9 +63,7 @@ def lambda_handler(event, context):
 def cleanup_rds_test_instances(cutoff_time, report):
     """Clean up old RDS test instances"""
     try:
-        instances = rds_dr.describe_db_instances()
-        
-        for instance in instances['DBInstances']:
+        for instance in items(rds_dr, 'describe_db_instances', 'DBInstances'):
             instance_id = instance['DBInstanceIdentifier']
             
             if not instance_id.startswith('dr-test-'):
@@ -84,14 +91,15 @@ def cleanup_ec2_test_resources(cutoff_time, report):
     """Clean up old EC2 test resources"""
     try:
         # Find test instances
-        instances = ec2_dr.describe_instances(
+        reservations = items(
+            ec2_dr, 'describe_instances', 'Reservations',
             Filters=[
                 {'Name': 'tag:Purpose', 'Values': ['RestoreTest']},
                 {'Name': 'instance-state-name', 'Values': ['running', 'stopped']}
             ]
         )
         
-        for reservation in instances['Reservations']:
+        for reservation in reservations:
             for instance in reservation['Instances']:
                 instance_id = instance['InstanceId']
                 launch_time = instance['LaunchTime']
@@ -108,11 +116,12 @@ def cleanup_ec2_test_resources(cutoff_time, report):
                         report['errors'].append(f"Failed to terminate {instance_id}: {str(e)}")
         
         # Clean up test security groups
-        sgs = ec2_dr.describe_security_groups(
+        sgs = list(items(
+            ec2_dr, 'describe_security_groups', 'SecurityGroups',
             Filters=[{'Name': 'group-name', 'Values': ['dr-test-sg-*']}]
-        )
+        ))
         
-        for sg in sgs['SecurityGroups']:
+        for sg in sgs:
             try:
                 ec2_dr.delete_security_group(GroupId=sg['GroupId'])
                 report['cleaned_resources'].append({
@@ -0,0 +1,46 @@
+"""
+List open DR alerts, or acknowledge one to stop its reminders.
+
+Usage:
+    python scripts/acknowledge-alert.py s3://<bucket>/<prefix>
+    python scripts/acknowledge-alert.py s3://<bucket>/<prefix> <fingerprint> [--hours 12] [--by oncall]
+
+The fingerprint is printed in brackets after each issue in the alert
+emails. An acknowledged alert still sends its resolution.
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda'))
+
+from dr_common.alerts import acknowledge, acknowledged, open_alerts
+from dr_common.stores import open_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('store', help='alert store (s3://bucket/prefix or a local directory)')
+    parser.add_argument('fingerprint', nargs='?', help='alert to acknowledge (default: list open alerts)')
+    parser.add_argument('--hours', type=float, help='suppress reminders for this long (default: until resolved)')
+    parser.add_argument('--by', default=os.environ.get('USER'), help='who acknowledged it')
+    args = parser.parse_args()
+
+    store = open_store(args.store)
+    if args.fingerprint is None:
+        for state in sorted(open_alerts(store), key=lambda state: state['opened']):
+            ack = ' (acknowledged)' if acknowledged(state) else ''
+            print(f"{state['fingerprint']}  since {state['opened']}  "
+                  f"[{', '.join(sorted(state['sources']))}]{ack}  {state['issue']}")
+        return
+
+    state = acknowledge(store, args.fingerprint, args.by, args.hours)
+    if state is None:
+        print(f"No open alert {args.fingerprint}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Acknowledged: {state['issue']}")
+
+
+if __name__ == '__main__':
+    main()
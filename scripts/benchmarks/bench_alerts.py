@@ -0,0 +1,97 @@
+"""
+Count the SNS alerts the monitors send over two days of a lasting outage,
+with and without alert state tracking.
+
+Usage: python scripts/benchmarks/bench_alerts.py [cycles] [reminder_hours]
+
+Each cycle runs the master, AMI and S3 replication monitors once, as the
+6-hourly schedule does. The DR region loses its AMIs for the first two
+thirds of the cycles and the DR bucket is 100 objects behind for all but
+the last, so both conditions are reported by two monitors each. Between
+cycles the stored alert state is aged by six hours to stand in for the
+wait.
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fake_aws import FakeAWS, activate, generate_fleet, handler_events
+from harness import FakeContext, load_handler
+
+from dr_common.stores import open_store
+
+MONITORS = ('master-backup-monitor', 'ami-monitor', 's3-replication-monitor')
+
+
+def age(store, hours):
+    """Shift every timestamp in the open alert state back by hours"""
+    def shift(value):
+        return (datetime.fromisoformat(value) - timedelta(hours=hours)).isoformat()
+
+    for key in store.list('alerts/open/'):
+        state = json.loads(store.get(key))
+        state['opened'] = shift(state['opened'])
+        state['last_seen'] = shift(state['last_seen'])
+        state['sources'] = {source: shift(seen) for source, seen in state['sources'].items()}
+        store.put(key, json.dumps(state).encode())
+
+
+def simulate(cycles, reminder_hours, alert_store=None):
+    backend = activate(FakeAWS())
+    fleet = generate_fleet(backend, db_snapshots=50, amis=100, s3_objects=5000)
+    events = handler_events(fleet)
+    events['master-backup-monitor']['send_summary'] = False
+    if alert_store:
+        events['master-backup-monitor']['config'].update(
+            alert_store=alert_store, alert_reminder_hours=reminder_hours
+        )
+        for name in ('ami-monitor', 's3-replication-monitor'):
+            events[name].update(alert_store=alert_store, alert_reminder_hours=reminder_hours)
+    handlers = {name: load_handler(name) for name in MONITORS}
+
+    dr_images = backend.images['us-west-2']
+    dr_bucket = backend.buckets[fleet['dr_bucket']].generated
+    primary_count = backend.buckets[fleet['primary_bucket']].generated.count
+
+    sent = []
+    for cycle in range(cycles):
+        backend.images['us-west-2'] = {} if cycle < cycles * 2 // 3 else dr_images
+        dr_bucket.count = primary_count - 100 if cycle < cycles - 1 else primary_count
+        published = len(backend.published)
+        for name in MONITORS:
+            with contextlib.redirect_stdout(io.StringIO()):
+                handlers[name].lambda_handler(events[name], FakeContext())
+        sent.append(backend.published[published:])
+        if alert_store:
+            age(open_store(alert_store), 6)
+    return sent
+
+
+def main():
+    cycles = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    reminder_hours = float(sys.argv[2]) if len(sys.argv) > 2 else 24
+
+    untracked = simulate(cycles, reminder_hours)
+    tracked = simulate(cycles, reminder_hours, tempfile.mkdtemp(prefix='dr-alerts-'))
+
+    print(f"{cycles} cycles, reminders every {reminder_hours:g}h")
+    for cycle, (before, after) in enumerate(zip(untracked, tracked)):
+        print(f"  +{cycle * 6:>3}h  untracked={len(before)}  tracked={len(after)}")
+        for message in after:
+            for line in message['Message'].splitlines():
+                if line.startswith(('🔴', '🔁', '🟢')):
+                    print(f"          {line}")
+    total_before = sum(map(len, untracked))
+    total_after = sum(map(len, tracked))
+    print(f"SNS messages: untracked={total_before}  tracked={total_after}")
+
+
+if __name__ == '__main__':
+    main()
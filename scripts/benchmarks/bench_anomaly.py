@@ -0,0 +1,91 @@
+"""
+Exercise the anomaly detector on its own and inside the master monitor.
+
+Usage: python scripts/benchmarks/bench_anomaly.py [series] [reports] [runs]
+
+First times detect() over a synthetic matrix (series x reports of noisy
+values with a few injected jumps). Then runs the monitor against the
+fake backend enough times to build a history, shrinks the primary bucket
+by 40% and the newest snapshot's AllocatedStorage by half (a mass
+deletion and a truncated database), and prints what the next run flags.
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import numpy as np
+
+from fake_aws import FakeAWS, activate, generate_fleet, handler_events
+from harness import FakeContext, load_handler
+
+from dr_common import anomaly
+
+
+def synthetic(series, reports):
+    rng = np.random.default_rng(7)
+    matrix = rng.normal(1000, 20, (series, reports))
+    injected = rng.choice(series, size=10, replace=False)
+    matrix[injected, -1] *= rng.choice([0.5, 1.6], size=10)
+    names = [f"series-{n}" for n in range(series)]
+
+    started = time.perf_counter()
+    found = anomaly.detect(names, matrix)
+    latest_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    everything = anomaly.detect(names, matrix, latest_only=False)
+    full_seconds = time.perf_counter() - started
+
+    hits = {names[n] for n in injected}
+    flagged = {a['series'] for a in found}
+    print(f"{series} series x {reports} reports: latest report scored in {latest_seconds * 1000:.1f}ms, "
+          f"whole history in {full_seconds * 1000:.0f}ms")
+    print(f"  injected={len(hits)}  flagged={len(flagged)}  caught={len(hits & flagged)}  "
+          f"false positives={len(flagged - hits)}  (whole history: {len(everything)} flags)")
+
+
+def run(module, event):
+    with contextlib.redirect_stdout(io.StringIO()):
+        response = module.lambda_handler(event, FakeContext())
+    return json.loads(response['body'])
+
+
+def monitor(runs):
+    backend = activate(FakeAWS())
+    fleet = generate_fleet(backend, db_snapshots=200, amis=500, s3_objects=20000)
+    module = load_handler('master-backup-monitor')
+    event = handler_events(fleet)['master-backup-monitor']
+    event['send_summary'] = False
+    event['config']['history_store'] = tempfile.mkdtemp(prefix='dr-history-')
+
+    for _ in range(runs):
+        body = run(module, event)
+    print(f"After {runs} normal runs: anomalies={body.get('anomalies')}")
+
+    bucket = backend.buckets[fleet['primary_bucket']]
+    bucket.generated.count = int(bucket.generated.count * 0.6)
+    newest = max(backend.db_snapshots['us-east-1'].values(), key=lambda s: s['SnapshotCreateTime'])
+    newest['AllocatedStorage'] //= 2
+
+    body = run(module, event)
+    for warning in body['warnings']:
+        print(f"  {warning}")
+
+
+def main():
+    series = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    reports = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    runs = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+
+    synthetic(series, reports)
+    monitor(runs)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Compare the restore testers picking their recovery point from a live
+listing with picking it from the recovery point catalog.
+
+Usage: python scripts/benchmarks/bench_catalog.py [snapshots] [amis] [lookups]
+
+The master monitor fills the catalog from its listings; the testers then
+run once against the live APIs and twice with the catalog (the first
+catalog run refreshes any resources the master does not list). The last
+part times latest() against max() over the same points.
+"""
+
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fake_aws import FakeAWS, activate, generate_fleet, handler_events
+from harness import FakeContext, load_handler
+
+from dr_common.catalog import Partition
+
+
+def run(name, event):
+    with contextlib.redirect_stdout(io.StringIO()):
+        response = load_handler(name).lambda_handler(event, FakeContext())
+    return response['statusCode'], json.loads(response['body'])
+
+
+def listing_calls(body):
+    operations = body['api_calls']['operations']
+    return sum(stats['calls'] for operation, stats in operations.items()
+               if operation.endswith(('/DescribeImages', '/DescribeDBSnapshots')))
+
+
+def picked(body):
+    return body.get('snapshot_id') or body.get('ami_id')
+
+
+def main():
+    snapshots = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    amis = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    lookups = int(sys.argv[3]) if len(sys.argv) > 3 else 1000
+
+    backend = activate(FakeAWS())
+    fleet = generate_fleet(backend, db_snapshots=snapshots, amis=amis, s3_objects=1000)
+    events = handler_events(fleet)
+    catalog_store = tempfile.mkdtemp(prefix='dr-catalog-')
+
+    master = events['master-backup-monitor']
+    master['config']['catalog_store'] = catalog_store
+    master['send_summary'] = False
+    status, body = run('master-backup-monitor', master)
+    print(f"master-backup-monitor    status={status}  api_calls={body['api_calls']['calls']}  "
+          f"catalog={body['rds'].get('catalog')} {body['ami'].get('catalog')}")
+
+    for name in ('rds-restore-tester', 'ec2-restore-tester'):
+        status, live = run(name, events[name])
+        print(f"{name:<24} live     status={status}  listing_calls={listing_calls(live):<4d} "
+              f"picked={picked(live)}")
+        for attempt in (1, 2):
+            # Test IDs are per second; one run per second keeps them unique
+            time.sleep(1.1)
+            event = json.loads(json.dumps(events[name]))
+            event['config']['catalog_store'] = catalog_store
+            status, body = run(name, event)
+            source = body.get('ami_source') or body['steps'][0].get('source', 'live')
+            print(f"{name:<24} catalog{attempt} status={status}  listing_calls={listing_calls(body):<4d} "
+                  f"picked={picked(body)}  source={source}  same={picked(body) == picked(live)}")
+
+    # Point-in-time lookups: bisect on the catalog vs max() over a list
+    partition = Partition('images', 'bench')
+    now = time.time()
+    points = [
+        (f"i-{n % 50:04d}", now - random.uniform(0, 365 * 86400), f"ami-{n:08x}", None, None)
+        for n in range(amis)
+    ]
+    partition.sync(points)
+    queries = [(f"i-{random.randrange(50):04d}", now - random.uniform(0, 365 * 86400))
+               for _ in range(lookups)]
+
+    started = time.perf_counter()
+    for resource_id, as_of in queries:
+        max((p for p in points if p[0] == resource_id and p[1] <= as_of),
+            key=lambda p: p[1], default=None)
+    scanned = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for resource_id, as_of in queries:
+        partition.latest(resource_id, as_of)
+    bisected = time.perf_counter() - started
+
+    print(f"{lookups} lookups over {amis} points: scan={scanned:.3f}s  "
+          f"catalog={bisected:.4f}s  speedup={scanned / bisected:.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Compare a per-resource dashboard widget built from live listings on every
+refresh with the dashboard-widget lambda serving the views the master
+monitor precomputes.
+
+Usage: python scripts/benchmarks/bench_dashboard.py [amis] [instances] [refreshes]
+
+The master monitor runs twice with catalog_store, history_store and
+dashboard_store set, publishing the views. Then each view is refreshed
+that many times: live (listing every snapshot and AMI in both regions,
+as a widget without the precomputed views would have to), and through
+the widget lambda, cold (a new container, reading the view from S3) and
+warm. API calls are counted from the fake backend's attempts.
+"""
+
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fake_aws import DR_REGION, PRIMARY_REGION, FakeAWS, activate, generate_fleet, handler_events
+from harness import FakeContext, load_handler
+
+from dr_common import dashboard
+from dr_common.clients import get_client
+from dr_common.pagination import items
+from dr_common.stores import open_store
+
+
+def calls(backend):
+    return sum(backend.attempts.values())
+
+
+def live_rows():
+    """What a live widget lists on each refresh"""
+    rows = 0
+    for region in (PRIMARY_REGION, DR_REGION):
+        rows += sum(1 for _ in items(get_client('rds', region_name=region), 'describe_db_snapshots',
+                                     'DBSnapshots'))
+        rows += sum(1 for _ in items(get_client('ec2', region_name=region), 'describe_images', 'Images',
+                                     Owners=['self']))
+    return rows
+
+
+def timed(backend, refreshes, run):
+    before = calls(backend)
+    seconds = []
+    for _ in range(refreshes):
+        started = time.perf_counter()
+        result = run()
+        seconds.append(time.perf_counter() - started)
+    return statistics.median(seconds) * 1000, (calls(backend) - before) / refreshes, result
+
+
+def main():
+    amis = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    instances = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    refreshes = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    backend = activate(FakeAWS())
+    fleet = generate_fleet(backend, db_snapshots=2000, amis=amis, ec2_instances=instances,
+                           s3_objects=100000)
+    root = tempfile.mkdtemp(prefix='dr-dashboard-')
+    backend.add_bucket('dr-dashboard')
+    location = 's3://dr-dashboard/dr'
+    event = handler_events(fleet)['master-backup-monitor']
+    event['send_summary'] = False
+    event['config'].update(catalog_store=f"{root}/catalog", history_store=f"{root}/history",
+                           dashboard_store=location)
+
+    monitor = load_handler('master-backup-monitor')
+    for _ in range(2):
+        with contextlib.redirect_stdout(io.StringIO()):
+            monitor.lambda_handler(event, FakeContext())
+    published = {view: len(dashboard.read(open_store(location), view).encode()) for view in dashboard.VIEWS}
+    print(f"{amis} AMIs over {instances} instances, {refreshes} refreshes per view; published "
+          + ', '.join(f"{view}={size // 1024}KB" for view, size in published.items()))
+
+    ms, per_refresh, rows = timed(backend, max(1, refreshes // 10), live_rows)
+    print(f"  live listings:   {ms:9.2f}ms per refresh  api_calls={per_refresh:.0f}  ({rows} rows listed)")
+
+    widget = load_handler('dashboard-widget')
+    for view in dashboard.VIEWS:
+        params = {'view': view, 'dashboard_store': location,
+                  'widgetContext': {'dashboardName': 'dr', 'width': 800, 'height': 400}}
+
+        def cold():
+            widget._cache.clear()
+            widget._stores.clear()
+            return widget.lambda_handler(params, FakeContext())
+
+        cold_ms, cold_calls, body = timed(backend, refreshes, cold)
+        warm_ms, warm_calls, _ = timed(backend, refreshes,
+                                       lambda: widget.lambda_handler(params, FakeContext()))
+        print(f"  widget {view:<12} cold={cold_ms:6.2f}ms  warm={warm_ms:6.3f}ms  "
+              f"api_calls cold={cold_calls:.0f} warm={warm_calls:.0f}  "
+              f"rows={body.count('<tr>') - body.count('<thead>')}")
+
+    print(f"  describe: {widget.lambda_handler({'describe': True}, FakeContext()).splitlines()[1]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Compare publishing fleet-wide alerts one SNS message per issue with
+digests: one grouped message, and batched per-team topic messages.
+
+Usage: python scripts/benchmarks/bench_digest.py [issues] [teams] [sns_latency_ms]
+
+Issues are spread over teams subsystems ("rds/team-00", ...) mapped onto
+two team topics. The digest of that many issues is larger than SNS
+accepts, so the single message is offloaded to a local store and sent as
+a pointer. The one-message-per-issue baseline publishes the first
+SAMPLE issues and scales up their time. Finally the master monitor is
+run with alert_topics and digest_store set, to show the same path end
+to end.
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fake_aws import FakeAWS, activate, generate_fleet, handler_events
+from harness import FakeContext, load_handler
+
+from dr_common import digest
+from dr_common.clients import get_client
+from dr_common.stores import open_store
+
+SAMPLE = 300
+
+
+def issues(count, teams):
+    for n in range(count):
+        check = ('rds', 's3', 'ami')[n % 3]
+        if n % 4 == 0:
+            text = f"❌ No {check.upper()} recovery point for resource-{n:05d} in the DR region"
+        else:
+            text = f"⚠️ Latest {check.upper()} backup of resource-{n:05d} is {30 + n % 20}.5 hours old"
+        yield text, f"{check}/team-{n % teams:02d}"
+
+
+def timed(backend, run):
+    published = len(backend.published)
+    started = time.perf_counter()
+    result = run()
+    return time.perf_counter() - started, len(backend.published) - published, result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    teams = int(sys.argv[2]) if len(sys.argv) > 2 else 24
+    latency_ms = float(sys.argv[3]) if len(sys.argv) > 3 else 20.0
+
+    backend = activate(FakeAWS(latency_ms={'default': 0, 'sns.Publish': latency_ms,
+                                           'sns.PublishBatch': latency_ms}))
+    topic = backend.add_topic('us-east-1', 'dr-alerts')
+    topics = {'default': backend.add_topic('us-east-1', 'dr-team-storage')}
+    for n in range(teams):
+        if n % 2:
+            subsystem = f"{('rds', 's3', 'ami')[n % 3]}/team-{n:02d}"
+            topics[subsystem] = backend.add_topic('us-east-1', 'dr-team-db')
+    sns = get_client('sns', region_name='us-east-1')
+    store = open_store(tempfile.mkdtemp(prefix='dr-digests-'))
+
+    found = list(issues(count, teams))
+    grouped = digest.Digest()
+    for text, subsystem in found:
+        grouped.add(text, subsystem)
+    message = grouped.render()
+
+    sample = found[:SAMPLE]
+    seconds, sent, _ = timed(backend, lambda: [
+        sns.publish(TopicArn=topic, Subject='⚠️ Backup Alert', Message=text) for text, _ in sample
+    ])
+    print(f"{count} issues, {teams} subsystems, SNS latency {latency_ms:g}ms")
+    print(f"  one publish per issue:  messages={count:<5} seconds={seconds * count / len(sample):.2f}  "
+          f"(scaled from {sent})")
+
+    seconds, sent, pointer = timed(backend, lambda: digest.publish(
+        sns, topic, '⚠️ Backup Alert', message, store
+    ))
+    inline = len(backend.published[-1]['Message'].encode())
+    print(f"  single digest:          messages={sent:<5} seconds={seconds:.2f}  "
+          f"digest={len(message.encode()) // 1024}KB  sent={inline // 1024}KB  offloaded to {pointer}")
+
+    seconds, sent, result = timed(backend, lambda: digest.publish_teams(
+        sns, topics, grouped, '⚠️ Backup Alert', store=store
+    ))
+    print(f"  per-team topics:        messages={sent:<5} seconds={seconds:.2f}  "
+          f"batches={result['batches']}  offloaded={result['offloaded']}  failed={len(result['failed'])}")
+
+    # End to end through the master monitor, with a condition to alert on
+    fleet = generate_fleet(backend, db_snapshots=50, amis=100, s3_objects=5000)
+    backend.images['us-west-2'] = {}
+    event = handler_events(fleet)['master-backup-monitor']
+    event['send_summary'] = False
+    event['config'].update(alert_topics={'ami': topics['default'], 'default': topic},
+                           digest_store=store.root)
+    published = len(backend.published)
+    with contextlib.redirect_stdout(io.StringIO()):
+        response = load_handler('master-backup-monitor').lambda_handler(event, FakeContext())
+    body = json.loads(response['body'])
+    print(f"  master monitor:         messages={len(backend.published) - published:<5} "
+          f"team_alerts={body.get('team_alerts')}")
+    for message in backend.published[published:]:
+        print(f"    {message['Subject']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Compare the API calls of the scheduled lambdas run on their own with a
+discovery-orchestrator cycle that lists shared recovery points once.
+
+Usage: python scripts/benchmarks/bench_discovery.py [snapshots] [amis] [objects]
+
+The orchestrator records its consumer invocations with the fake backend;
+they are replayed here through each handler with the payload it was sent,
+so the cycle total is the orchestrator's calls plus every consumer's.
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fake_aws import FakeAWS, activate, generate_fleet, handler_events
+from harness import FakeContext, load_handler
+
+
+def run(name, event):
+    with contextlib.redirect_stdout(io.StringIO()):
+        response = load_handler(name).lambda_handler(event, FakeContext())
+    body = json.loads(response['body'])
+    return response['statusCode'], body.get('api_calls', {}).get('calls', 0), body
+
+
+def main():
+    snapshots = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    amis = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    objects = int(sys.argv[3]) if len(sys.argv) > 3 else 100000
+
+    backend = activate(FakeAWS())
+    fleet = generate_fleet(backend, db_snapshots=snapshots, amis=amis, s3_objects=objects)
+    events = handler_events(fleet)
+    orchestrator = events['discovery-orchestrator']
+    for consumer in orchestrator['consumers'].values():
+        consumer['event'].pop('send_summary', None)
+
+    print("Standalone:")
+    standalone = 0
+    for name, consumer in orchestrator['consumers'].items():
+        status, calls, _ = run(name, consumer['event'])
+        standalone += calls
+        print(f"  {name:<24} status={status}  api_calls={calls}")
+
+    print("Discovery cycle:")
+    backend.invocations.clear()
+    status, total, body = run('discovery-orchestrator', orchestrator)
+    shared = sum(1 for node in body['nodes'].values() if node['uses'] > 1)
+    print(f"  {'discovery-orchestrator':<24} status={status}  api_calls={total}  "
+          f"nodes={len(body['nodes'])} (shared={shared})")
+    for invocation in list(backend.invocations):
+        name = invocation['FunctionName']
+        status, calls, body = run(name, json.loads(invocation['Payload']))
+        total += calls
+        print(f"  {name:<24} status={status}  api_calls={calls}  discovery={body.get('discovery')}")
+
+    print(f"Total API calls: standalone={standalone}  cycle={total}  "
+          f"saved={standalone - total} ({(standalone - total) / standalone:.0%})")
+
+
+if __name__ == '__main__':
+    main()
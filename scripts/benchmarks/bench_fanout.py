@@ -0,0 +1,52 @@
+"""
+Measure the master monitor's S3 check with its listings fanned out to
+local worker processes.
+
+Usage: python scripts/benchmarks/bench_fanout.py [objects] [latency_ms] [shards,...]
+
+Each run lists both buckets of a generated fleet against the fake
+backend; shards=0 is the unsharded listing. With the per-call latency
+dominating, check time should fall roughly in proportion to the shard
+count until process start-up and planning take over.
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fake_aws import FakeAWS, activate, generate_fleet, handler_events
+from harness import FakeContext, load_handler
+
+
+def main():
+    objects = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    latency_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 40.0
+    counts = [int(n) for n in sys.argv[3].split(',')] if len(sys.argv) > 3 else [0, 1, 2, 4, 8]
+
+    backend = activate(FakeAWS(latency_ms={'default': 1, 's3.ListObjectsV2': latency_ms}))
+    fleet = generate_fleet(backend, db_snapshots=10, amis=10, s3_objects=objects)
+    module = load_handler('master-backup-monitor')
+
+    baseline = None
+    for shards in counts:
+        event = handler_events(fleet)['master-backup-monitor']
+        event['send_summary'] = False
+        if shards:
+            event['config']['fanout'] = {'executor': 'local', 'shards': shards, 'processes': 2 * shards}
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            response = module.lambda_handler(event, FakeContext())
+        body = json.loads(response['body'])
+        seconds = body['memory']['s3']['seconds']
+        baseline = baseline or seconds
+        print(f"shards={shards:<3d} s3 check={seconds:7.2f}s  speedup={baseline / seconds:5.1f}x  "
+              f"objects={body['s3']['primary_objects']}/{body['s3']['dr_objects']}  "
+              f"workers={body['s3'].get('fanout', {}).get('shards', 0)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Time trend queries over the master monitor's report history.
+
+Usage: python scripts/benchmarks/bench_history.py [days] [reports_per_day] [s3_latency_ms]
+
+Takes one real report from a run against the fake backend, appends
+varied copies of it for the given number of days to a local history and
+to one in a fake S3 bucket (with per-request latency), then times a
+30-day two-column query and a 90-day daily trend on each.
+"""
+
+import contextlib
+import copy
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fake_aws import FakeAWS, activate, generate_fleet, handler_events
+from harness import FakeContext, load_handler
+
+from dr_common.history import History
+from dr_common.stores import LocalStore, S3Store
+
+
+def sample_report():
+    event = handler_events(generate_fleet(activate(FakeAWS()), db_snapshots=50, amis=100,
+                                          s3_objects=100))['master-backup-monitor']
+    event['send_summary'] = False
+    with contextlib.redirect_stdout(io.StringIO()):
+        response = load_handler('master-backup-monitor').lambda_handler(event, FakeContext())
+    return json.loads(response['body'])
+
+
+def fill(history, report, days, per_day, end):
+    started = time.perf_counter()
+    for n in range(days * per_day):
+        when = end - timedelta(hours=24 / per_day * (days * per_day - n))
+        row = copy.deepcopy(report)
+        row['rds']['latest_snapshot_age_hours'] = round(random.uniform(0, 30), 2)
+        row['s3']['replication_difference'] = random.randrange(20)
+        history.append(row, when)
+    return time.perf_counter() - started
+
+
+def timed(function):
+    started = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - started
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 120
+    per_day = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    latency_ms = float(sys.argv[3]) if len(sys.argv) > 3 else 20.0
+
+    report = sample_report()
+    end = datetime.now(timezone.utc)
+
+    backend = activate(FakeAWS(latency_ms={'default': 0, 's3.GetObject': latency_ms,
+                                           's3.PutObject': latency_ms}))
+    backend.add_bucket('dr-history')
+    stores = {
+        'local': LocalStore(tempfile.mkdtemp(prefix='dr-history-')),
+        f's3 ({latency_ms:.0f}ms)': S3Store('dr-history', 'reports')
+    }
+
+    for name, store in stores.items():
+        history = History(store)
+        seconds = fill(history, report, days, per_day, end)
+        month, month_seconds = timed(lambda: history.query(
+            ['rds.latest_snapshot_age_hours', 's3.replication_difference'], end - timedelta(days=30), end
+        ))
+        trend, trend_seconds = timed(lambda: history.trend('rds.latest_snapshot_age_hours', 90, end))
+        print(f"{name:<12} appended {days * per_day} reports in {seconds:6.2f}s  "
+              f"30-day query: {len(month['recorded_at'])} rows in {month_seconds * 1000:6.1f}ms  "
+              f"90-day trend: {len(trend)} days in {trend_seconds * 1000:6.1f}ms")
+
+    partition = stores['local'].list('history/')[-1]
+    print(f"Partition size: {len(stores['local'].get(partition))} bytes for {per_day} reports "
+          f"({len(json.dumps(report))} bytes each uncompressed)")
+
+
+if __name__ == '__main__':
+    main()
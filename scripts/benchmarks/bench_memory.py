@@ -0,0 +1,54 @@
+"""
+Peak memory of the snapshot scan in full versus bounded-memory mode.
+
+Usage: python scripts/benchmarks/bench_memory.py [budget_mb] [sizes...]
+
+Full mode keeps every SnapshotRecord for the DR cross-reference; bounded
+mode crosses the budget, drops them and keeps only the per-resource
+aggregate, so its peak should stay near the budget regardless of size.
+"""
+
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'lambda'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from bench_records import items, snapshot_pages
+from dr_common import memory
+from dr_common.records import SnapshotRecord, project
+
+DEFAULT_SIZES = [10000, 100000, 1000000]
+
+
+def scan(count, budget_mb=None):
+    """Run the RDS retain/aggregate scan; returns (peak bytes, streamed)"""
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    budget = memory.Budget(int(budget_mb * 1048576)) if budget_mb else None
+
+    aggregate = memory.RecoveryPointAggregate()
+    kept = memory.retain(
+        project(items(snapshot_pages(count), 'DBSnapshots'), SnapshotRecord),
+        aggregate, lambda x: (x.instance_id, x.created), budget
+    )
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    return peak, kept is None
+
+
+def main():
+    budget_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 8
+    sizes = [int(arg) for arg in sys.argv[2:]] or DEFAULT_SIZES
+
+    for count in sizes:
+        full, _ = scan(count)
+        bounded, streamed = scan(count, budget_mb)
+        print(f"{count:>9} snapshots  full={full / 1e6:8.1f} MB  "
+              f"bounded({budget_mb:g} MB)={bounded / 1e6:8.1f} MB  "
+              f"{'streaming' if streamed else 'kept all records'}")
+
+
+if __name__ == '__main__':
+    main()
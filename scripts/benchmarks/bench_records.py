@@ -0,0 +1,192 @@
+"""
+Measure retained memory of raw boto3 items versus compact records.
+
+Usage: python scripts/benchmarks/bench_records.py [snapshots] [images] [objects]
+
+Exits non-zero if a compact layout does not shrink retained memory by at
+least 10x.
+"""
+
+import os
+import sys
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'lambda'))
+
+from dr_common.records import ImageRecord, ObjectColumns, SnapshotRecord, project
+
+ACCOUNT = '123456789012'
+MIN_REDUCTION = 10
+
+
+def snapshot_pages(count, page_size=100):
+    """describe_db_snapshots pages shaped like real responses"""
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    for start in range(0, count, page_size):
+        items = []
+        for i in range(start, min(start + page_size, count)):
+            created = base + timedelta(hours=i)
+            snapshot_id = f'rds:dr-project-primary-db-{i:08d}'
+            items.append({
+                'DBSnapshotIdentifier': snapshot_id,
+                'DBInstanceIdentifier': f'db-{i % 50:04d}',
+                'SnapshotCreateTime': created,
+                'Engine': 'mysql',
+                'AllocatedStorage': 20,
+                'Status': 'available',
+                'Port': 3306,
+                'AvailabilityZone': 'us-east-1a',
+                'VpcId': 'vpc-0123456789abcdef0',
+                'InstanceCreateTime': base,
+                'MasterUsername': 'admin',
+                'EngineVersion': '8.0.35',
+                'LicenseModel': 'general-public-license',
+                'SnapshotType': 'automated',
+                'OptionGroupName': 'default:mysql-8-0',
+                'PercentProgress': 100,
+                'StorageType': 'gp2',
+                'Encrypted': True,
+                'KmsKeyId': f'arn:aws:kms:us-east-1:{ACCOUNT}:key/{i:032x}',
+                'DBSnapshotArn': f'arn:aws:rds:us-east-1:{ACCOUNT}:snapshot:{snapshot_id}',
+                'IAMDatabaseAuthenticationEnabled': False,
+                'ProcessorFeatures': [],
+                'DbiResourceId': f'db-{i:026X}',
+                'TagList': [
+                    {'Key': 'Project', 'Value': 'DisasterRecovery'},
+                    {'Key': 'Environment', 'Value': 'production'},
+                    {'Key': 'Owner', 'Value': f'team-{i % 7}'}
+                ],
+                'OriginalSnapshotCreateTime': created,
+                'SnapshotTarget': 'region',
+                'StorageThroughput': 0,
+                'DedicatedLogVolume': False
+            })
+        yield {'DBSnapshots': items}
+
+
+def image_pages(count, page_size=100):
+    """describe_images pages shaped like real responses"""
+    base = datetime(2026, 1, 1)
+    for start in range(0, count, page_size):
+        items = []
+        for i in range(start, min(start + page_size, count)):
+            created = (base + timedelta(hours=i)).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+            items.append({
+                'Architecture': 'x86_64',
+                'CreationDate': created,
+                'ImageId': f'ami-{i:017x}',
+                'ImageLocation': f'{ACCOUNT}/dr-backup-{i}',
+                'ImageType': 'machine',
+                'Public': False,
+                'OwnerId': ACCOUNT,
+                'PlatformDetails': 'Linux/UNIX',
+                'UsageOperation': 'RunInstances',
+                'State': 'available',
+                'BlockDeviceMappings': [
+                    {
+                        'DeviceName': f'/dev/sd{chr(97 + d)}',
+                        'Ebs': {
+                            'DeleteOnTermination': True,
+                            'SnapshotId': f'snap-{i:08x}{d:09x}',
+                            'VolumeSize': 8,
+                            'VolumeType': 'gp3',
+                            'Encrypted': True
+                        }
+                    } for d in range(3)
+                ],
+                'Description': f'Created for policy: policy-0123456789abcdef0 schedule: DailyAMIBackup',
+                'EnaSupport': True,
+                'Hypervisor': 'xen',
+                'Name': f'dr-backup-{i}',
+                'RootDeviceName': '/dev/xvda',
+                'RootDeviceType': 'ebs',
+                'SriovNetSupport': 'simple',
+                'Tags': [
+                    {'Key': 'CreatedBy', 'Value': 'DLM'},
+                    {'Key': 'Type', 'Value': 'AutomatedBackup'},
+                    {'Key': 'Backup', 'Value': 'daily'},
+                    {'Key': 'instance-id', 'Value': f'i-{i % 200:017x}'},
+                    {'Key': 'aws:dlm:lifecycle-policy-id', 'Value': 'policy-0123456789abcdef0'},
+                    {'Key': 'aws:dlm:lifecycle-schedule-name', 'Value': 'DailyAMIBackup'}
+                ],
+                'VirtualizationType': 'hvm',
+                'BootMode': 'uefi-preferred'
+            })
+        yield {'Images': items}
+
+
+def object_pages(count, page_size=1000):
+    """list_objects_v2 pages shaped like real responses"""
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    for start in range(0, count, page_size):
+        items = []
+        for i in range(start, min(start + page_size, count)):
+            items.append({
+                'Key': f'data/{i % 97:02d}/{i:012d}.json',
+                'LastModified': base + timedelta(seconds=i),
+                'ETag': f'"{i:032x}"',
+                'ChecksumAlgorithm': ['CRC64NVME'],
+                'ChecksumType': 'FULL_OBJECT',
+                'Size': 1024 + i % 4096,
+                'StorageClass': 'STANDARD'
+            })
+        yield {'Contents': items, 'KeyCount': len(items)}
+
+
+def items(pages, result_key):
+    for page in pages:
+        for item in page[result_key]:
+            yield item
+
+
+def retained(build):
+    """Bytes still allocated after build() returns its result"""
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    result = build()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current - baseline, peak - baseline
+
+
+def compare(label, raw_build, compact_build):
+    raw, raw_peak = retained(raw_build)
+    compact, compact_peak = retained(compact_build)
+    reduction = raw / compact if compact else float('inf')
+    print(f"{label:<28} raw={raw / 1e6:9.1f} MB  compact={compact / 1e6:8.1f} MB  "
+          f"reduction={reduction:6.1f}x  (peak {raw_peak / 1e6:.1f} / {compact_peak / 1e6:.1f} MB)")
+    return reduction
+
+
+def main():
+    snapshots = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    images = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    objects = int(sys.argv[3]) if len(sys.argv) > 3 else 1000000
+
+    reductions = [
+        compare(
+            f'{snapshots} RDS snapshots',
+            lambda: list(items(snapshot_pages(snapshots), 'DBSnapshots')),
+            lambda: list(project(items(snapshot_pages(snapshots), 'DBSnapshots'), SnapshotRecord))
+        ),
+        compare(
+            f'{images} AMIs',
+            lambda: list(items(image_pages(images), 'Images')),
+            lambda: list(project(items(image_pages(images), 'Images'), ImageRecord))
+        ),
+        compare(
+            f'{objects} S3 objects',
+            lambda: list(items(object_pages(objects), 'Contents')),
+            lambda: ObjectColumns().extend(items(object_pages(objects), 'Contents'))
+        )
+    ]
+
+    if min(reductions) < MIN_REDUCTION:
+        print(f"FAIL: expected at least {MIN_REDUCTION}x reduction")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Compare the master monitor printing and returning its whole report with
+streaming it to a report store and returning a compact summary.
+
+Usage: python scripts/benchmarks/bench_reports.py [amis] [instances]
+
+AMIs are spread over that many instances, so the AMI section carries one
+recovery point entry per instance. For each mode this prints the bytes
+logged, the response body size against the 6 MB Lambda limit, the peak
+traced memory of the run and, when streamed, the full report's size and
+how it was uploaded (a local file, or S3 multipart parts).
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fake_aws import FakeAWS, activate, generate_fleet, handler_events
+from harness import FakeContext, load_handler
+
+from dr_common.stores import open_store
+
+RESPONSE_LIMIT = 6 * 1024 * 1024
+
+
+def parts(backend):
+    return sum(count for (_, service, operation), count in backend.attempts.items()
+               if service == 's3' and operation == 'UploadPart')
+
+
+def run(module, event):
+    output = io.StringIO()
+    tracemalloc.start()
+    with contextlib.redirect_stdout(output):
+        response = module.lambda_handler(event, FakeContext())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return response, len(output.getvalue().encode()), peak
+
+
+def main():
+    amis = int(sys.argv[1]) if len(sys.argv) > 1 else 80000
+    instances = int(sys.argv[2]) if len(sys.argv) > 2 else 40000
+
+    backend = activate(FakeAWS())
+    fleet = generate_fleet(backend, db_snapshots=200, amis=amis, ec2_instances=instances,
+                           s3_objects=5000)
+    backend.add_bucket('dr-reports')
+    module = load_handler('master-backup-monitor')
+
+    print(f"{amis} AMIs over {instances} instances")
+    for mode, store in (('inline', None), ('local', tempfile.mkdtemp(prefix='dr-reports-')),
+                        ('s3', 's3://dr-reports/monitor')):
+        event = handler_events(fleet)['master-backup-monitor']
+        event['send_summary'] = False
+        if store:
+            event['config']['report_store'] = store
+
+        uploaded = parts(backend)
+        response, logged, peak = run(module, event)
+        body = response['body']
+        line = (f"  {mode:<7} status={response['statusCode']}  logged={logged / 1024:,.0f}KB  "
+                f"body={len(body) / 1024:,.0f}KB ({len(body) / RESPONSE_LIMIT:.0%} of limit)  "
+                f"peak={peak / 2**20:,.1f}MB")
+        if store:
+            pointer = json.loads(body)['report']
+            key = pointer['location'].split('/monitor/', 1)[-1] if mode == 's3' else None
+            data = open_store(store).get(key) if key else open(pointer['location'], 'rb').read()
+            json.loads(data)
+            line += f"  full={pointer['bytes'] / 2**20:.1f}MB ({pointer['sections']} sections, valid JSON)"
+            if mode == 's3':
+                line += f"  parts={parts(backend) - uploaded}  open uploads={len(backend.uploads)}"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
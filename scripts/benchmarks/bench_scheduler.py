@@ -0,0 +1,141 @@
+"""
+Compare a week of fixed 6-hourly full monitor runs with the adaptive
+check scheduler: how many full runs each makes, what they cost in API
+calls, and how long each takes to notice injected incidents.
+
+Usage: python scripts/benchmarks/bench_scheduler.py [days] [max_interval_hours]
+
+Incidents (replication disabled, the DR bucket falling behind, backup
+retention switched off, a DLM policy disabled, point-in-time recovery
+lagging) start at odd times and last a few hours. Every day the primary
+instance reports "backing-up" through its 03:00-04:00 backup window,
+which the scheduler must not mistake for drift. The simulated clock is
+passed to the scheduler as the scheduled event's time; it ticks at
+whatever probe interval the scheduler last chose.
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fake_aws import PRIMARY_REGION, FakeAWS, activate, generate_fleet, handler_events
+from harness import FakeContext, load_handler
+
+CRON_HOURS = 6
+
+# (name, day, start "HH:MM", hours)
+INCIDENTS = [
+    ('replication disabled', 0, '10:15', 5),
+    ('DR bucket behind', 1, '14:40', 4),
+    ('backup retention off', 2, '09:05', 3),
+    ('DLM policy disabled', 3, '20:30', 6),
+    ('PITR lagging', 4, '11:20', 3),
+    ('replication disabled', 5, '02:10', 2)
+]
+
+
+def incidents(start, days):
+    for name, day, at, hours in INCIDENTS:
+        if day < days:
+            hour, minute = map(int, at.split(':'))
+            began = start + timedelta(days=day, hours=hour, minutes=minute)
+            yield name, began, began + timedelta(hours=hours)
+
+
+def apply(backend, fleet, active, now):
+    """Set the fake fleet to the state of the simulated time"""
+    instance = backend.db_instances[PRIMARY_REGION][fleet['db_instance_id']]
+    instance['DBInstanceStatus'] = 'backing-up' if now.hour == 3 else 'available'
+    instance['BackupRetentionPeriod'] = 0 if 'backup retention off' in active else 7
+    if 'PITR lagging' in active:
+        instance['LatestRestorableTime'] = datetime.now(timezone.utc) - timedelta(hours=2)
+    else:
+        instance.pop('LatestRestorableTime', None)
+
+    rule = backend.buckets[fleet['primary_bucket']].replication['Rules'][0]
+    rule['Status'] = 'Disabled' if 'replication disabled' in active else 'Enabled'
+    primary = backend.buckets[fleet['primary_bucket']].generated.count
+    backend.buckets[fleet['dr_bucket']].generated.count = primary - (200 if 'DR bucket behind' in active else 3)
+
+    for policy in backend.lifecycle_policies[PRIMARY_REGION].values():
+        policy['State'] = 'DISABLED' if 'DLM policy disabled' in active else 'ENABLED'
+
+
+def detection(runs, windows):
+    """Hours from each incident's start to the first full run after it"""
+    delays = []
+    for name, began, _ in windows:
+        after = [run for run in runs if run >= began]
+        delays.append((name, (after[0] - began).total_seconds() / 3600 if after else None))
+    return delays
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 7
+    max_hours = float(sys.argv[2]) if len(sys.argv) > 2 else 24
+
+    backend = activate(FakeAWS())
+    fleet = generate_fleet(backend, db_snapshots=500, amis=5000, s3_objects=200000)
+    events = handler_events(fleet)
+    start = datetime(2026, 1, 5, tzinfo=timezone.utc)
+    end = start + timedelta(days=days)
+    windows = list(incidents(start, days))
+
+    def active(now):
+        return {name for name, began, ended in windows if began <= now < ended}
+
+    # Cost of one full master run, for the API call totals
+    master = events['master-backup-monitor']
+    master['send_summary'] = False
+    with contextlib.redirect_stdout(io.StringIO()):
+        response = load_handler('master-backup-monitor').lambda_handler(master, FakeContext())
+    full_calls = json.loads(response['body'])['api_calls']['calls']
+
+    # Fixed cron: a full run every CRON_HOURS whatever happened
+    cron = [start + timedelta(hours=hours) for hours in range(0, days * 24, CRON_HOURS)]
+
+    # Adaptive: probe ticks at the interval the scheduler asks for
+    event = dict(events['check-scheduler'], state_store=tempfile.mkdtemp(prefix='dr-schedule-'),
+                 consumers={'master-backup-monitor': {
+                     'function_name': 'master-backup-monitor', 'event': master,
+                     'min_interval_hours': 1, 'max_interval_hours': max_hours
+                 }})
+    scheduler = load_handler('check-scheduler')
+    runs, reasons = [], {}
+    ticks = probe_calls = skipped = 0
+    now = start
+    while now < end:
+        apply(backend, fleet, active(now), now)
+        invoked = len(backend.invocations)
+        with contextlib.redirect_stdout(io.StringIO()):
+            response = scheduler.lambda_handler(dict(event, time=now.isoformat()), FakeContext())
+        report = json.loads(response['body'])
+        ticks += 1
+        probe_calls += report['api_calls']['calls'] - (len(backend.invocations) - invoked)
+        skipped += sum('skipped' in probe for probe in report['probes'].values())
+        if len(backend.invocations) > invoked:
+            runs.append(now)
+            reason = report['consumers']['master-backup-monitor']['reason'].split(':')[0]
+            reasons[reason] = reasons.get(reason, 0) + 1
+        now += timedelta(minutes=report['probe_minutes'])
+
+    print(f"{days} days, {len(windows)} incidents, one full run = {full_calls} API calls")
+    print(f"  fixed {CRON_HOURS}h cron:   full_runs={len(cron):<4} api_calls={len(cron) * full_calls:,}")
+    print(f"  adaptive ({max_hours:g}h SLA): full_runs={len(runs):<4} "
+          f"api_calls={len(runs) * full_calls + probe_calls:,} "
+          f"(probes: {ticks} ticks, {probe_calls} calls, {skipped} skipped in quiet windows)")
+    print(f"  runs by reason={reasons}  "
+          f"final rule={backend.rules.get('dr-check-scheduler', {}).get('ScheduleExpression')}")
+    print("  hours to detect:")
+    for (name, fixed), (_, adaptive) in zip(detection(cron, windows), detection(runs, windows)):
+        print(f"    {name:<22} fixed={fixed:5.2f}  adaptive={adaptive:5.2f}")
+
+
+if __name__ == '__main__':
+    main()
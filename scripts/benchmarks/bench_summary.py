@@ -0,0 +1,65 @@
+"""
+Compare the master monitor's daily summary run built from live checks
+with one built from the stored report history.
+
+Usage: python scripts/benchmarks/bench_summary.py [snapshots] [amis] [objects] [runs]
+
+Runs the monitor a few times (the 6-hourly reports) to fill a local
+history, then sends the summary both ways and prints API calls, time
+and the email built from history.
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fake_aws import FakeAWS, activate, generate_fleet, handler_events
+from harness import FakeContext, load_handler
+
+
+def run(module, event):
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        response = module.lambda_handler(event, FakeContext())
+    body = json.loads(response['body'])
+    return response['statusCode'], body, time.perf_counter() - started
+
+
+def main():
+    snapshots = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    amis = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    objects = int(sys.argv[3]) if len(sys.argv) > 3 else 200000
+    runs = int(sys.argv[4]) if len(sys.argv) > 4 else 4
+
+    backend = activate(FakeAWS(latency_ms={'default': 2}))
+    fleet = generate_fleet(backend, db_snapshots=snapshots, amis=amis, s3_objects=objects)
+    module = load_handler('master-backup-monitor')
+    event = handler_events(fleet)['master-backup-monitor']
+
+    scheduled = json.loads(json.dumps(event))
+    scheduled['send_summary'] = False
+    scheduled['config']['history_store'] = tempfile.mkdtemp(prefix='dr-history-')
+    for _ in range(runs):
+        run(module, scheduled)
+
+    status, live, seconds = run(module, event)
+    print(f"live summary     status={status}  api_calls={live['api_calls']['calls']:<5d} seconds={seconds:.2f}")
+
+    summary_event = dict(scheduled, send_summary=True)
+    published = len(backend.published)
+    status, summary, seconds = run(module, summary_event)
+    print(f"history summary  status={status}  api_calls={summary['api_calls']['calls']:<5d} seconds={seconds:.2f}  "
+          f"reports={summary.get('reports')}  source={summary.get('source', 'live')}")
+
+    for message in backend.published[published:]:
+        print(message.get('Message', message))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,393 @@
+"""
+Record and replay real AWS traffic for offline profiling.
+
+Usage:
+    python scripts/benchmarks/cassettes.py record HANDLER EVENT.json OUT.jsonl.gz
+    python scripts/benchmarks/cassettes.py replay CASSETTE [--time-scale 1.0]
+        [--repeat 1] [--profile]
+
+`record` runs a handler against real AWS (normal credentials) and
+captures every botocore call it makes: operation, parameters, parsed
+response, status and latency. Account IDs are replaced with stable
+placeholders everywhere they appear (ARNs, OwnerId fields, free text),
+HTTP headers are dropped, and the result is written as gzipped JSON
+lines together with the scrubbed event.
+
+`replay` serves the cassette back at botocore's before-call event so the
+same handler runs offline against production-shaped data. Calls are
+matched by operation and parameters, falling back to recorded order for
+parameters that embed run-specific values (timestamps, test ids).
+--time-scale 1 sleeps the recorded latency, 0 replays instantly, other
+values scale it. Recorded timestamps are shifted to the replay time so
+ages in the report match what was recorded.
+"""
+
+import argparse
+import base64
+import cProfile
+import gzip
+import io
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from harness import HANDLERS, FakeContext, load_handler, status_code
+
+from botocore.awsrequest import AWSResponse
+from botocore.response import StreamingBody
+
+from dr_common import instrumentation
+from dr_common.clients import register_client_hook
+
+CASSETTE_VERSION = 1
+
+ARN_ACCOUNT = re.compile(r'arn:aws[a-z-]*:[a-z0-9-]*:[a-z0-9-]*:(\d{12}):')
+ACCOUNT_FIELDS = {'OwnerId', 'AccountId', 'Owner', 'SourceAccount', 'RequesterId'}
+ISO_TIMESTAMP = re.compile(r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d+)?Z$')
+
+# Response fields that differ on every call and only add noise
+DROPPED_METADATA = ('HTTPHeaders', 'HostId')
+
+
+def encode(value):
+    """Make a botocore structure JSON-safe, tagging types JSON lacks"""
+    if isinstance(value, dict):
+        return {key: encode(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [encode(item) for item in value]
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    if isinstance(value, (bytes, bytearray)):
+        return {'__bytes__': base64.b64encode(bytes(value)).decode()}
+    if hasattr(value, 'read'):
+        return {'__stream__': True}
+    return value
+
+
+def decode(value, shift=None):
+    """Inverse of encode(); shift moves every timestamp by a timedelta"""
+    if isinstance(value, dict):
+        if '__datetime__' in value:
+            parsed = datetime.fromisoformat(value['__datetime__'])
+            return parsed + shift if shift else parsed
+        if '__bytes__' in value:
+            return base64.b64decode(value['__bytes__'])
+        if '__stream__' in value:
+            return b''
+        return {key: decode(item, shift) for key, item in value.items()}
+    if isinstance(value, list):
+        return [decode(item, shift) for item in value]
+    if shift and isinstance(value, str) and ISO_TIMESTAMP.match(value):
+        # EC2 returns CreationDate as a string
+        parsed = datetime.strptime(value[:19], '%Y-%m-%dT%H:%M:%S') + shift
+        return parsed.strftime('%Y-%m-%dT%H:%M:%S') + value[19:]
+    return value
+
+
+def _walk_strings(value, visit, key=None):
+    if isinstance(value, dict):
+        for child_key, child in value.items():
+            _walk_strings(child, visit, child_key)
+    elif isinstance(value, list):
+        for child in value:
+            _walk_strings(child, visit, key)
+    elif isinstance(value, str):
+        visit(value, key)
+
+
+def _replace_strings(value, replace):
+    if isinstance(value, dict):
+        return {key: _replace_strings(item, replace) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_replace_strings(item, replace) for item in value]
+    if isinstance(value, str):
+        return replace(value)
+    return value
+
+
+class Scrubber:
+    """Replaces account IDs with stable placeholders (100000000001, ...)"""
+
+    def __init__(self):
+        self.accounts = {}
+
+    def learn(self, value):
+        def visit(text, key):
+            for match in ARN_ACCOUNT.finditer(text):
+                self._placeholder(match.group(1))
+            if key in ACCOUNT_FIELDS and re.fullmatch(r'\d{12}', text):
+                self._placeholder(text)
+
+        _walk_strings(value, visit)
+
+    def _placeholder(self, account):
+        if account not in self.accounts:
+            self.accounts[account] = f'{100000000000 + len(self.accounts) + 1:012d}'
+        return self.accounts[account]
+
+    def scrub(self, value):
+        if not self.accounts:
+            return value
+        pattern = re.compile('|'.join(re.escape(account) for account in self.accounts))
+        return _replace_strings(value, lambda text: pattern.sub(lambda m: self.accounts[m.group(0)], text))
+
+
+class Recorder:
+    """Captures every call made by the clients it is installed on"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.interactions = []
+
+    def install(self, client):
+        region = client.meta.region_name
+        events = client.meta.events
+
+        def capture_params(params, context=None, **kwargs):
+            if context is not None:
+                # Paginators reuse and mutate the params dict, so copy now
+                context['cassette_params'] = encode(params)
+
+        def before_call(context=None, **kwargs):
+            if context is not None:
+                context['cassette_started'] = time.perf_counter()
+
+        def after_call(event_name, http_response=None, parsed=None, context=None, **kwargs):
+            context = context or {}
+            # A before-call responder registered earlier (Stubber, the fake
+            # backend) skips later before-call hooks; the shared
+            # instrumentation timestamp is set ahead of them
+            started = context.get('cassette_started') or \
+                context.get('instrumentation_started') or time.perf_counter()
+            response = dict(parsed or {})
+            body = response.get('Body')
+            if body is not None and hasattr(body, 'read'):
+                # Read the stream for the cassette and hand the caller a fresh one
+                data = body.read()
+                response['Body'] = data
+                parsed['Body'] = StreamingBody(io.BytesIO(data), len(data))
+            metadata = {
+                key: value for key, value in response.get('ResponseMetadata', {}).items()
+                if key not in DROPPED_METADATA
+            }
+            if metadata:
+                response['ResponseMetadata'] = metadata
+
+            _, service, operation = event_name.split('.', 2)
+            with self.lock:
+                self.interactions.append({
+                    'seq': len(self.interactions),
+                    'region': region or 'global',
+                    'service': service,
+                    'operation': operation,
+                    'params': context.get('cassette_params', {}),
+                    'status': http_response.status_code if http_response is not None else 500,
+                    'response': encode(response),
+                    'offset_ms': round((started - self.started) * 1000, 1),
+                    'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+                })
+
+        events.register('before-parameter-build.*.*', capture_params, unique_id='cassette-params')
+        events.register_first('before-call.*.*', before_call, unique_id='cassette-before-call')
+        events.register('after-call.*.*', after_call, unique_id='cassette-after-call')
+        return client
+
+    def save(self, path, handler, event):
+        """Scrub and write the cassette as gzipped JSON lines"""
+        scrubber = Scrubber()
+        encoded_event = encode(event)
+        for value in [encoded_event] + self.interactions:
+            scrubber.learn(value)
+
+        header = {
+            'version': CASSETTE_VERSION,
+            'handler': handler,
+            'recorded_at': datetime.now(timezone.utc).isoformat(),
+            'accounts_scrubbed': len(scrubber.accounts),
+            'event': scrubber.scrub(encoded_event)
+        }
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            f.write(json.dumps(header) + '\n')
+            for interaction in self.interactions:
+                f.write(json.dumps(scrubber.scrub(interaction), default=str) + '\n')
+
+
+def load(path):
+    """Read a cassette; returns (header, interactions)"""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        header = json.loads(f.readline())
+        if header.get('version') != CASSETTE_VERSION:
+            raise ValueError(f"Unsupported cassette version: {header.get('version')}")
+        interactions = [json.loads(line) for line in f if line.strip()]
+    return header, interactions
+
+
+def _params_key(params):
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+class Player:
+    """Serves recorded responses back, matched by operation and parameters"""
+
+    def __init__(self, header, interactions, time_scale=0.0, shift_times=True, strict=False):
+        self.header = header
+        self.time_scale = time_scale
+        self.strict = strict
+        self.lock = threading.Lock()
+        self.shift = None
+        if shift_times:
+            recorded_at = datetime.fromisoformat(header['recorded_at'])
+            self.shift = datetime.now(timezone.utc) - recorded_at
+
+        self.exact = defaultdict(deque)
+        self.ordered = defaultdict(deque)
+        for interaction in interactions:
+            operation = (interaction['region'], interaction['service'], interaction['operation'])
+            self.exact[operation + (_params_key(interaction['params']),)].append(interaction)
+            self.ordered[operation].append(interaction)
+        self.served = set()
+        self.unmatched = []
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        header, interactions = load(path)
+        return cls(header, interactions, **kwargs)
+
+    def event(self):
+        return decode(self.header['event'], self.shift)
+
+    def _next(self, queue):
+        while queue:
+            interaction = queue.popleft()
+            if interaction['seq'] not in self.served:
+                self.served.add(interaction['seq'])
+                return interaction
+        return None
+
+    def respond(self, region, service, operation, params):
+        operation_key = (region or 'global', service, operation)
+        with self.lock:
+            interaction = self._next(self.exact[operation_key + (_params_key(encode(params)),)])
+            if interaction is None and not self.strict:
+                interaction = self._next(self.ordered[operation_key])
+            if interaction is None:
+                self.unmatched.append('/'.join(operation_key))
+
+        if interaction is None:
+            parsed = {
+                'Error': {'Code': 'CassetteMiss', 'Message': f'No recorded response for {operation}'},
+                'ResponseMetadata': {'HTTPStatusCode': 599}
+            }
+            return AWSResponse(None, 599, {}, None), parsed
+
+        if self.time_scale:
+            time.sleep(interaction['elapsed_ms'] * self.time_scale / 1000)
+
+        parsed = decode(interaction['response'], self.shift)
+        if isinstance(parsed.get('Body'), bytes):
+            parsed['Body'] = StreamingBody(io.BytesIO(parsed['Body']), len(parsed['Body']))
+        return AWSResponse(None, interaction['status'], {}, None), parsed
+
+
+_active = None
+
+
+def _install_player(client):
+    region = client.meta.region_name
+
+    def capture_params(params, context=None, **kwargs):
+        if context is not None:
+            context['cassette_params'] = encode(params)
+
+    def respond(event_name, context=None, **kwargs):
+        if _active is None:
+            raise RuntimeError('No cassette is being replayed')
+        _, service, operation = event_name.split('.', 2)
+        return _active.respond(region, service, operation, (context or {}).get('cassette_params', {}))
+
+    client.meta.events.register('before-parameter-build.*.*', capture_params, unique_id='cassette-params')
+    client.meta.events.register_first('before-call.*.*', respond, unique_id='cassette-respond')
+    return client
+
+
+def play(player):
+    """Answer every client created through get_client from player"""
+    global _active
+    _active = player
+    register_client_hook(_install_player)
+    return player
+
+
+def record(args):
+    with open(args.event) as f:
+        event = json.load(f)
+
+    recorder = Recorder()
+    register_client_hook(recorder.install)
+    module = load_handler(args.handler)
+    response = module.lambda_handler(event, FakeContext())
+
+    recorder.save(args.output, args.handler, event)
+    print(f"Recorded {len(recorder.interactions)} calls (status {status_code(response)}) "
+          f"to {args.output}")
+
+
+def replay(args):
+    header, interactions = load(args.cassette)
+    handler = args.handler or header['handler']
+    recorded_ms = sum(interaction['elapsed_ms'] for interaction in interactions)
+    print(f"{handler}: {len(interactions)} recorded calls, {recorded_ms / 1000:.2f}s of API time")
+
+    for run in range(args.repeat):
+        player = play(Player(header, interactions, time_scale=args.time_scale))
+        module = load_handler(handler)
+        profiler = cProfile.Profile() if args.profile else None
+
+        started = time.perf_counter()
+        if profiler:
+            profiler.enable()
+        response = module.lambda_handler(player.event(), FakeContext())
+        if profiler:
+            profiler.disable()
+        wall = time.perf_counter() - started
+
+        calls = instrumentation.collector.stats()['calls']
+        print(f"run {run + 1}: status={status_code(response)} wall={wall:.3f}s "
+              f"calls={calls} unmatched={len(player.unmatched)}")
+        if profiler:
+            pstats.Stats(profiler).sort_stats('cumulative').print_stats(25)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Record and replay AWS calls made by a handler')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = commands.add_parser('record')
+    record_parser.add_argument('handler', choices=sorted(HANDLERS))
+    record_parser.add_argument('event')
+    record_parser.add_argument('output')
+    record_parser.set_defaults(func=record)
+
+    replay_parser = commands.add_parser('replay')
+    replay_parser.add_argument('cassette')
+    replay_parser.add_argument('--handler', choices=sorted(HANDLERS))
+    replay_parser.add_argument('--time-scale', type=float, default=1.0)
+    replay_parser.add_argument('--repeat', type=int, default=1)
+    replay_parser.add_argument('--profile', action='store_true')
+    replay_parser.set_defaults(func=replay)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
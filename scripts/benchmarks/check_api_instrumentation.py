@@ -0,0 +1,85 @@
+"""
+Drive s3-replication-monitor through botocore's Stubber and print the
+per-call statistics the instrumentation hooks collected, then check that
+a call failing with a connection error is still counted.
+
+Usage: python scripts/benchmarks/check_api_instrumentation.py
+"""
+
+import json
+import sys
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import EndpointConnectionError
+from botocore.stub import Stubber
+
+from harness import FakeContext, load_handler
+
+from dr_common import instrumentation
+
+
+def main():
+    handler = load_handler('s3-replication-monitor')
+    s3 = Stubber(handler.s3_client)
+
+    s3.add_response(
+        'get_bucket_replication',
+        {'ReplicationConfiguration': {'Role': 'arn:aws:iam::123456789012:role/r', 'Rules': [
+            {'Status': 'Enabled', 'Destination': {'Bucket': 'arn:aws:s3:::dr'}}
+        ]}},
+        {'Bucket': 'primary'}
+    )
+    s3.add_response('list_objects_v2', {'KeyCount': 1000, 'IsTruncated': True,
+                                        'NextContinuationToken': 'p2'}, {'Bucket': 'primary'})
+    s3.add_response('list_objects_v2', {'KeyCount': 10},
+                    {'Bucket': 'primary', 'ContinuationToken': 'p2'})
+    s3.add_response('list_objects_v2', {'KeyCount': 1010}, {'Bucket': 'dr'})
+
+    with s3:
+        result = handler.lambda_handler(
+            {'primary_bucket': 'primary', 'dr_bucket': 'dr', 'sns_topic_arn': ''},
+            FakeContext()
+        )
+        s3.assert_no_pending_responses()
+
+    api_calls = json.loads(result['body'])['api_calls']
+    print(json.dumps(api_calls, indent=2))
+
+    operations = api_calls['operations']
+    expected = {'us-east-1/s3/GetBucketReplication': (1, 0), 'us-east-1/s3/ListObjectsV2': (3, 3)}
+    for key, (calls, pages) in expected.items():
+        if (operations[key]['calls'], operations[key]['pages']) != (calls, pages):
+            print(f"FAIL: {key} recorded {operations[key]}")
+            sys.exit(1)
+
+    check_connection_error()
+
+
+def check_connection_error():
+    """A call that never gets a response still counts as a call and an error"""
+    collector = instrumentation.CallCollector()
+    client = boto3.client('s3', region_name='us-east-1',
+                          config=Config(retries={'total_max_attempts': 1}))
+    instrumentation.install(client, collector)
+
+    def refuse(request, **kwargs):
+        raise EndpointConnectionError(endpoint_url=request.url)
+
+    client.meta.events.register('before-send.s3.ListObjectsV2', refuse)
+    try:
+        client.list_objects_v2(Bucket='primary')
+        print("FAIL: the injected EndpointConnectionError was not raised")
+        sys.exit(1)
+    except EndpointConnectionError:
+        pass
+
+    recorded = collector.stats()['operations'].get('us-east-1/s3/ListObjectsV2')
+    print(f"Connection error recorded as {json.dumps(recorded)}")
+    if not recorded or (recorded['calls'], recorded['errors'], recorded['failed_attempts']) != (1, 1, 1):
+        print(f"FAIL: connection error recorded as {recorded}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
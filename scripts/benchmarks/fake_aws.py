@@ -0,0 +1,1384 @@
+"""
+In-memory fake of the AWS APIs the lambdas call.
+
+FakeAWS answers calls at botocore's before-call event, after the shared
+throttling and instrumentation hooks have run, so every handler runs
+unchanged: it creates its clients through dr_common.clients.get_client
+and gets back parsed responses shaped like the real ones. Pagination
+follows each API's own rules (MaxRecords/Marker for RDS, optional
+MaxResults/NextToken for EC2, MaxKeys/ContinuationToken for S3) with
+opaque tokens, and per-call latency and throttling are configurable.
+
+Usage: python scripts/benchmarks/fake_aws.py [snapshots] [amis] [objects]
+
+    backend = FakeAWS(latency_ms={'default': 5, 'ec2.DescribeImages': 40})
+    fleet = generate_fleet(backend, db_snapshots=5000, amis=20000,
+                           s3_objects=10_000_000)
+    activate(backend)
+    module = load_handler('master-backup-monitor')
+    module.lambda_handler(handler_events(fleet)['master-backup-monitor'], FakeContext())
+
+S3 buckets can hold a generated key range (keys, sizes and dates derived
+from the index) so ten million objects cost no memory until listed.
+"""
+
+import base64
+import bisect
+import copy
+import fnmatch
+import hashlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from harness import FakeContext, load_handler, status_code
+
+from botocore import xform_name
+from botocore.awsrequest import AWSResponse
+from botocore.response import StreamingBody
+
+from dr_common import discovery
+from dr_common.clients import register_client_hook
+
+ACCOUNT_ID = '123456789012'
+PRIMARY_REGION = 'us-east-1'
+DR_REGION = 'us-west-2'
+
+# Largest SNS message, and largest publish_batch request
+SNS_MAX_BYTES = 256 * 1024
+
+# Smallest part of a multipart upload, other than the last
+S3_MIN_PART_BYTES = 5 * 1024 * 1024
+
+# Error code and HTTP status each service uses when it throttles
+THROTTLE_ERRORS = {
+    'ec2': ('RequestLimitExceeded', 503),
+    's3': ('SlowDown', 503),
+    'rds': ('Throttling', 400),
+    'sns': ('Throttling', 400),
+    'cloudwatch': ('Throttling', 400)
+}
+DEFAULT_THROTTLE_ERROR = ('ThrottlingException', 400)
+
+
+class FakeError(Exception):
+    """An API error returned to the caller as a ClientError"""
+
+    def __init__(self, code, message, status=400):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.status = status
+
+
+def _aws_time(value):
+    return value.astimezone(timezone.utc)
+
+
+def _encode_token(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+
+def _decode_token(token, parameter):
+    try:
+        return json.loads(base64.urlsafe_b64decode(token.encode()))
+    except (ValueError, TypeError):
+        raise FakeError('InvalidParameterValue', f'Invalid {parameter}: {token}')
+
+
+def _page(sequence, params, request_token, response_token, size_param,
+          default=None, minimum=1, maximum=1000):
+    """
+    Slice one page of a list result.
+
+    default=None mirrors the EC2 describe calls, which return everything
+    in one response unless a page size is given.
+    """
+    size = params.get(size_param, default)
+    if size is not None and not minimum <= size <= maximum:
+        raise FakeError(
+            'InvalidParameterValue',
+            f'{size_param} must be between {minimum} and {maximum}'
+        )
+
+    offset = 0
+    if params.get(request_token):
+        offset = _decode_token(params[request_token], request_token)['offset']
+
+    end = len(sequence) if size is None else offset + size
+    result = {}
+    if end < len(sequence):
+        result[response_token] = _encode_token({'offset': end})
+    return sequence[offset:end], result
+
+
+def _etag(body):
+    return f'"{hashlib.md5(body).hexdigest()}"'
+
+
+def _tag_values(item, key):
+    return [tag['Value'] for tag in item.get('Tags', []) if tag['Key'] == key]
+
+
+def _matches(item, filters, fields):
+    """EC2 filter semantics: every filter must match one of its values"""
+    for entry in filters or []:
+        name = entry['Name']
+        if name.startswith('tag:'):
+            actual = _tag_values(item, name[4:])
+        elif name in fields:
+            actual = fields[name](item)
+        else:
+            raise FakeError('InvalidParameterValue', f'The filter \'{name}\' is invalid')
+
+        if not any(fnmatch.fnmatchcase(str(value), pattern)
+                   for value in actual for pattern in entry['Values']):
+            return False
+    return True
+
+
+IMAGE_FILTERS = {
+    'state': lambda x: [x['State']],
+    'image-id': lambda x: [x['ImageId']],
+    'name': lambda x: [x.get('Name')],
+    'owner-id': lambda x: [x['OwnerId']]
+}
+INSTANCE_FILTERS = {
+    'instance-state-name': lambda x: [x['State']['Name']],
+    'instance-id': lambda x: [x['InstanceId']],
+    'image-id': lambda x: [x['ImageId']]
+}
+SECURITY_GROUP_FILTERS = {
+    'group-name': lambda x: [x['GroupName']],
+    'group-id': lambda x: [x['GroupId']],
+    'vpc-id': lambda x: [x['VpcId']]
+}
+VPC_FILTERS = {
+    'isDefault': lambda x: [str(x['IsDefault']).lower()],
+    'vpc-id': lambda x: [x['VpcId']]
+}
+SUBNET_FILTERS = {
+    'vpc-id': lambda x: [x['VpcId']],
+    'subnet-id': lambda x: [x['SubnetId']]
+}
+
+
+class GeneratedKeys:
+    """
+    A contiguous range of synthetic S3 objects.
+
+    Keys are zero-padded so lexicographic order is index order, which lets
+    a listing seek to any key with a binary search instead of storing it.
+    With partitions > 1 the range is split evenly across that many
+    top-level "part-NNNN/" prefixes, still in index order.
+    """
+
+    def __init__(self, count, prefix='data/', newest=None, spacing_seconds=1.0, partitions=1):
+        self.count = count
+        self.prefix = prefix
+        self.width = max(12, len(str(count)))
+        self.newest = newest or datetime.now(timezone.utc)
+        self.spacing = spacing_seconds
+        self.partitions = partitions
+
+    def key(self, index):
+        if self.partitions > 1:
+            return f'{self.prefix}part-{index * self.partitions // self.count:04d}/{index:0{self.width}d}'
+        return f'{self.prefix}{index:0{self.width}d}'
+
+    def item(self, index):
+        return {
+            'Key': self.key(index),
+            'LastModified': self.newest - timedelta(seconds=(self.count - index) * self.spacing),
+            'ETag': f'"{index:032x}"',
+            'Size': 1024 + index % 4096,
+            'StorageClass': 'STANDARD'
+        }
+
+    def seek(self, key, inclusive):
+        """Index of the first generated key above key (or equal, if inclusive)"""
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            candidate = self.key(middle)
+            if candidate < key or (candidate == key and not inclusive):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+
+class Bucket:
+    """An S3 bucket: explicitly written objects plus an optional generated range"""
+
+    def __init__(self, name, region, versioning=None, replication=None):
+        self.name = name
+        self.region = region
+        self.versioning = versioning
+        self.replication = replication
+        self.objects = {}
+        self.keys = []
+        self.generated = None
+
+    def put(self, key, body, modified):
+        if key not in self.objects:
+            bisect.insort(self.keys, key)
+        self.objects[key] = (body, modified)
+
+    def delete(self, key):
+        if self.objects.pop(key, None) is not None:
+            self.keys.remove(key)
+
+    def _stored_item(self, key):
+        body, modified = self.objects[key]
+        return {
+            'Key': key,
+            'LastModified': modified,
+            'ETag': _etag(body),
+            'Size': len(body),
+            'StorageClass': 'STANDARD'
+        }
+
+    def list_after(self, after, prefix, limit):
+        """
+        Up to limit objects with keys > after and starting with prefix,
+        merging stored and generated keys in order. Returns (items, more).
+        """
+        # Start at the prefix itself when it sorts after the resume point
+        inclusive = prefix > after
+        bound = prefix if inclusive else after
+        seek = bisect.bisect_left if inclusive else bisect.bisect_right
+        stored = seek(self.keys, bound)
+        generated = self.generated.seek(bound, inclusive) if self.generated else None
+
+        results = []
+        while True:
+            stored_key = self.keys[stored] if stored < len(self.keys) else None
+            generated_key = None
+            if generated is not None and generated < self.generated.count:
+                generated_key = self.generated.key(generated)
+
+            if generated_key is not None and (stored_key is None or generated_key <= stored_key):
+                key = generated_key
+            elif stored_key is not None:
+                key = stored_key
+            else:
+                return results, False
+
+            if not key.startswith(prefix):
+                return results, False
+            if len(results) == limit:
+                return results, True
+
+            if key == stored_key:
+                # A written object shadows a generated one with the same key
+                results.append(self._stored_item(key))
+                stored += 1
+                if key == generated_key:
+                    generated += 1
+            else:
+                results.append(self.generated.item(generated))
+                generated += 1
+
+    def list_delimited(self, after, prefix, delimiter, limit):
+        """
+        Like list_after, but keys containing delimiter after prefix are
+        rolled up into common prefixes, each skipped with one seek.
+        Returns (items, prefixes, more, last) where last resumes the listing.
+        """
+        contents, prefixes = [], []
+        while len(contents) + len(prefixes) < limit:
+            found, _ = self.list_after(after, prefix, 1)
+            if not found:
+                return contents, prefixes, False, after
+
+            key = found[0]['Key']
+            rest = key[len(prefix):]
+            if delimiter in rest:
+                common = prefix + rest[:rest.index(delimiter) + len(delimiter)]
+                prefixes.append(common)
+                # Past every key under the common prefix
+                after = common + '\U0010ffff'
+            else:
+                contents.append(found[0])
+                after = key
+
+        more = bool(self.list_after(after, prefix, 1)[0])
+        return contents, prefixes, more, after
+
+
+class FakeAWS:
+    """
+    In-memory state and API implementation for the fake backend.
+
+    latency_ms is a number or a dict keyed by 'service.Operation',
+    'service' or 'default'. throttle_probability makes any attempt fail
+    with the service's throttling error; rate_limits (calls per second,
+    keyed the same way as latency_ms) throttles calls above that rate.
+    Throttled attempts are retried like botocore's standard retry mode
+    (up to max_attempts, reported in ResponseMetadata.RetryAttempts)
+    before the error reaches the caller.
+    """
+
+    def __init__(self, latency_ms=0, jitter=0.0, throttle_probability=0.0,
+                 rate_limits=None, max_attempts=3, retry_base_ms=50, seed=0):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.throttle_probability = throttle_probability
+        self.rate_limits = rate_limits or {}
+        self.max_attempts = max_attempts
+        self.retry_base_ms = retry_base_ms
+        self.random = random.Random(seed)
+        self.lock = threading.RLock()
+
+        self.sequence = 0
+        self.db_instances = {}
+        self.db_snapshots = {}
+        self.images = {}
+        self.instances = {}
+        self.security_groups = {}
+        self.vpcs = {}
+        self.subnets = {}
+        self.lifecycle_policies = {}
+        self.policy_times = {}
+        self.rules = {}
+        self.topics = set()
+        self.parameters = {}
+        self.buckets = {}
+        self.uploads = {}
+
+        self.published = []
+        self.metric_data = []
+        self.invocations = []
+        self.attempts = {}
+        self.throttled = {}
+        self.windows = {}
+
+    # ------------------------------------------------------------------
+    # Wiring into botocore
+    # ------------------------------------------------------------------
+
+    def install(self, client):
+        """Answer every call one boto3 client makes from this backend"""
+        return _attach(client, lambda: self)
+
+    def call(self, region, service, operation, params):
+        """Run one API call, with latency and throttling, as (http, parsed)"""
+        key = (region or PRIMARY_REGION, service, operation)
+        method = getattr(self, f'_{service.replace("-", "_")}_{xform_name(operation)}', None)
+
+        retries = 0
+        while True:
+            with self.lock:
+                self.attempts[key] = self.attempts.get(key, 0) + 1
+            self._sleep(self._setting(self.latency_ms, service, operation, 0))
+
+            if not self._throttle(key):
+                break
+            with self.lock:
+                self.throttled[key] = self.throttled.get(key, 0) + 1
+            if retries + 1 >= self.max_attempts:
+                code, status = THROTTLE_ERRORS.get(service, DEFAULT_THROTTLE_ERROR)
+                return self._error(FakeError(code, 'Rate exceeded', status), retries)
+            retries += 1
+            self._sleep(self.random.uniform(0, self.retry_base_ms * 2 ** retries))
+
+        if method is None:
+            return self._error(FakeError(
+                'NotImplemented', f'{service}.{operation} is not implemented by the fake backend', 501
+            ), retries)
+
+        try:
+            with self.lock:
+                result = method(key[0], **params)
+        except FakeError as e:
+            return self._error(e, retries)
+
+        result['ResponseMetadata'] = self._metadata(200, retries)
+        return AWSResponse(None, 200, {}, None), result
+
+    def _metadata(self, status, retries):
+        return {
+            'RequestId': str(uuid.uuid4()),
+            'HTTPStatusCode': status,
+            'HTTPHeaders': {},
+            'RetryAttempts': retries
+        }
+
+    def _error(self, error, retries):
+        parsed = {
+            'Error': {'Code': error.code, 'Message': error.message},
+            'ResponseMetadata': self._metadata(error.status, retries)
+        }
+        return AWSResponse(None, error.status, {}, None), parsed
+
+    @staticmethod
+    def _setting(setting, service, operation, default):
+        if not isinstance(setting, dict):
+            return setting
+        for name in (f'{service}.{operation}', service, 'default'):
+            if name in setting:
+                return setting[name]
+        return default
+
+    def _sleep(self, milliseconds):
+        if milliseconds <= 0:
+            return
+        if self.jitter:
+            milliseconds *= 1 + self.random.uniform(-self.jitter, self.jitter)
+        time.sleep(milliseconds / 1000)
+
+    def _throttle(self, key):
+        if self.throttle_probability and self.random.random() < self.throttle_probability:
+            return True
+
+        limit = self._setting(self.rate_limits, key[1], key[2], None)
+        if not limit:
+            return False
+
+        # Fixed one-second windows per (region, service, operation)
+        now = time.monotonic()
+        with self.lock:
+            started, calls = self.windows.get(key, (now, 0))
+            if now - started >= 1.0:
+                started, calls = now, 0
+            self.windows[key] = (started, calls + 1)
+        return calls >= limit
+
+    def next_id(self, prefix, width=17):
+        with self.lock:
+            self.sequence += 1
+            return f'{prefix}-{self.sequence:0{width}x}'
+
+    def stats(self):
+        """Attempts and throttled attempts per region/service/Operation"""
+        with self.lock:
+            return {
+                '/'.join(key): {
+                    'attempts': attempts,
+                    'throttled': self.throttled.get(key, 0)
+                }
+                for key, attempts in sorted(self.attempts.items())
+            }
+
+    # ------------------------------------------------------------------
+    # Fixtures used by generate_fleet and scenarios
+    # ------------------------------------------------------------------
+
+    def add_db_instance(self, region, instance_id, created, retention=7, status='available', tags=None):
+        self.db_instances.setdefault(region, {})[instance_id] = {
+            'DBInstanceIdentifier': instance_id,
+            'DBInstanceClass': 'db.t3.micro',
+            'Engine': 'mysql',
+            'DBInstanceStatus': status,
+            'InstanceCreateTime': created,
+            'BackupRetentionPeriod': retention,
+            'PreferredBackupWindow': '03:00-04:00',
+            'AvailabilityZone': f'{region}a',
+            'MultiAZ': False,
+            'EngineVersion': '8.0.35',
+            'VpcSecurityGroups': [{
+                'VpcSecurityGroupId': self.default_security_group(region),
+                'Status': 'active'
+            }],
+            'DBInstanceArn': f'arn:aws:rds:{region}:{ACCOUNT_ID}:db:{instance_id}',
+            'TagList': tags or []
+        }
+
+    def add_db_snapshot(self, region, snapshot_id, instance_id, created,
+                        snapshot_type='automated', status='available', source=None):
+        snapshot = {
+            'DBSnapshotIdentifier': snapshot_id,
+            'DBInstanceIdentifier': instance_id,
+            'SnapshotCreateTime': created,
+            'Engine': 'mysql',
+            'AllocatedStorage': 20,
+            'Status': status,
+            'Port': 3306,
+            'AvailabilityZone': f'{region}a',
+            'EngineVersion': '8.0.35',
+            'SnapshotType': snapshot_type,
+            'PercentProgress': 100 if status == 'available' else 0,
+            'StorageType': 'gp2',
+            'Encrypted': True,
+            'DBSnapshotArn': f'arn:aws:rds:{region}:{ACCOUNT_ID}:snapshot:{snapshot_id}',
+            'TagList': []
+        }
+        if source:
+            snapshot['SourceDBSnapshotIdentifier'] = source
+            snapshot['SourceRegion'] = source.split(':')[3]
+        self.db_snapshots.setdefault(region, {})[snapshot_id] = snapshot
+        return snapshot
+
+    def add_image(self, region, created, instance_id=None, name=None, state='available',
+                  source_image=None, tags=None):
+        image_id = self.next_id('ami')
+        image = {
+            'Architecture': 'x86_64',
+            'CreationDate': _aws_time(created).strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+            'ImageId': image_id,
+            'ImageLocation': f'{ACCOUNT_ID}/{name or image_id}',
+            'ImageType': 'machine',
+            'Public': False,
+            'OwnerId': ACCOUNT_ID,
+            'PlatformDetails': 'Linux/UNIX',
+            'State': state,
+            'BlockDeviceMappings': [{
+                'DeviceName': '/dev/xvda',
+                'Ebs': {
+                    'DeleteOnTermination': True,
+                    'SnapshotId': self.next_id('snap'),
+                    'VolumeSize': 8,
+                    'VolumeType': 'gp3',
+                    'Encrypted': True
+                }
+            }],
+            'Name': name or image_id,
+            'RootDeviceName': '/dev/xvda',
+            'RootDeviceType': 'ebs',
+            'VirtualizationType': 'hvm',
+            'Tags': list(tags or [])
+        }
+        if instance_id:
+            image['SourceInstanceId'] = instance_id
+        if source_image:
+            image['SourceImageId'] = source_image['ImageId']
+            image['SourceImageRegion'] = PRIMARY_REGION
+            image['Description'] = f"[Copied {source_image['ImageId']} from {PRIMARY_REGION}]"
+        self.images.setdefault(region, {})[image_id] = image
+        return image
+
+    def add_instance(self, region, launched, image_id='ami-00000000000000000', state='running',
+                     security_groups=(), subnet_id=None, tags=None):
+        instance_id = self.next_id('i')
+        self.instances.setdefault(region, {})[instance_id] = {
+            'InstanceId': instance_id,
+            'ImageId': image_id,
+            'InstanceType': 't2.micro',
+            'LaunchTime': launched,
+            'State': {'Code': 16 if state == 'running' else 80, 'Name': state},
+            'SubnetId': subnet_id,
+            'SecurityGroups': [
+                {'GroupId': group_id, 'GroupName': self.security_groups[region][group_id]['GroupName']}
+                for group_id in security_groups
+            ],
+            'Tags': list(tags or []),
+            '_reservation': self.next_id('r')
+        }
+        return instance_id
+
+    def add_security_group(self, region, name, vpc_id, description=''):
+        group_id = self.next_id('sg')
+        self.security_groups.setdefault(region, {})[group_id] = {
+            'GroupId': group_id,
+            'GroupName': name,
+            'Description': description,
+            'VpcId': vpc_id,
+            'OwnerId': ACCOUNT_ID,
+            'IpPermissions': []
+        }
+        return group_id
+
+    def add_default_network(self, region):
+        vpc_id = self.next_id('vpc')
+        self.vpcs.setdefault(region, {})[vpc_id] = {
+            'VpcId': vpc_id,
+            'CidrBlock': '172.31.0.0/16',
+            'IsDefault': True,
+            'State': 'available',
+            'OwnerId': ACCOUNT_ID
+        }
+        for zone in 'ab':
+            subnet_id = self.next_id('subnet')
+            self.subnets.setdefault(region, {})[subnet_id] = {
+                'SubnetId': subnet_id,
+                'VpcId': vpc_id,
+                'AvailabilityZone': f'{region}{zone}',
+                'CidrBlock': f'172.31.{0 if zone == "a" else 16}.0/20',
+                'DefaultForAz': True
+            }
+        self.add_security_group(region, 'default', vpc_id, 'default VPC security group')
+        return vpc_id
+
+    def default_security_group(self, region):
+        for group in self.security_groups.get(region, {}).values():
+            if group['GroupName'] == 'default':
+                return group['GroupId']
+        return None
+
+    def add_bucket(self, name, region=PRIMARY_REGION, versioning='Enabled', replicate_to=None):
+        replication = None
+        if replicate_to:
+            replication = {
+                'Role': f'arn:aws:iam::{ACCOUNT_ID}:role/s3-replication-role',
+                'Rules': [{
+                    'ID': 'replicate-all',
+                    'Priority': 1,
+                    'Filter': {},
+                    'Status': 'Enabled',
+                    'DeleteMarkerReplication': {'Status': 'Disabled'},
+                    'Destination': {'Bucket': f'arn:aws:s3:::{replicate_to}'}
+                }]
+            }
+        bucket = self.buckets[name] = Bucket(name, region, versioning, replication)
+        return bucket
+
+    def add_lifecycle_policy(self, region, description, state='ENABLED', times=('03:00',)):
+        policy_id = self.next_id('policy')
+        self.policy_times[policy_id] = list(times)
+        self.lifecycle_policies.setdefault(region, {})[policy_id] = {
+            'PolicyId': policy_id,
+            'Description': description,
+            'State': state,
+            'PolicyType': 'IMAGE_MANAGEMENT',
+            'Tags': {}
+        }
+        return policy_id
+
+    def add_topic(self, region, name):
+        arn = f'arn:aws:sns:{region}:{ACCOUNT_ID}:{name}'
+        self.topics.add(arn)
+        return arn
+
+    # ------------------------------------------------------------------
+    # RDS
+    # ------------------------------------------------------------------
+
+    def _rds_describe_db_instances(self, region, DBInstanceIdentifier=None, Filters=None, **params):
+        instances = self.db_instances.get(region, {})
+        if DBInstanceIdentifier:
+            if DBInstanceIdentifier not in instances:
+                raise FakeError('DBInstanceNotFound', f'DBInstance {DBInstanceIdentifier} not found.', 404)
+            selected = [instances[DBInstanceIdentifier]]
+        else:
+            selected = list(instances.values())
+        # Point-in-time recovery trails by about five minutes unless a
+        # test pinned LatestRestorableTime on the instance
+        restorable = datetime.now(timezone.utc) - timedelta(minutes=5)
+        selected = [
+            dict(instance, LatestRestorableTime=instance.get('LatestRestorableTime', restorable))
+            if instance['BackupRetentionPeriod'] else instance
+            for instance in selected
+        ]
+
+        page, result = _page(selected, params, 'Marker', 'Marker', 'MaxRecords',
+                             default=100, minimum=20, maximum=100)
+        result['DBInstances'] = page
+        return result
+
+    def _rds_describe_db_snapshots(self, region, DBInstanceIdentifier=None, DBSnapshotIdentifier=None,
+                                   SnapshotType=None, **params):
+        snapshots = self.db_snapshots.get(region, {})
+        if DBSnapshotIdentifier:
+            if DBSnapshotIdentifier not in snapshots:
+                raise FakeError('DBSnapshotNotFound', f'DBSnapshot {DBSnapshotIdentifier} not found.', 404)
+            selected = [snapshots[DBSnapshotIdentifier]]
+        else:
+            selected = [
+                snapshot for snapshot in snapshots.values()
+                if (DBInstanceIdentifier is None or snapshot['DBInstanceIdentifier'] == DBInstanceIdentifier)
+                and (SnapshotType is None or snapshot['SnapshotType'] == SnapshotType)
+            ]
+
+        page, result = _page(selected, params, 'Marker', 'Marker', 'MaxRecords',
+                             default=100, minimum=20, maximum=100)
+        result['DBSnapshots'] = page
+        return result
+
+    def _rds_restore_db_instance_from_db_snapshot(self, region, DBInstanceIdentifier, DBSnapshotIdentifier,
+                                                   Tags=None, **params):
+        if DBSnapshotIdentifier not in self.db_snapshots.get(region, {}):
+            raise FakeError('DBSnapshotNotFound', f'DBSnapshot {DBSnapshotIdentifier} not found.', 404)
+        if DBInstanceIdentifier in self.db_instances.get(region, {}):
+            raise FakeError('DBInstanceAlreadyExists', 'DB instance already exists', 400)
+
+        self.add_db_instance(region, DBInstanceIdentifier, datetime.now(timezone.utc),
+                             status='creating', tags=Tags)
+        return {'DBInstance': copy.deepcopy(self.db_instances[region][DBInstanceIdentifier])}
+
+    def _rds_delete_db_instance(self, region, DBInstanceIdentifier, **params):
+        instance = self.db_instances.get(region, {}).pop(DBInstanceIdentifier, None)
+        if instance is None:
+            raise FakeError('DBInstanceNotFound', f'DBInstance {DBInstanceIdentifier} not found.', 404)
+        return {'DBInstance': dict(instance, DBInstanceStatus='deleting')}
+
+    def _rds_copy_db_snapshot(self, region, SourceDBSnapshotIdentifier, TargetDBSnapshotIdentifier, **params):
+        if SourceDBSnapshotIdentifier.startswith('arn:'):
+            parts = SourceDBSnapshotIdentifier.split(':')
+            source_region, source_id = parts[3], ':'.join(parts[6:])
+        else:
+            source_region, source_id = region, SourceDBSnapshotIdentifier
+
+        source = self.db_snapshots.get(source_region, {}).get(source_id)
+        if source is None:
+            raise FakeError('DBSnapshotNotFound', f'DBSnapshot {source_id} not found.', 404)
+        if TargetDBSnapshotIdentifier in self.db_snapshots.get(region, {}):
+            raise FakeError('DBSnapshotAlreadyExists', 'Cannot create the snapshot because a snapshot '
+                            'with the identifier already exists.', 400)
+
+        # Copies complete immediately in the fake
+        snapshot = self.add_db_snapshot(
+            region, TargetDBSnapshotIdentifier, source['DBInstanceIdentifier'],
+            datetime.now(timezone.utc), snapshot_type='manual', source=source['DBSnapshotArn']
+        )
+        return {'DBSnapshot': dict(snapshot)}
+
+    # ------------------------------------------------------------------
+    # EC2
+    # ------------------------------------------------------------------
+
+    def _ec2_describe_images(self, region, Owners=None, ImageIds=None, Filters=None, **params):
+        images = self.images.get(region, {})
+        if ImageIds:
+            missing = [image_id for image_id in ImageIds if image_id not in images]
+            if missing:
+                raise FakeError('InvalidAMIID.NotFound', f'The image id \'[{missing[0]}]\' does not exist')
+            candidates = [images[image_id] for image_id in ImageIds]
+        else:
+            candidates = images.values()
+
+        owners = {ACCOUNT_ID if owner == 'self' else owner for owner in Owners or []}
+        selected = [
+            image for image in candidates
+            if (not owners or image['OwnerId'] in owners) and _matches(image, Filters, IMAGE_FILTERS)
+        ]
+
+        page, result = _page(selected, params, 'NextToken', 'NextToken', 'MaxResults',
+                             minimum=5, maximum=1000)
+        result['Images'] = page
+        return result
+
+    def _ec2_describe_instances(self, region, InstanceIds=None, Filters=None, **params):
+        instances = self.instances.get(region, {})
+        selected = [
+            instance for instance in instances.values()
+            if (not InstanceIds or instance['InstanceId'] in InstanceIds)
+            and _matches(instance, Filters, INSTANCE_FILTERS)
+        ]
+
+        page, result = _page(selected, params, 'NextToken', 'NextToken', 'MaxResults',
+                             minimum=5, maximum=1000)
+        reservations = {}
+        for instance in page:
+            reservation = reservations.setdefault(instance['_reservation'], {
+                'ReservationId': instance['_reservation'],
+                'OwnerId': ACCOUNT_ID,
+                'Groups': [],
+                'Instances': []
+            })
+            reservation['Instances'].append(
+                {key: value for key, value in instance.items() if not key.startswith('_')}
+            )
+        result['Reservations'] = list(reservations.values())
+        return result
+
+    def _ec2_describe_security_groups(self, region, GroupIds=None, GroupNames=None, Filters=None, **params):
+        selected = [
+            group for group in self.security_groups.get(region, {}).values()
+            if (not GroupIds or group['GroupId'] in GroupIds)
+            and (not GroupNames or group['GroupName'] in GroupNames)
+            and _matches(group, Filters, SECURITY_GROUP_FILTERS)
+        ]
+
+        page, result = _page(selected, params, 'NextToken', 'NextToken', 'MaxResults',
+                             minimum=5, maximum=1000)
+        result['SecurityGroups'] = page
+        return result
+
+    def _ec2_describe_vpcs(self, region, Filters=None, **params):
+        return {'Vpcs': [
+            vpc for vpc in self.vpcs.get(region, {}).values() if _matches(vpc, Filters, VPC_FILTERS)
+        ]}
+
+    def _ec2_describe_subnets(self, region, Filters=None, **params):
+        return {'Subnets': [
+            subnet for subnet in self.subnets.get(region, {}).values()
+            if _matches(subnet, Filters, SUBNET_FILTERS)
+        ]}
+
+    def _ec2_create_security_group(self, region, GroupName, Description, VpcId=None, **params):
+        for group in self.security_groups.get(region, {}).values():
+            if group['GroupName'] == GroupName and group['VpcId'] == VpcId:
+                raise FakeError('InvalidGroup.Duplicate',
+                                f'The security group \'{GroupName}\' already exists for VPC \'{VpcId}\'')
+        return {'GroupId': self.add_security_group(region, GroupName, VpcId, Description)}
+
+    def _security_group(self, region, group_id):
+        group = self.security_groups.get(region, {}).get(group_id)
+        if group is None:
+            raise FakeError('InvalidGroup.NotFound', f'The security group \'{group_id}\' does not exist')
+        return group
+
+    def _ec2_authorize_security_group_ingress(self, region, GroupId, IpPermissions=(), **params):
+        self._security_group(region, GroupId)['IpPermissions'].extend(IpPermissions)
+        return {'Return': True}
+
+    def _ec2_delete_security_group(self, region, GroupId, **params):
+        self._security_group(region, GroupId)
+        for instance in self.instances.get(region, {}).values():
+            if instance['State']['Name'] != 'terminated' and any(
+                    group['GroupId'] == GroupId for group in instance['SecurityGroups']):
+                raise FakeError('DependencyViolation',
+                                f'resource {GroupId} has a dependent object')
+        del self.security_groups[region][GroupId]
+        return {'Return': True, 'GroupId': GroupId}
+
+    def _ec2_run_instances(self, region, ImageId, MinCount, MaxCount, SecurityGroupIds=(),
+                           SubnetId=None, TagSpecifications=(), **params):
+        if ImageId not in self.images.get(region, {}):
+            raise FakeError('InvalidAMIID.NotFound', f'The image id \'[{ImageId}]\' does not exist')
+        for group_id in SecurityGroupIds:
+            self._security_group(region, group_id)
+
+        tags = [tag for spec in TagSpecifications if spec['ResourceType'] == 'instance'
+                for tag in spec['Tags']]
+        instance_ids = [
+            self.add_instance(region, datetime.now(timezone.utc), ImageId, 'pending',
+                              SecurityGroupIds, SubnetId, tags)
+            for _ in range(MaxCount)
+        ]
+        instances = [self.instances[region][instance_id] for instance_id in instance_ids]
+        return {
+            'ReservationId': instances[0]['_reservation'],
+            'OwnerId': ACCOUNT_ID,
+            'Groups': [],
+            'Instances': [
+                {key: value for key, value in instance.items() if not key.startswith('_')}
+                for instance in instances
+            ]
+        }
+
+    def _ec2_terminate_instances(self, region, InstanceIds, **params):
+        changes = []
+        for instance_id in InstanceIds:
+            instance = self.instances.get(region, {}).get(instance_id)
+            if instance is None:
+                raise FakeError('InvalidInstanceID.NotFound',
+                                f'The instance ID \'{instance_id}\' does not exist')
+            previous = dict(instance['State'])
+            instance['State'] = {'Code': 48, 'Name': 'terminated'}
+            changes.append({
+                'InstanceId': instance_id,
+                'PreviousState': previous,
+                'CurrentState': dict(instance['State'])
+            })
+        return {'TerminatingInstances': changes}
+
+    # ------------------------------------------------------------------
+    # S3
+    # ------------------------------------------------------------------
+
+    def _bucket(self, name):
+        bucket = self.buckets.get(name)
+        if bucket is None:
+            raise FakeError('NoSuchBucket', 'The specified bucket does not exist', 404)
+        return bucket
+
+    def _s3_list_objects_v2(self, region, Bucket, Prefix='', Delimiter=None, MaxKeys=1000,
+                            ContinuationToken=None, StartAfter='', **params):
+        bucket = self._bucket(Bucket)
+        after = StartAfter
+        if ContinuationToken:
+            after = _decode_token(ContinuationToken, 'ContinuationToken')['after']
+
+        prefixes = []
+        if Delimiter:
+            contents, prefixes, truncated, last = bucket.list_delimited(
+                after, Prefix, Delimiter, min(MaxKeys, 1000)
+            )
+        else:
+            contents, truncated = bucket.list_after(after, Prefix, min(MaxKeys, 1000))
+            last = contents[-1]['Key'] if contents else after
+        result = {
+            'IsTruncated': truncated,
+            'Name': Bucket,
+            'Prefix': Prefix,
+            'MaxKeys': MaxKeys,
+            'KeyCount': len(contents) + len(prefixes)
+        }
+        if Delimiter:
+            result['Delimiter'] = Delimiter
+        if contents:
+            result['Contents'] = contents
+        if prefixes:
+            result['CommonPrefixes'] = [{'Prefix': prefix} for prefix in prefixes]
+        if ContinuationToken:
+            result['ContinuationToken'] = ContinuationToken
+        if StartAfter:
+            result['StartAfter'] = StartAfter
+        if truncated:
+            result['NextContinuationToken'] = _encode_token({'after': last})
+        return result
+
+    def _s3_get_bucket_replication(self, region, Bucket, **params):
+        bucket = self._bucket(Bucket)
+        if bucket.replication is None:
+            raise FakeError('ReplicationConfigurationNotFoundError',
+                            'The replication configuration was not found', 404)
+        return {'ReplicationConfiguration': copy.deepcopy(bucket.replication)}
+
+    def _s3_get_bucket_versioning(self, region, Bucket, **params):
+        bucket = self._bucket(Bucket)
+        return {'Status': bucket.versioning} if bucket.versioning else {}
+
+    def _s3_put_object(self, region, Bucket, Key, Body=b'', IfNoneMatch=None, IfMatch=None, **params):
+        objects = self._bucket(Bucket).objects
+        if IfNoneMatch == '*' and Key in objects:
+            raise FakeError('PreconditionFailed',
+                            'At least one of the pre-conditions you specified did not hold', 412)
+        if IfMatch is not None:
+            if Key not in objects:
+                raise FakeError('NoSuchKey', 'The specified key does not exist.', 404)
+            if _etag(objects[Key][0]) != IfMatch:
+                raise FakeError('PreconditionFailed',
+                                'At least one of the pre-conditions you specified did not hold', 412)
+        if hasattr(Body, 'read'):
+            Body = Body.read()
+        if isinstance(Body, str):
+            Body = Body.encode()
+        self._bucket(Bucket).put(Key, bytes(Body), datetime.now(timezone.utc))
+        return {'ETag': _etag(bytes(Body))}
+
+    def _stored_object(self, bucket_name, key):
+        bucket = self._bucket(bucket_name)
+        if key not in bucket.objects:
+            raise FakeError('NoSuchKey', 'The specified key does not exist.', 404)
+        return bucket.objects[key]
+
+    def _s3_get_object(self, region, Bucket, Key, **params):
+        body, modified = self._stored_object(Bucket, Key)
+        return {
+            'Body': StreamingBody(io.BytesIO(body), len(body)),
+            'ContentLength': len(body),
+            'LastModified': modified,
+            'ETag': _etag(body)
+        }
+
+    def _s3_head_object(self, region, Bucket, Key, **params):
+        body, modified = self._stored_object(Bucket, Key)
+        return {'ContentLength': len(body), 'LastModified': modified, 'ETag': _etag(body)}
+
+    def _s3_delete_object(self, region, Bucket, Key, **params):
+        self._bucket(Bucket).delete(Key)
+        return {}
+
+    def _s3_create_multipart_upload(self, region, Bucket, Key, **params):
+        self._bucket(Bucket)
+        upload_id = uuid.uuid4().hex
+        self.uploads[upload_id] = {'Bucket': Bucket, 'Key': Key, 'parts': {}}
+        return {'Bucket': Bucket, 'Key': Key, 'UploadId': upload_id}
+
+    def _upload(self, upload_id):
+        if upload_id not in self.uploads:
+            raise FakeError('NoSuchUpload', 'The specified upload does not exist.', 404)
+        return self.uploads[upload_id]
+
+    def _s3_upload_part(self, region, Bucket, Key, UploadId, PartNumber, Body=b'', **params):
+        if hasattr(Body, 'read'):
+            Body = Body.read()
+        etag = f'"{uuid.uuid4().hex}"'
+        self._upload(UploadId)['parts'][PartNumber] = (etag, bytes(Body))
+        return {'ETag': etag}
+
+    def _s3_complete_multipart_upload(self, region, Bucket, Key, UploadId, MultipartUpload, **params):
+        upload = self._upload(UploadId)
+        listed = MultipartUpload['Parts']
+        if [part['PartNumber'] for part in listed] != sorted(upload['parts']):
+            raise FakeError('InvalidPartOrder', 'The list of parts was not in ascending order.')
+        for part in listed:
+            etag, body = upload['parts'][part['PartNumber']]
+            if part['ETag'] != etag:
+                raise FakeError('InvalidPart', 'One or more of the specified parts could not be found.')
+            if part is not listed[-1] and len(body) < S3_MIN_PART_BYTES:
+                raise FakeError('EntityTooSmall', 'Your proposed upload is smaller than the minimum allowed size')
+        del self.uploads[UploadId]
+        body = b''.join(upload['parts'][part['PartNumber']][1] for part in listed)
+        self._bucket(Bucket).put(Key, body, datetime.now(timezone.utc))
+        return {'Bucket': Bucket, 'Key': Key}
+
+    def _s3_abort_multipart_upload(self, region, Bucket, Key, UploadId, **params):
+        self.uploads.pop(UploadId, None)
+        return {}
+
+    # ------------------------------------------------------------------
+    # DLM, SNS, CloudWatch, EventBridge, SSM, Lambda
+    # ------------------------------------------------------------------
+
+    def _dlm_get_lifecycle_policies(self, region, PolicyIds=None, State=None, **params):
+        return {'Policies': [
+            dict(policy) for policy in self.lifecycle_policies.get(region, {}).values()
+            if (not PolicyIds or policy['PolicyId'] in PolicyIds)
+            and (State is None or policy['State'] == State)
+        ]}
+
+    def _dlm_get_lifecycle_policy(self, region, PolicyId, **params):
+        policy = self.lifecycle_policies.get(region, {}).get(PolicyId)
+        if policy is None:
+            raise FakeError('ResourceNotFoundException', f'Policy {PolicyId} not found', 404)
+        return {'Policy': dict(policy, PolicyDetails={
+            'PolicyType': policy['PolicyType'],
+            'Schedules': [{
+                'Name': 'DailyAMIBackup',
+                'CreateRule': {'Interval': 24, 'IntervalUnit': 'HOURS', 'Times': self.policy_times[PolicyId]}
+            }]
+        })}
+
+    def _sns_publish(self, region, TopicArn, Message, Subject=None, **params):
+        if TopicArn not in self.topics:
+            raise FakeError('NotFound', 'Topic does not exist', 404)
+        if len(Message.encode()) > SNS_MAX_BYTES:
+            raise FakeError('InvalidParameter', 'Invalid parameter: Message too long')
+        message_id = str(uuid.uuid4())
+        self.published.append({
+            'MessageId': message_id,
+            'TopicArn': TopicArn,
+            'Subject': Subject,
+            'Message': Message
+        })
+        return {'MessageId': message_id}
+
+    def _sns_publish_batch(self, region, TopicArn, PublishBatchRequestEntries, **params):
+        if TopicArn not in self.topics:
+            raise FakeError('NotFound', 'Topic does not exist', 404)
+        if len(PublishBatchRequestEntries) > 10:
+            raise FakeError('TooManyEntriesInBatchRequest',
+                            'The batch request contains more entries than permissible.')
+        if sum(len(e['Message'].encode()) for e in PublishBatchRequestEntries) > SNS_MAX_BYTES:
+            raise FakeError('BatchRequestTooLong',
+                            'The length of all the messages put together is more than the limit.')
+        successful = []
+        for entry in PublishBatchRequestEntries:
+            message_id = str(uuid.uuid4())
+            self.published.append({
+                'MessageId': message_id,
+                'TopicArn': TopicArn,
+                'Subject': entry.get('Subject'),
+                'Message': entry['Message']
+            })
+            successful.append({'Id': entry['Id'], 'MessageId': message_id})
+        return {'Successful': successful, 'Failed': []}
+
+    def _cloudwatch_put_metric_data(self, region, Namespace, MetricData, **params):
+        for datum in MetricData:
+            self.metric_data.append(dict(datum, Namespace=Namespace, Region=region))
+        return {}
+
+    def _cloudwatch_get_metric_data(self, region, MetricDataQueries, StartTime, EndTime, **params):
+        # Only the daily S3 storage metrics: one datapoint, the current object count
+        results = []
+        for query in MetricDataQueries:
+            metric = query['MetricStat']['Metric']
+            dimensions = {d['Name']: d['Value'] for d in metric.get('Dimensions', [])}
+            bucket = self.buckets.get(dimensions.get('BucketName'))
+            if metric['Namespace'] != 'AWS/S3' or metric['MetricName'] != 'NumberOfObjects' or bucket is None:
+                results.append({'Id': query['Id'], 'Timestamps': [], 'Values': [], 'StatusCode': 'Complete'})
+                continue
+            count = len(bucket.objects) + (bucket.generated.count if bucket.generated else 0)
+            results.append({
+                'Id': query['Id'],
+                'Label': metric['MetricName'],
+                'Timestamps': [datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)],
+                'Values': [float(count)],
+                'StatusCode': 'Complete'
+            })
+        return {'MetricDataResults': results}
+
+    def _eventbridge_put_rule(self, region, Name, ScheduleExpression=None, State='ENABLED', **params):
+        self.rules[Name] = {'Name': Name, 'ScheduleExpression': ScheduleExpression, 'State': State}
+        return {'RuleArn': f'arn:aws:events:{region}:{ACCOUNT_ID}:rule/{Name}'}
+
+    def _eventbridge_describe_rule(self, region, Name, **params):
+        if Name not in self.rules:
+            raise FakeError('ResourceNotFoundException', f'Rule {Name} does not exist.', 400)
+        return dict(self.rules[Name], Arn=f'arn:aws:events:{region}:{ACCOUNT_ID}:rule/{Name}')
+
+    def _ssm_put_parameter(self, region, Name, Value, Type='String', Overwrite=False, **params):
+        parameters = self.parameters.setdefault(region, {})
+        current = parameters.get(Name)
+        if current is not None and not Overwrite:
+            raise FakeError('ParameterAlreadyExists', 'The parameter already exists.')
+
+        version = current['Version'] + 1 if current else 1
+        parameters[Name] = {
+            'Name': Name,
+            'Type': Type,
+            'Value': Value,
+            'Version': version,
+            'LastModifiedDate': datetime.now(timezone.utc),
+            'ARN': f'arn:aws:ssm:{region}:{ACCOUNT_ID}:parameter{Name}',
+            'DataType': 'text'
+        }
+        return {'Version': version, 'Tier': 'Standard'}
+
+    def _ssm_get_parameter(self, region, Name, **params):
+        parameter = self.parameters.get(region, {}).get(Name)
+        if parameter is None:
+            raise FakeError('ParameterNotFound', '')
+        return {'Parameter': dict(parameter)}
+
+    def _ssm_delete_parameter(self, region, Name, **params):
+        if self.parameters.get(region, {}).pop(Name, None) is None:
+            raise FakeError('ParameterNotFound', '')
+        return {}
+
+    def _ssm_get_parameters_by_path(self, region, Path, Recursive=False, **params):
+        prefix = Path.rstrip('/') + '/'
+        selected = [
+            dict(parameter) for name, parameter in sorted(self.parameters.get(region, {}).items())
+            if name.startswith(prefix) and (Recursive or '/' not in name[len(prefix):])
+        ]
+
+        page, result = _page(selected, params, 'NextToken', 'NextToken', 'MaxResults',
+                             default=10, maximum=10)
+        result['Parameters'] = page
+        return result
+
+    def _lambda_invoke(self, region, FunctionName, InvocationType='RequestResponse', Payload=b'',
+                       **params):
+        # Invocations are only recorded; the caller decides whether to run them
+        if isinstance(Payload, bytes):
+            Payload = Payload.decode()
+        self.invocations.append({
+            'FunctionName': FunctionName,
+            'InvocationType': InvocationType,
+            'Payload': Payload
+        })
+        return {'StatusCode': 202 if InvocationType == 'Event' else 200}
+
+
+# ----------------------------------------------------------------------
+# Activation
+# ----------------------------------------------------------------------
+
+_active = None
+
+
+def _attach(client, resolve):
+    """Register the hooks that answer client's calls from resolve()"""
+    region = client.meta.region_name
+
+    def capture_params(params, context=None, **kwargs):
+        if context is not None:
+            context['fake_aws_params'] = params
+
+    def respond(event_name, model, context=None, **kwargs):
+        backend = resolve()
+        if backend is None:
+            raise RuntimeError('No fake AWS backend is active')
+        service = event_name.split('.')[1]
+        return backend.call(region, service, model.name, (context or {}).get('fake_aws_params', {}))
+
+    client.meta.events.register('before-parameter-build.*.*', capture_params,
+                                unique_id='fake-aws-capture-params')
+    # Client hooks run in order, so this lands after the throttling and
+    # instrumentation before-call handlers and they still see the call
+    client.meta.events.register_first('before-call.*.*', respond, unique_id='fake-aws-respond')
+    return client
+
+
+def _dispatch(client):
+    # Calls go to whichever backend is active when they are made, so
+    # module-level clients created at import survive a backend swap
+    return _attach(client, lambda: _active)
+
+
+def activate(backend):
+    """Route every client created through get_client to backend"""
+    global _active
+    _active = backend
+    register_client_hook(_dispatch)
+    return backend
+
+
+# ----------------------------------------------------------------------
+# Fleet generator
+# ----------------------------------------------------------------------
+
+def generate_fleet(backend, db_snapshots=5000, amis=20000, s3_objects=10_000_000,
+                   ec2_instances=200, snapshot_interval_hours=4, ami_interval_hours=24,
+                   dr_copy_ratio=0.95, replication_backlog=3, stale_test_resources=5,
+                   s3_partitions=16, seed=0):
+    """
+    Populate backend with a synthetic DR deployment.
+
+    Every primary snapshot belongs to the monitored DB instance (the
+    master monitor scans one instance), AMIs are spread across
+    ec2_instances, and dr_copy_ratio of each is copied to the DR region.
+    Bucket keys are spread across s3_partitions top-level prefixes.
+    Returns the names the handler events need.
+    """
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+
+    for region in (PRIMARY_REGION, DR_REGION):
+        backend.add_default_network(region)
+
+    fleet = {
+        'db_instance_id': 'dr-project-primary-db',
+        'primary_bucket': 'dr-project-primary-data',
+        'dr_bucket': 'dr-project-dr-data',
+        'sns_topic_arn': backend.add_topic(PRIMARY_REGION, 'dr-alerts')
+    }
+
+    # RDS: primary snapshots, their DR copies and a DR instance with its own
+    # automated snapshots for the restore tester
+    db_id = fleet['db_instance_id']
+    backend.add_db_instance(PRIMARY_REGION, db_id, now - timedelta(days=400))
+    for i in range(db_snapshots):
+        created = now - timedelta(hours=1 + i * snapshot_interval_hours)
+        snapshot = backend.add_db_snapshot(
+            PRIMARY_REGION, f'rds:{db_id}-{created:%Y-%m-%d-%H-%M}', db_id, created
+        )
+        if rng.random() < dr_copy_ratio:
+            backend.add_db_snapshot(
+                DR_REGION, f'dr-copy-{created:%Y%m%d-%H%M%S}', db_id,
+                created + timedelta(minutes=rng.randint(10, 90)),
+                snapshot_type='manual', source=snapshot['DBSnapshotArn']
+            )
+
+    dr_db_id = 'dr-project-dr-db'
+    backend.add_db_instance(DR_REGION, dr_db_id, now - timedelta(days=30))
+    for day in range(7):
+        created = now - timedelta(days=day, hours=2)
+        backend.add_db_snapshot(DR_REGION, f'rds:{dr_db_id}-{created:%Y-%m-%d-%H-%M}', dr_db_id, created)
+
+    # EC2: DLM-managed AMIs per instance and their DR copies
+    instance_ids = [
+        backend.add_instance(PRIMARY_REGION, now - timedelta(days=200), tags=[
+            {'Key': 'Name', 'Value': f'app-{n}'}
+        ])
+        for n in range(max(1, ec2_instances))
+    ]
+    fleet['instance_id'] = instance_ids[0]
+    backend.add_lifecycle_policy(PRIMARY_REGION, 'Daily AMI backups')
+
+    for i in range(amis):
+        instance_id = instance_ids[i % len(instance_ids)]
+        created = now - timedelta(hours=2 + (i // len(instance_ids)) * ami_interval_hours,
+                                  minutes=rng.randint(0, 59))
+        image = backend.add_image(
+            PRIMARY_REGION, created, instance_id,
+            name=f'dr-backup-{instance_id}-{created:%Y%m%d%H%M}',
+            tags=[
+                {'Key': 'CreatedBy', 'Value': 'DLM'},
+                {'Key': 'Backup', 'Value': 'daily'},
+                {'Key': 'instance-id', 'Value': instance_id}
+            ]
+        )
+        if rng.random() < dr_copy_ratio:
+            backend.add_image(
+                DR_REGION, created + timedelta(minutes=rng.randint(15, 120)),
+                name=image['Name'], source_image=image,
+                tags=[{'Key': 'SourceImageId', 'Value': image['ImageId']}]
+            )
+
+    # S3: replicated bucket pair with a small replication backlog
+    backend.add_bucket(fleet['primary_bucket'], PRIMARY_REGION, replicate_to=fleet['dr_bucket'])
+    backend.add_bucket(fleet['dr_bucket'], DR_REGION)
+    backend.buckets[fleet['primary_bucket']].generated = GeneratedKeys(
+        s3_objects, newest=now, partitions=s3_partitions
+    )
+    backend.buckets[fleet['dr_bucket']].generated = GeneratedKeys(
+        max(0, s3_objects - replication_backlog), newest=now - timedelta(minutes=5),
+        partitions=s3_partitions
+    )
+
+    # Restore-test leftovers for test-cleanup
+    vpc_id = next(iter(backend.vpcs[DR_REGION]))
+    old = now - timedelta(hours=48)
+    for n in range(stale_test_resources):
+        test_id = f'restore-test-{old:%Y%m%d}-{n:06d}'
+        group_id = backend.add_security_group(DR_REGION, f'dr-test-sg-{test_id}', vpc_id)
+        backend.add_instance(DR_REGION, old, security_groups=[group_id], tags=[
+            {'Key': 'Purpose', 'Value': 'RestoreTest'},
+            {'Key': 'TestID', 'Value': test_id}
+        ])
+        backend.add_db_instance(DR_REGION, f'dr-test-{test_id}', old)
+
+    return fleet
+
+
+def handler_events(fleet):
+    """The event each handler is invoked with against a generated fleet"""
+    config = {
+        'db_instance_id': fleet['db_instance_id'],
+        'primary_bucket': fleet['primary_bucket'],
+        'dr_bucket': fleet['dr_bucket'],
+        'instance_id': fleet['instance_id'],
+        'sns_topic_arn': fleet['sns_topic_arn']
+    }
+    events = {
+        'master-backup-monitor': {'config': config, 'send_summary': True},
+        'ami-monitor': {
+            'instance_id': fleet['instance_id'],
+            'sns_topic_arn': fleet['sns_topic_arn']
+        },
+        's3-replication-monitor': {
+            'primary_bucket': fleet['primary_bucket'],
+            'dr_bucket': fleet['dr_bucket'],
+            'sns_topic_arn': fleet['sns_topic_arn']
+        },
+        'snapshot-copy': {},
+        'rds-restore-tester': {'config': {'sns_topic_arn': fleet['sns_topic_arn']}},
+        'ec2-restore-tester': {'config': {'sns_topic_arn': fleet['sns_topic_arn']}},
+        'test-cleanup': {'sns_topic_arn': fleet['sns_topic_arn']}
+    }
+    events['discovery-orchestrator'] = {
+        'cache_store': tempfile.mkdtemp(prefix='dr-discovery-'),
+        'consumers': {
+            name: {'function_name': name, 'event': events[name]}
+            for name in discovery.PLANS
+        }
+    }
+    events['check-scheduler'] = {
+        'state_store': tempfile.mkdtemp(prefix='dr-schedule-'),
+        'rule_name': 'dr-check-scheduler',
+        'db_instance_id': fleet['db_instance_id'],
+        'primary_bucket': fleet['primary_bucket'],
+        'dr_bucket': fleet['dr_bucket'],
+        'consumers': {
+            name: {'function_name': name, 'event': events[name]}
+            for name in discovery.PLANS
+        }
+    }
+    # Nothing is published to this store, so the widget serves its placeholder
+    events['dashboard-widget'] = {
+        'view': 'freshness',
+        'dashboard_store': tempfile.mkdtemp(prefix='dr-dashboard-')
+    }
+    return events
+
+
+def main():
+    snapshots = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    amis = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    objects = int(sys.argv[3]) if len(sys.argv) > 3 else 100000
+
+    backend = activate(FakeAWS())
+    fleet = generate_fleet(backend, db_snapshots=snapshots, amis=amis, s3_objects=objects)
+    events = handler_events(fleet)
+
+    for name, event in events.items():
+        started = time.perf_counter()
+        response = load_handler(name).lambda_handler(event, FakeContext())
+        try:
+            calls = json.loads(response['body'])['api_calls']['calls']
+        except (KeyError, TypeError, ValueError):
+            calls = None
+        print(f"{name:<24} status={status_code(response)}  "
+              f"seconds={time.perf_counter() - started:7.2f}  api_calls={calls}")
+
+    print(f"SNS messages published: {len(backend.published)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,322 @@
+"""
+Scenario-driven latency and fault injection for degraded-region testing.
+
+Usage: python scripts/benchmarks/faults.py SCENARIO.json [SCENARIO.json ...]
+           [--handlers name,...] [--size small] [--latency-ms 10] [--output FILE]
+
+A scenario is a JSON file with a list of rules. Each rule matches calls by
+region, service and operation (glob patterns or lists of them, all
+optional) and can add:
+
+    latency_ms / jitter     extra delay per call (jitter is a +/- fraction)
+    throttle                probability that an attempt is throttled; the
+                            call is retried like botocore's standard mode
+                            and fails once every attempt was throttled
+    error                   {"code", "status", "probability", "message"}
+    timeout                 {"probability", "seconds"}: wait, then raise
+                            ReadTimeoutError (after emitting after-call-error,
+                            as botocore does for a failed request)
+    partial_page            fraction of each list result to keep;
+                            "drop_token": true also ends pagination early
+
+Faults are applied at botocore's after-call event, registered first, so
+they work the same over real AWS, the fake backend and Stubber-backed
+clients: the stub or fake still serves (and consumes) its response, then
+the caller sees the delayed, truncated or failed result, and the shared
+throttling and instrumentation hooks record it as a real one.
+
+Without --output the runner prints each handler's runtime and report
+next to a fault-free baseline on the same fleet.
+"""
+
+import argparse
+import contextlib
+import fnmatch
+import io
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fake_aws import THROTTLE_ERRORS, DEFAULT_THROTTLE_ERROR, FakeAWS, activate, generate_fleet, handler_events
+from harness import HANDLERS, FakeContext, load_handler, status_code
+from run_benchmarks import FLEET_SIZES
+
+from botocore.exceptions import ReadTimeoutError
+
+from dr_common import breaker, instrumentation, throttling
+from dr_common.clients import register_client_hook
+
+SCENARIO_DIR = os.path.join(os.path.dirname(__file__), 'scenarios')
+
+# Attempts per call and base backoff, as in botocore's standard retry mode
+MAX_ATTEMPTS = 3
+RETRY_BASE_SECONDS = 0.05
+
+
+class Rule:
+    """One scenario rule: a call matcher and the faults to apply"""
+
+    def __init__(self, spec):
+        self.region = self._patterns(spec.get('region', '*'))
+        self.service = self._patterns(spec.get('service', '*'))
+        self.operation = self._patterns(spec.get('operation', '*'))
+        self.latency_ms = spec.get('latency_ms', 0)
+        self.jitter = spec.get('jitter', 0.0)
+        self.throttle = spec.get('throttle', 0.0)
+        self.error = spec.get('error')
+        self.timeout = spec.get('timeout')
+        self.partial_page = spec.get('partial_page')
+        self.drop_token = spec.get('drop_token', False)
+
+    @staticmethod
+    def _patterns(value):
+        return [value] if isinstance(value, str) else list(value)
+
+    def matches(self, region, service, operation):
+        return all(
+            any(fnmatch.fnmatchcase(value, pattern) for pattern in patterns)
+            for value, patterns in ((region, self.region), (service, self.service),
+                                    (operation, self.operation))
+        )
+
+
+class Scenario:
+    """A named set of rules with its own seeded random source"""
+
+    def __init__(self, name, rules, description='', seed=0):
+        self.name = name
+        self.description = description
+        self.rules = [rule if isinstance(rule, Rule) else Rule(rule) for rule in rules]
+        self.seed = seed
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Restart the random sequence and fault counters for a new run"""
+        self.random = random.Random(self.seed)
+        self.injected = {}
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path) and os.path.exists(os.path.join(SCENARIO_DIR, path + '.json')):
+            path = os.path.join(SCENARIO_DIR, path + '.json')
+        with open(path) as f:
+            spec = json.load(f)
+        return cls(spec.get('name', os.path.basename(path)), spec.get('rules', []),
+                   spec.get('description', ''), spec.get('seed', 0))
+
+    def _chance(self, probability):
+        if not probability:
+            return False
+        with self.lock:
+            return self.random.random() < probability
+
+    def _count(self, kind):
+        with self.lock:
+            self.injected[kind] = self.injected.get(kind, 0) + 1
+
+    def apply(self, region, service, operation, http_response, parsed):
+        """Mutate one call's outcome in place according to matching rules"""
+        rules = [rule for rule in self.rules if rule.matches(region, service, operation)]
+        if not rules or http_response is None or parsed is None:
+            return
+        if parsed.get('Error', {}).get('Code') == breaker.DEGRADED_CODE:
+            # Failed fast by an open circuit breaker; never reached the region
+            return
+
+        delay = 0.0
+        for rule in rules:
+            if rule.latency_ms:
+                with self.lock:
+                    spread = self.random.uniform(-rule.jitter, rule.jitter) if rule.jitter else 0.0
+                delay += rule.latency_ms * (1 + spread) / 1000
+
+        for rule in rules:
+            if rule.timeout and self._chance(rule.timeout.get('probability', 1.0)):
+                self._count('timeout')
+                time.sleep(delay + rule.timeout.get('seconds', 1.0))
+                raise ReadTimeoutError(endpoint_url=f'https://{service}.{region}.amazonaws.com')
+
+        failed = http_response.status_code >= 300
+        for rule in rules:
+            if failed:
+                break
+            retries = 0
+            while retries < MAX_ATTEMPTS and self._chance(rule.throttle):
+                retries += 1
+                self._count('throttle')
+            if retries == MAX_ATTEMPTS:
+                code, status = THROTTLE_ERRORS.get(service, DEFAULT_THROTTLE_ERROR)
+                self._fail(http_response, parsed, code, status, 'Rate exceeded', retries - 1)
+                failed = True
+            elif retries:
+                with self.lock:
+                    delay += sum(self.random.uniform(0, RETRY_BASE_SECONDS * 2 ** n)
+                                 for n in range(1, retries + 1))
+                metadata = parsed.setdefault('ResponseMetadata', {})
+                metadata['RetryAttempts'] = metadata.get('RetryAttempts', 0) + retries
+
+            if not failed and rule.error and self._chance(rule.error.get('probability', 1.0)):
+                self._count('error')
+                self._fail(http_response, parsed, rule.error.get('code', 'InternalError'),
+                           rule.error.get('status', 500), rule.error.get('message', 'Injected fault'), 0)
+                failed = True
+
+        if not failed:
+            for rule in rules:
+                if rule.partial_page is not None:
+                    self._truncate(parsed, rule.partial_page, rule.drop_token)
+
+        if delay:
+            time.sleep(delay)
+
+    def _fail(self, http_response, parsed, code, status, message, retries):
+        http_response.status_code = status
+        metadata = parsed.get('ResponseMetadata', {})
+        parsed.clear()
+        parsed['Error'] = {'Code': code, 'Message': message}
+        parsed['ResponseMetadata'] = dict(metadata, HTTPStatusCode=status, RetryAttempts=retries)
+
+    def _truncate(self, parsed, keep, drop_token):
+        truncated = False
+        for key, value in parsed.items():
+            if isinstance(value, list) and value:
+                parsed[key] = value[:math.ceil(len(value) * keep)]
+                truncated = True
+        if not truncated:
+            return
+
+        self._count('partial_page')
+        if 'KeyCount' in parsed:
+            parsed['KeyCount'] = len(parsed.get('Contents', []))
+        if drop_token:
+            for key in ('NextToken', 'Marker', 'NextContinuationToken'):
+                parsed.pop(key, None)
+            if 'IsTruncated' in parsed:
+                parsed['IsTruncated'] = False
+
+
+def install(client, scenario):
+    """Apply scenario to every call one client makes (real, fake or stubbed)"""
+    region = client.meta.region_name or 'global'
+
+    def after_call(event_name, http_response=None, parsed=None, context=None, **kwargs):
+        active = scenario() if callable(scenario) else scenario
+        if active is None:
+            return
+        _, service, operation = event_name.split('.', 2)
+        try:
+            active.apply(region, service, operation, http_response, parsed)
+        except ReadTimeoutError as e:
+            client.meta.events.emit(f'after-call-error.{service}.{operation}', exception=e, context=context)
+            raise
+
+    # First, so the throttling and instrumentation after-call hooks see the fault
+    client.meta.events.register_first('after-call.*.*', after_call, unique_id='faults-after-call')
+    return client
+
+
+_active = None
+
+
+def inject(scenario):
+    """Apply scenario to every client created through get_client; None clears it"""
+    global _active
+    _active = scenario
+    register_client_hook(_install_active)
+    return scenario
+
+
+def _install_active(client):
+    return install(client, lambda: _active)
+
+
+def summarize(response):
+    """The parts of a handler response that show how far it degraded"""
+    try:
+        body = json.loads(response.get('body') or '{}') if isinstance(response, dict) else {}
+    except (TypeError, ValueError):
+        body = {}
+    if not isinstance(body, dict):
+        body = {}
+
+    return {
+        'status_code': status_code(response),
+        'status': body.get('status'),
+        'issues': len(body.get('issues', [])) + len(body.get('errors', [])),
+        'error': body.get('error'),
+        'metrics': body.get('metrics', {})
+    }
+
+
+def run_once(name, size, latency_ms, scenario):
+    backend = activate(FakeAWS(latency_ms=latency_ms))
+    fleet = generate_fleet(backend, **FLEET_SIZES[size])
+    if scenario is not None:
+        scenario.reset()
+    inject(scenario)
+    throttling.limiter = throttling.Limiter()
+    breaker.registry.reset()
+    module = load_handler(name)
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        response = module.lambda_handler(handler_events(fleet)[name], FakeContext())
+    result = summarize(response)
+    result['wall_seconds'] = round(time.perf_counter() - started, 3)
+
+    calls = instrumentation.collector.stats()
+    result.update(api_calls=calls['calls'], api_errors=calls['errors'], api_retries=calls['retries'])
+    result['injected'] = dict(scenario.injected) if scenario else {}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run handlers under fault scenarios')
+    parser.add_argument('scenarios', nargs='+')
+    parser.add_argument('--handlers')
+    parser.add_argument('--size', default='small', choices=sorted(FLEET_SIZES))
+    parser.add_argument('--latency-ms', type=float, default=10.0)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    handlers = args.handlers.split(',') if args.handlers else list(HANDLERS)
+    scenarios = [Scenario.load(path) for path in args.scenarios]
+    results = {}
+
+    for name in handlers:
+        baseline = run_once(name, args.size, args.latency_ms, None)
+        results[name] = {'baseline': baseline}
+        print(f"{name}: baseline wall={baseline['wall_seconds']:.3f}s status={baseline['status_code']} "
+              f"issues={baseline['issues']}")
+
+        for scenario in scenarios:
+            result = run_once(name, args.size, args.latency_ms, scenario)
+            result['metrics_changed'] = sorted(
+                key for key, value in baseline['metrics'].items() if result['metrics'].get(key) != value
+            )
+            results[name][scenario.name] = result
+            slowdown = result['wall_seconds'] / baseline['wall_seconds'] if baseline['wall_seconds'] else 0
+            print(f"  {scenario.name:<28} wall={result['wall_seconds']:8.3f}s ({slowdown:5.1f}x) "
+                  f"status={result['status_code']} issues={result['issues']} "
+                  f"api_errors={result['api_errors']} injected={result['injected']}")
+            if result['error']:
+                print(f"    error: {result['error']}")
+            if result['metrics_changed']:
+                print(f"    metrics changed: {', '.join(result['metrics_changed'])}")
+
+    inject(None)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, default=str)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+"""
+Benchmark every lambda handler against the fake AWS backend.
+
+Usage:
+    python scripts/benchmarks/run_benchmarks.py run [--sizes small,medium]
+        [--handlers name,...] [--latency-ms 10] [--repeat 3] [--output FILE]
+    python scripts/benchmarks/run_benchmarks.py compare BASELINE.json CURRENT.json
+        [--threshold 0.2]
+
+Each (handler, fleet size) pair runs against a freshly generated fleet
+with the given per-call latency. Wall time is the median of --repeat
+untraced runs; peak memory comes from one extra run under tracemalloc.
+Results are written as JSON keyed by handler and size, tagged with the
+git revision, and `compare` exits non-zero if any metric regressed by
+more than the threshold.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fake_aws import FakeAWS, activate, generate_fleet, handler_events
+from harness import HANDLERS, ROOT, FakeContext, load_handler, status_code
+
+from dr_common import breaker, instrumentation, throttling
+
+# Fleet presets: RDS snapshots, AMIs and S3 objects per bucket
+FLEET_SIZES = {
+    'small': {'db_snapshots': 500, 'amis': 2000, 's3_objects': 100_000},
+    'medium': {'db_snapshots': 2000, 'amis': 10000, 's3_objects': 1_000_000},
+    'large': {'db_snapshots': 5000, 'amis': 20000, 's3_objects': 10_000_000}
+}
+
+# metric -> absolute change below which a relative change is noise
+REGRESSION_METRICS = {
+    'wall_seconds': 0.05,
+    'api_calls': 0,
+    'peak_alloc_mb': 1.0
+}
+DEFAULT_THRESHOLD = 0.2
+
+
+def revision():
+    """Short git revision of the tree being measured, with a dirty marker"""
+    try:
+        rev = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                             capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return rev + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def invoke(name, size, latency_ms, trace=False):
+    """Run one handler against a fresh fleet; returns its measurements"""
+    backend = activate(FakeAWS(latency_ms=latency_ms))
+    fleet = generate_fleet(backend, **FLEET_SIZES[size])
+    event = handler_events(fleet)[name]
+
+    # Learned rates and breaker states must not leak from one run into the next
+    throttling.limiter = throttling.Limiter()
+    breaker.registry.reset()
+    module = load_handler(name)
+
+    if trace:
+        tracemalloc.start()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        response = module.lambda_handler(event, FakeContext())
+    wall = time.perf_counter() - started
+
+    result = {'wall_seconds': round(wall, 3), 'status_code': status_code(response)}
+    if trace:
+        result['peak_alloc_mb'] = round(tracemalloc.get_traced_memory()[1] / 1048576, 2)
+        tracemalloc.stop()
+
+    calls = instrumentation.collector.stats()
+    limits = throttling.limiter.stats()
+    result.update(
+        api_calls=calls['calls'],
+        api_retries=calls['retries'],
+        api_errors=calls['errors'],
+        throttle_wait_seconds=limits['wait_seconds']
+    )
+    return result
+
+
+def measure(name, size, latency_ms, repeat):
+    runs = [invoke(name, size, latency_ms) for _ in range(repeat)]
+    traced = invoke(name, size, latency_ms, trace=True)
+
+    result = dict(runs[-1])
+    result['wall_seconds'] = round(statistics.median(run['wall_seconds'] for run in runs), 3)
+    result['wall_seconds_runs'] = [run['wall_seconds'] for run in runs]
+    result['peak_alloc_mb'] = traced['peak_alloc_mb']
+    return result
+
+
+def run(args):
+    handlers = args.handlers.split(',') if args.handlers else list(HANDLERS)
+    sizes = args.sizes.split(',')
+    for name in handlers:
+        if name not in HANDLERS:
+            sys.exit(f"Unknown handler: {name}")
+    for size in sizes:
+        if size not in FLEET_SIZES:
+            sys.exit(f"Unknown fleet size: {size} (choose from {', '.join(FLEET_SIZES)})")
+
+    document = {
+        'revision': revision(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'latency_ms': args.latency_ms,
+        'repeat': args.repeat,
+        'fleet_sizes': {size: FLEET_SIZES[size] for size in sizes},
+        'results': {}
+    }
+
+    for name in handlers:
+        for size in sizes:
+            result = measure(name, size, args.latency_ms, args.repeat)
+            document['results'].setdefault(name, {})[size] = result
+            print(f"{name:<24} {size:<7} wall={result['wall_seconds']:8.3f}s  "
+                  f"calls={result['api_calls']:6d}  peak={result['peak_alloc_mb']:8.1f} MB  "
+                  f"status={result['status_code']}")
+
+    output = args.output or os.path.join(os.path.dirname(__file__), 'results',
+                                         f"{document['revision']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(document, f, indent=2)
+    print(f"Results written to {output}")
+
+
+def regressions(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """Metrics in current that are worse than baseline by more than threshold"""
+    found = []
+    for name, sizes in current['results'].items():
+        for size, result in sizes.items():
+            before = baseline['results'].get(name, {}).get(size)
+            if before is None:
+                continue
+            for metric, noise in REGRESSION_METRICS.items():
+                old, new = before.get(metric), result.get(metric)
+                if old is None or new is None or new - old <= noise:
+                    continue
+                if old == 0 or (new - old) / old > threshold:
+                    found.append({
+                        'handler': name,
+                        'size': size,
+                        'metric': metric,
+                        'baseline': old,
+                        'current': new,
+                        'change': round((new - old) / old, 3) if old else None
+                    })
+    return found
+
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    if baseline.get('latency_ms') != current.get('latency_ms'):
+        print(f"⚠️ Latency differs: {baseline.get('latency_ms')} ms vs {current.get('latency_ms')} ms")
+
+    found = regressions(baseline, current, args.threshold)
+    print(f"Comparing {baseline.get('revision')} -> {current.get('revision')} "
+          f"(threshold {args.threshold:.0%})")
+    for item in found:
+        change = f"{item['change']:+.0%}" if item['change'] is not None else 'new'
+        print(f"❌ {item['handler']} [{item['size']}] {item['metric']}: "
+              f"{item['baseline']} -> {item['current']} ({change})")
+
+    if found:
+        sys.exit(1)
+    print("✅ No regressions")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the lambda handlers offline')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run')
+    run_parser.add_argument('--sizes', default='small')
+    run_parser.add_argument('--handlers')
+    run_parser.add_argument('--latency-ms', type=float, default=10.0)
+    run_parser.add_argument('--repeat', type=int, default=3)
+    run_parser.add_argument('--output')
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser('compare')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""
+Print the latest recovery point in the catalog the master monitor keeps.
+
+Usage:
+    python scripts/latest-recovery-point.py s3://<bucket>/<prefix> snapshots us-west-2 \
+        [--resource dr-project-primary-db] [--as-of 2026-01-31T12:00:00+00:00] [--type manual]
+
+Exits 1 when the catalog has no fresh matching point; fall back to the
+describe-db-snapshots / describe-images listing in that case.
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda'))
+
+from dr_common.catalog import DEFAULT_MAX_AGE_HOURS, open_catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('store', help='catalog store (s3://bucket/prefix or a local directory)')
+    parser.add_argument('kind', choices=('snapshots', 'images'))
+    parser.add_argument('region')
+    parser.add_argument('--resource', help='DB instance or EC2 instance ID (default: any)')
+    parser.add_argument('--as-of', type=datetime.fromisoformat,
+                        help='latest point created at or before this time (default: now)')
+    parser.add_argument('--type', dest='point_type', help='snapshot type (automated, manual)')
+    parser.add_argument('--max-age-hours', type=float, default=DEFAULT_MAX_AGE_HOURS,
+                        help='ignore resources not synced for this long')
+    args = parser.parse_args()
+
+    point = open_catalog(args.store).latest(
+        args.kind, args.region, args.resource, args.as_of, args.point_type, args.max_age_hours
+    )
+    if point is None:
+        print("No fresh recovery point in the catalog", file=sys.stderr)
+        sys.exit(1)
+    print(point['point_id'])
+
+
+if __name__ == '__main__':
+    main()
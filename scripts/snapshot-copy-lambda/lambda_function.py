@@ -1,33 +1,41 @@
-import boto3
 import json
 from datetime import datetime
 
+from dr_common import instrumentation
+from dr_common.clients import get_client
+from dr_common.pagination import items
+
 def lambda_handler(event, context):
     """
     Automatically copy RDS snapshots from us-east-1 to us-west-2
     """
     
+    instrumentation.collector.reset()
+    
     # Initialize clients
-    rds_primary = boto3.client('rds', region_name='us-east-1')
-    rds_dr = boto3.client('rds', region_name='us-west-2')
+    rds_primary = get_client('rds', region_name='us-east-1')
+    rds_dr = get_client('rds', region_name='us-west-2')
     
     db_instance_id = 'dr-project-primary-db'
     
     try:
-        # Get the latest automated snapshot
-        response = rds_primary.describe_db_snapshots(
-            DBInstanceIdentifier=db_instance_id,
-            SnapshotType='automated',
-            MaxRecords=1
-        )
+        # Get the latest available automated snapshot
+        snapshots = [
+            s for s in items(
+                rds_primary, 'describe_db_snapshots', 'DBSnapshots',
+                DBInstanceIdentifier=db_instance_id,
+                SnapshotType='automated'
+            )
+            if s['Status'] == 'available'
+        ]
         
-        if not response['DBSnapshots']:
+        if not snapshots:
             return {
                 'statusCode': 404,
                 'body': json.dumps('No snapshots found')
             }
         
-        latest_snapshot = response['DBSnapshots'][0]
+        latest_snapshot = max(snapshots, key=lambda x: x['SnapshotCreateTime'])
         source_snapshot_arn = latest_snapshot['DBSnapshotArn']
         source_snapshot_id = latest_snapshot['DBSnapshotIdentifier']
         
@@ -50,7 +58,8 @@ def lambda_handler(event, context):
             'body': json.dumps({
                 'message': 'Snapshot copied successfully',
                 'source': source_snapshot_id,
-                'destination': dr_snapshot_id
+                'destination': dr_snapshot_id,
+                'api_calls': instrumentation.collector.stats()
             })
         }
         